@@ -1,2 +1,7 @@
 __all__ = ["cc2", "ccd", "ccsd", "accd", "cc3", "ccsdt", "ccsdtq", "ccsdtq-rev", "ccsdt1", "ccsdt_p", "eccc2"]
 MODULES = [module for module in __all__]
+
+# modules whose updates pass the T3 (and higher) amplitudes or two-body integrals through the
+# double-precision Fortran kernels, which would copy them to and from double precision in every
+# iteration if options["mixed_precision"] were used, so these are always run in double precision
+DOUBLE_PRECISION_MODULES = ["cc3", "ccsdt", "ccsdt_p", "ccsdtq", "ccsdtq-rev"]
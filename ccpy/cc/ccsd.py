@@ -2,6 +2,7 @@
 doubles (CCSD) calculation for a molecular system."""
 import numpy as np
 from ccpy.hbar.hbar_ccs import get_pre_ccs_intermediates, get_ccs_intermediates_opt
+from ccpy.models.integrals import contract_vvvv
 from ccpy.utilities.updates import cc_loops2
 
 def update(T, dT, H, X, shift, flag_RHF, system):
@@ -94,7 +95,7 @@ def update_t2a(T, dT, H, H0, shift):
     dT.aa -= 0.5 * np.einsum("mi,abmj->abij", H.a.oo, T.aa, optimize=True)
     dT.aa += np.einsum("amie,ebmj->abij", I2A_voov, T.aa, optimize=True)
     dT.aa += np.einsum("amie,bejm->abij", I2B_voov, T.ab, optimize=True)
-    dT.aa += 0.25 * np.einsum("abef,efij->abij", H0.aa.vvvv, tau, optimize=True)
+    dT.aa += 0.25 * contract_vvvv(H0.aa.vvvv, tau)
     dT.aa += 0.125 * np.einsum("mnij,abmn->abij", I2A_oooo, T.aa, optimize=True)
 
     T.aa, dT.aa = cc_loops2.cc_loops2.update_t2a(
@@ -139,7 +140,7 @@ def update_t2b(T, dT, H, H0, shift):
     dT.ab -= np.einsum("mbie,aemj->abij", H.ab.ovov, T.ab, optimize=True)
     dT.ab -= np.einsum("amej,ebim->abij", I2B_vovo, T.ab, optimize=True)
     dT.ab += np.einsum("mnij,abmn->abij", I2B_oooo, T.ab, optimize=True)
-    dT.ab += np.einsum("abef,efij->abij", H0.ab.vvvv, tau, optimize=True)
+    dT.ab += contract_vvvv(H0.ab.vvvv, tau)
 
     T.ab, dT.ab = cc_loops2.cc_loops2.update_t2b(
         T.ab, dT.ab + H0.ab.vvoo, H0.a.oo, H0.a.vv, H0.b.oo, H0.b.vv, shift
@@ -170,7 +171,7 @@ def update_t2c(T, dT, H, H0, shift):
     dT.bb -= 0.5 * np.einsum("mi,abmj->abij", H.b.oo, T.bb, optimize=True)
     dT.bb += np.einsum("amie,ebmj->abij", I2C_voov, T.bb, optimize=True)
     dT.bb += np.einsum("maei,ebmj->abij", I2B_ovvo, T.ab, optimize=True)
-    dT.bb += 0.25 * np.einsum("abef,efij->abij", H0.bb.vvvv, tau, optimize=True)
+    dT.bb += 0.25 * contract_vvvv(H0.bb.vvvv, tau)
     dT.bb += 0.125 * np.einsum("mnij,abmn->abij", I2C_oooo, T.bb, optimize=True)
 
     T.bb, dT.bb = cc_loops2.cc_loops2.update_t2c(
@@ -49,6 +49,57 @@ def update(T, dT, H, X, shift, flag_RHF, system):
 
     return T, dT
 
+def get_t3_guess(T, H, shift, flag_RHF):
+    """
+    Sets the T3 amplitudes to the second-order estimate T3[2] = (V_N T2)_C / D3 of CCSD[T],
+    used as the initial guess when CCSDT is started from the converged T1 and T2 of CCSD.
+    """
+    # T3 = 0 + (V_N T2)_C / D3; the Fortran updates add the denominator-weighted projection to T3
+    T.aaa[...] = 0.0
+    T.aab[...] = 0.0
+    T.abb[...] = 0.0
+    T.bbb[...] = 0.0
+
+    I2A_vooo = H.aa.vooo - np.einsum("me,aeij->amij", H.a.ov, T.aa, optimize=True)
+    I2B_ovoo = H.ab.ovoo - np.einsum("me,ecjk->mcjk", H.a.ov, T.ab, optimize=True)
+    I2B_vooo = H.ab.vooo - np.einsum("me,aeik->amik", H.b.ov, T.ab, optimize=True)
+    I2C_vooo = H.bb.vooo - np.einsum("me,aeij->amij", H.b.ov, T.bb, optimize=True)
+
+    X3A = -0.25 * np.einsum("amij,bcmk->abcijk", I2A_vooo, T.aa, optimize=True)
+    X3A += 0.25 * np.einsum("abie,ecjk->abcijk", H.aa.vvov, T.aa, optimize=True)
+    T.aaa, _ = cc_loops2.cc_loops2.update_t3a_v2(T.aaa, X3A, H.a.oo, H.a.vv, shift)
+
+    X3B = 0.5 * np.einsum("bcek,aeij->abcijk", H.ab.vvvo, T.aa, optimize=True)
+    X3B -= 0.5 * np.einsum("mcjk,abim->abcijk", I2B_ovoo, T.aa, optimize=True)
+    X3B += np.einsum("acie,bejk->abcijk", H.ab.vvov, T.ab, optimize=True)
+    X3B -= np.einsum("amik,bcjm->abcijk", I2B_vooo, T.ab, optimize=True)
+    X3B += 0.5 * np.einsum("abie,ecjk->abcijk", H.aa.vvov, T.ab, optimize=True)
+    X3B -= 0.5 * np.einsum("amij,bcmk->abcijk", I2A_vooo, T.ab, optimize=True)
+    T.aab, _ = cc_loops2.cc_loops2.update_t3b_v2(T.aab, X3B, H.a.oo, H.a.vv, H.b.oo, H.b.vv, shift)
+
+    if flag_RHF:
+        T.abb = np.transpose(T.aab, (2, 1, 0, 5, 4, 3))
+        T.bbb = T.aaa.copy()
+        return T
+
+    I2B_ovoo_c = H.ab.ovoo - np.einsum("me,ebij->mbij", H.a.ov, T.ab, optimize=True)
+    I2B_vooo_c = H.ab.vooo - np.einsum("me,aeij->amij", H.b.ov, T.ab, optimize=True)
+    I2C_vooo_c = H.bb.vooo - np.einsum("me,cekj->cmkj", H.b.ov, T.bb, optimize=True)
+
+    X3C = 0.5 * np.einsum("abie,ecjk->abcijk", H.ab.vvov, T.bb, optimize=True)
+    X3C -= 0.5 * np.einsum("amij,bcmk->abcijk", I2B_vooo_c, T.bb, optimize=True)
+    X3C += 0.5 * np.einsum("cbke,aeij->abcijk", H.bb.vvov, T.ab, optimize=True)
+    X3C -= 0.5 * np.einsum("cmkj,abim->abcijk", I2C_vooo_c, T.ab, optimize=True)
+    X3C += np.einsum("abej,ecik->abcijk", H.ab.vvvo, T.ab, optimize=True)
+    X3C -= np.einsum("mbij,acmk->abcijk", I2B_ovoo_c, T.ab, optimize=True)
+    T.abb, _ = cc_loops2.cc_loops2.update_t3c_v2(T.abb, X3C, H.a.oo, H.a.vv, H.b.oo, H.b.vv, shift)
+
+    X3D = -0.25 * np.einsum("amij,bcmk->abcijk", I2C_vooo, T.bb, optimize=True)
+    X3D += 0.25 * np.einsum("abie,ecjk->abcijk", H.bb.vvov, T.bb, optimize=True)
+    T.bbb, _ = cc_loops2.cc_loops2.update_t3d_v2(T.bbb, X3D, H.b.oo, H.b.vv, shift)
+
+    return T
+
 def update_t1a(T, dT, H, X, shift):
     """
     Update t1a amplitudes by calculating the projection <ia|(H_N e^(T1+T2+T3))_C|0>.
@@ -1146,10 +1146,8 @@ def get_ccs_intermediates_opt(T, H0):
     Calculate the CCS-like similarity-transformed HBar intermediates (H_N e^T1)_C.
     """
 
-    # [TODO]: Copying large arrays is slow! We should pass in Hbar and simply update its elements.
-    from copy import deepcopy
-    # Copy the Bare Hamiltonian object for T1-transforemd HBar
-    H = deepcopy(H0)
+    # Copy-on-write copy of the bare Hamiltonian for T1-transforemd HBar
+    H = H0.copy_on_write()
 
     # 1-body components
     # -------------------#
@@ -1299,10 +1297,9 @@ def get_ccsd_intermediates(T, H0):
     """Calculate the CCSD-like intermediates for CCSDT. This routine
     should only calculate terms with T2 and any remaining terms outside of the CCS intermediate
     routine."""
-    from copy import deepcopy
 
-    # Copy the Bare Hamiltonian object for T1/T2-similarity transformed HBar
-    H = deepcopy(H0)
+    # Copy-on-write copy of the bare Hamiltonian for T1/T2-similarity transformed HBar
+    H = H0.copy_on_write()
 
     H.a.ov += (
             np.einsum("imae,em->ia", H0.aa.oovv, T.a, optimize=True)
@@ -1,7 +1,7 @@
 import numpy as np
 import time
 
-def pivoted_chol(get_diag, get_row, rank_max, err_tol = 1e-6):
+def pivoted_chol(get_diag, get_row, rank_max, err_tol = 1e-6, get_block=None, block_ratio=1.0e-02):
     """
     A simple python function which computes the Pivoted Cholesky decomposition of a 
     positive semi-definite operator. Only diagonal elements and select rows of the
@@ -12,8 +12,12 @@ def pivoted_chol(get_diag, get_row, rank_max, err_tol = 1e-6):
     M - The maximum rank of the approximate decomposition; an integer. 
     err_tol - The maximum error tolerance, that is difference between the approximate decomposition and true matrix, allowed. 
               Note that this is in the Trace norm, not the spectral or frobenius norm. 
+    get_block - Optional function which takes the index of the pivot and returns a tuple (indices, rows) containing
+                a batch of rows that includes the pivot row (e.g., all rows belonging to the same shell pair). Every row
+                of the batch whose remaining diagonal exceeds block_ratio times that of the pivot is then used
+                as a pivot before new rows are requested.
 
-    Returns: R, an upper triangular matrix of column dimension equal to the target matrix. It's row dimension will 
+    Returns: R, the Cholesky vectors stored row-wise. It's row dimension will 
                 be at most M, but may be less if the termination condition was acceptably low error rather than max iters reached.
     """
 
@@ -22,40 +26,42 @@ def pivoted_chol(get_diag, get_row, rank_max, err_tol = 1e-6):
     print("     Rank         Error")
     print("   ------------------------")
 
-
     d = np.copy(get_diag())
     N = len(d)
 
-    piv = np.arange(N)
-
-    R = np.zeros((rank_max, N))
+    # Storage for the Cholesky vectors is grown as needed rather than allocated for rank_max
+    R = np.zeros((min(rank_max, 10 * int(np.sqrt(N)) + 1), N))
 
     err = np.sum(np.abs(d))
 
     m = 0
     while (m < rank_max) and (err > err_tol):
 
-        i = m + np.argmax(d[piv[m:]])
-
-        tmp = piv[m]
-        piv[m] = piv[i]
-        piv[i] = tmp
-
-        R[m, piv[m]] = np.sqrt(d[piv[m]])
-        Apivm = get_row(piv[m])
-        for i in range(m + 1, N):
-            if m > 0:
-                ip = np.dot(R[:m, piv[m]].T, R[:m, piv[i]])
-            else:
-                ip = 0
-            R[m, piv[i]] = (Apivm[piv[i]] - ip) / R[m, piv[m]]
-            d[piv[i]] -= R[m, piv[i]]**2
-
-        err = np.sum(d[piv[m + 1:]])
-        m += 1
-        # print the rank and error every so often
-        if m % 20 == 0:
-            print("     ", m, "       ", np.round(err, 6))
+        i = np.argmax(d)
+        if get_block is None:
+            indices, rows = [i], get_row(i)[np.newaxis, :]
+        else:
+            indices, rows = get_block(i)
+        dmax = d[i]
+
+        # Use every sufficiently large diagonal of the batch as a pivot, largest first
+        while (m < rank_max) and (err > err_tol):
+            k = np.argmax(d[indices])
+            piv = indices[k]
+            if d[piv] < block_ratio * dmax or d[piv] <= 0.0:
+                break
+            if m == R.shape[0]:
+                R = np.vstack((R, np.zeros((min(rank_max, 2 * m) - m, N))))
+            # R(m,:) = [A(piv,:) - sum_{n<m} R(n,piv) R(n,:)] / sqrt(d(piv))
+            R[m, :] = (rows[k, :] - np.dot(R[:m, piv], R[:m, :])) / np.sqrt(d[piv])
+            d -= R[m, :]**2
+            d[piv] = 0.0
+
+            err = np.sum(d)
+            m += 1
+            # print the rank and error every so often
+            if m % 20 == 0:
+                print("     ", m, "       ", np.round(err, 6))
 
     # Final cholesky vectors stored as R(s|pq), where s = 1,...,rank
     R = R[:m, :]
@@ -66,51 +72,61 @@ def pivoted_chol(get_diag, get_row, rank_max, err_tol = 1e-6):
     print(f"   Total CPU time is {time.process_time() - t_cpu_start} seconds")
     return R
 
+def unpack_cholesky_vectors(Rp, index_p, index_q, norb):
+    """Unflatten the Cholesky vectors R(x|pq), defined for the composite index p<=q,
+    into R(x|p,q) defined for all p,q."""
+    R = np.zeros((Rp.shape[0], norb, norb))
+    R[:, index_p, index_q] = Rp
+    R[:, index_q, index_p] = Rp
+    return R
+
 def cholesky_eri_from_pyscf(mol, tol=1.0e-09):
     print("   ==========================")
     print("   ERI Cholesky Decomposition")
     print("   Error tolerance = ", tol)
     print("   ==========================")
-    # Perform Cholesky decomposition of ERIs
+    # Perform Cholesky decomposition of ERIs. The AO integrals are computed
+    # in batches of shell pairs, so the full set of ERIs is never stored.
     norb = mol.nao
-    eri = mol.intor("int2e", aosym="s1").transpose(0, 2, 1, 3) # in physics notation
-    # Use the unique set of 2-electron integrals <pq|rs>, for p<q and r<s
-    ndim = int(norb * (norb + 1) / 2)
-    # Loop through integrals to extract diagonal elements and array for p<q indexing
-    index_pq = np.zeros((ndim, 2), dtype=np.int32)
+    nbas = mol.nbas
+    ao_loc = mol.ao_loc_nr()
+    ao_shell = np.repeat(np.arange(nbas), np.diff(ao_loc))
+    # Use the unique set of 2-electron integrals (pq|rs), for p<=q and r<=s
+    index_p, index_q = np.triu_indices(norb)
+    ndim = len(index_p)
+    index_pq = np.zeros((norb, norb), dtype=np.int64)
+    index_pq[index_p, index_q] = np.arange(ndim)
+    index_pq[index_q, index_p] = np.arange(ndim)
+
+    def get_shell_pair(P, Q):
+        # Composite indices and AO offsets of the pairs p<=q with p in shell P and q in shell Q
+        p, q = np.meshgrid(np.arange(ao_loc[P], ao_loc[P + 1]), np.arange(ao_loc[Q], ao_loc[Q + 1]), indexing="ij")
+        mask = p <= q
+        return index_pq[p[mask], q[mask]], p[mask] - ao_loc[P], q[mask] - ao_loc[Q]
+
+    # Obtain the diagonal elements (pq|pq) shell pair by shell pair
     eri_diag = np.zeros(ndim)
-    kout = 0
-    for p in range(norb):
-        for q in range(p, norb):
-            index_pq[kout, 0] = p
-            index_pq[kout, 1] = q
-            eri_diag[kout] = eri[p, p, q, q]
-            kout += 1
+    for P in range(nbas):
+        for Q in range(P, nbas):
+            pairs, ip, iq = get_shell_pair(P, Q)
+            eri = mol.intor("int2e", aosym="s1", shls_slice=(P, P + 1, Q, Q + 1, P, P + 1, Q, Q + 1))
+            eri_diag[pairs] = eri[ip, iq, ip, iq]
     # Define diagonal function
     get_diag = lambda: eri_diag.copy()
-    # Define row function to obtain all <pi|qj> for a given p,q, where p<q and i<j
+    # Define block function to obtain all rows (pq|rs), r<=s, for every pair pq in the shell pair of the pivot
+    def get_block(row):
+        P, Q = ao_shell[index_p[row]], ao_shell[index_q[row]]
+        pairs, ip, iq = get_shell_pair(P, Q)
+        eri = mol.intor("int2e", aosym="s1", shls_slice=(P, P + 1, Q, Q + 1, 0, nbas, 0, nbas))
+        return pairs, eri[ip, iq][:, index_p, index_q]
+    # Define row function to obtain all (pq|rs) for a given p,q, where p<=q and r<=s
     def get_row(row):
-        p = index_pq[row, 0]
-        q = index_pq[row, 1]
-        kout = 0
-        eri_row = np.zeros(ndim)
-        for i in range(norb):
-            for j in range(i, norb):
-                eri_row[kout] = eri[p, i, q, j]
-                kout += 1
-        return eri_row 
-    # Perform the Cholesky decomposition to obtain R(x|pq), where pq is the composite index for p<q
-    Rp = pivoted_chol(get_diag, get_row, rank_max=ndim, err_tol=tol)
-    rank_chol = Rp.shape[0]
+        pairs, rows = get_block(row)
+        return rows[np.where(pairs == row)[0][0]]
+    # Perform the Cholesky decomposition to obtain R(x|pq), where pq is the composite index for p<=q
+    Rp = pivoted_chol(get_diag, get_row, rank_max=ndim, err_tol=tol, get_block=get_block)
     # Unflatten Cholesky vectors into R(x|pq) defined for all p,q
-    R = np.zeros((rank_chol, norb, norb))
-    for m in range(rank_chol):
-        for kout in range(ndim):
-            p = index_pq[kout, 0]
-            q = index_pq[kout, 1]
-            R[m, p, q] = Rp[m, kout]
-            R[m, q, p] = Rp[m, kout]
-    return R
+    return unpack_cholesky_vectors(Rp, index_p, index_q, norb)
 
 def cholesky_eri_from_file(eri_file, norb, tol=1.0e-09):
 
@@ -164,15 +180,6 @@ def cholesky_eri_from_file(eri_file, norb, tol=1.0e-09):
         return eri_row 
 
     Rp = pivoted_chol(get_diag, get_row, rank_max=ndim**2, err_tol=1.0e-09)
-    rank_chol = Rp.shape[0]
 
-    R = np.zeros((rank_chol, norb, norb))
-    for m in range(rank_chol):
-        for kout in range(ndim):
-            p = index_pq[kout, 0]
-            q = index_pq[kout, 1]
-            R[m, p, q] = Rp[m, kout]
-            R[m, q, p] = Rp[m, kout]
-
-    return R
+    return unpack_cholesky_vectors(Rp, index_pq[:, 0], index_pq[:, 1], norb)
 
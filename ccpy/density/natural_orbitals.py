@@ -132,3 +132,178 @@ def transform_to_natorbs(rdm1, H, system, dump_integrals=False, print_diagnostic
         print("   -------------\n")
 
     return H, system
+
+def calc_mp2_vv_density(H, system):
+    """Computes the (unrelaxed) MP2 one-particle density in the space of orbitals that are
+    unoccupied for both spins, summed over spin, along with the MP2 correlation energy.
+
+    Returns
+    -------
+    rdm1_vv : ndarray(dtype=float, shape=(nunoccupied_alpha, nunoccupied_alpha))
+        Spin-summed MP2 virtual-virtual density matrix
+    mp2_energy : float
+        MP2 correlation energy
+    """
+    eps_oa = np.diagonal(H.a.oo)
+    eps_va = np.diagonal(H.a.vv)
+    eps_ob = np.diagonal(H.b.oo)
+    eps_vb = np.diagonal(H.b.vv)
+
+    t2aa = H.aa.vvoo / (eps_va[:, None, None, None] + eps_va[None, :, None, None]
+                        - eps_oa[None, None, :, None] - eps_oa[None, None, None, :])
+    t2ab = H.ab.vvoo / (eps_va[:, None, None, None] + eps_vb[None, :, None, None]
+                        - eps_oa[None, None, :, None] - eps_ob[None, None, None, :])
+    t2bb = H.bb.vvoo / (eps_vb[:, None, None, None] + eps_vb[None, :, None, None]
+                        - eps_ob[None, None, :, None] - eps_ob[None, None, None, :])
+
+    mp2_energy = (
+            0.25 * np.einsum("ijab,abij->", H.aa.oovv, t2aa, optimize=True)
+            + np.einsum("ijab,abij->", H.ab.oovv, t2ab, optimize=True)
+            + 0.25 * np.einsum("ijab,abij->", H.bb.oovv, t2bb, optimize=True)
+    )
+
+    rdm1a_vv = (
+            0.5 * np.einsum("afmn,bfmn->ab", t2aa, t2aa, optimize=True)
+            + np.einsum("afmn,bfmn->ab", t2ab, t2ab, optimize=True)
+    )
+    rdm1b_vv = (
+            0.5 * np.einsum("afmn,bfmn->ab", t2bb, t2bb, optimize=True)
+            + np.einsum("fanm,fbnm->ab", t2ab, t2ab, optimize=True)
+    )
+    # beta virtuals that are singly occupied in the reference are excluded
+    nsingle = system.noccupied_alpha - system.noccupied_beta
+    return rdm1a_vv + rdm1b_vv[nsingle:, nsingle:], mp2_energy
+
+def transform_to_fno(H, system, occupation_threshold=1.0e-05, mp2_correction=True):
+    """Truncates the virtual space of the bare Hamiltonian H using frozen natural orbitals
+    (FNOs). The spin-summed MP2 virtual-virtual density is diagonalized within each irrep,
+    natural virtuals with occupation numbers below occupation_threshold are discarded
+    (they are treated as deleted orbitals of the new System), and the retained natural
+    virtuals are semicanonicalized. The occupied orbitals, and therefore the reference
+    energy, are unchanged.
+
+    Returns
+    -------
+    H : Integral object
+        Hamiltonian in the truncated FNO basis
+    system : System object
+        System with the discarded natural virtuals moved into the deleted space
+    delta_mp2 : float
+        MP2 correlation energy of the full virtual space minus that of the truncated
+        space, which may be added to correlation energies computed in the FNO basis
+        (0.0 if mp2_correction=False)
+    """
+    from ccpy.interfaces.checkpoint_tools import get_system_params
+    from ccpy.models.integrals import Integral, CholeskySortedIntegral, SortedIntegralAlias
+    from ccpy.models.system import System
+
+    rdm1_vv, mp2_energy = calc_mp2_vv_density(H, system)
+
+    # Fock matrix in the virtual space common to both spins
+    nsingle = system.noccupied_alpha - system.noccupied_beta
+    fock_vv = 0.5 * (H.a.vv + H.b.vv[nsingle:, nsingle:])
+
+    # diagonalize the MP2 density and semicanonicalize the retained natural virtuals in each irrep
+    virtual_symmetries = system.orbital_symmetries[system.noccupied_alpha:system.norbitals]
+    keep_vectors, keep_energies, keep_symmetries = [], [], []
+    drop_energies, drop_symmetries = [], []
+    print("   Frozen Natural Orbital (FNO) Truncation")
+    print("   Occupation threshold = {:.2e}".format(occupation_threshold))
+    print("   Irrep     Virtuals     Retained")
+    print("   --------------------------------")
+    for irrep in system.point_group_irrep_to_number.keys():
+        idx = [a for a, sym in enumerate(virtual_symmetries) if sym == irrep]
+        if not idx:
+            continue
+        nocc_vals, vecs = np.linalg.eigh(rdm1_vv[np.ix_(idx, idx)])
+        keep = nocc_vals > occupation_threshold
+        print("   {:<8}  {:>8}     {:>8}".format(irrep, len(idx), np.count_nonzero(keep)))
+        eps, w = np.linalg.eigh(vecs[:, keep].T @ fock_vv[np.ix_(idx, idx)] @ vecs[:, keep])
+        U = np.zeros((system.nunoccupied_alpha, len(eps)))
+        U[idx, :] = vecs[:, keep] @ w
+        keep_vectors.append(U)
+        keep_energies.extend(eps)
+        keep_symmetries.extend([irrep] * len(eps))
+        # the discarded virtuals are only needed for their orbital energies and symmetries
+        eps = np.linalg.eigvalsh(vecs[:, ~keep].T @ fock_vv[np.ix_(idx, idx)] @ vecs[:, ~keep])
+        drop_energies.extend(eps)
+        drop_symmetries.extend([irrep] * len(eps))
+    # order the retained virtuals by their semicanonical orbital energies
+    order = np.argsort(keep_energies, kind="stable")
+    U = np.hstack(keep_vectors)[:, order]
+    keep_energies = np.asarray(keep_energies)[order]
+    keep_symmetries = [keep_symmetries[i] for i in order]
+    nkeep = U.shape[1]
+    print("   --------------------------------")
+    print("   Total     {:>8}     {:>8}\n".format(system.nunoccupied_alpha, nkeep))
+
+    # Build the truncated System; the discarded virtuals become deleted orbitals
+    params = get_system_params(system)
+    nocc_all = system.nfrozen + system.noccupied_alpha
+    params["ndelete"] = system.ndelete + system.nunoccupied_alpha - nkeep
+    params["orbital_symmetries"] = (
+            list(system.orbital_symmetries_all[:nocc_all])
+            + keep_symmetries
+            + drop_symmetries
+            + list(system.orbital_symmetries_all[nocc_all + system.nunoccupied_alpha:])
+    )
+    if system.mo_energies is not None:
+        mo_energies = np.asarray(system.mo_energies)
+        params["mo_energies"] = np.concatenate((mo_energies[:nocc_all],
+                                                keep_energies,
+                                                drop_energies,
+                                                mo_energies[nocc_all + system.nunoccupied_alpha:]))
+    if system.mo_occupation is not None:
+        params["mo_occupation"] = system.mo_occupation
+    reference_energy = params.pop("reference_energy")
+    frozen_energy = params.pop("frozen_energy")
+    fno_system = System(**params)
+    fno_system.reference_energy = reference_energy
+    fno_system.frozen_energy = frozen_energy
+
+    # virtual-orbital transformation for each spin (beta virtuals include the singly occupied orbitals)
+    transformation = {"a": U, "b": np.zeros((system.nunoccupied_beta, nsingle + nkeep))}
+    transformation["b"][:nsingle, :nsingle] = np.eye(nsingle)
+    transformation["b"][nsingle:, nsingle:] = U
+
+    def transform_block(array, block, spins):
+        for axis, (orbital, spin) in enumerate(zip(block, spins)):
+            if orbital == "v":
+                array = np.moveaxis(np.tensordot(array, transformation[spin], axes=([axis], [0])), -1, axis)
+        return np.asfortranarray(array)
+
+    restricted = H.is_restricted()
+    if isinstance(H.aa, CholeskySortedIntegral):
+        onebody, cholesky_vectors = {}, {}
+        for spin in ["a", "b"]:
+            blocks = {block: transform_block(getattr(getattr(H, spin), block), block, spin * 2)
+                      for block in ["oo", "ov", "vo", "vv"]}
+            onebody[spin] = np.block([[blocks["oo"], blocks["ov"]], [blocks["vo"], blocks["vv"]]])
+        for spin, vectors in [("a", H.ab.left), ("b", H.ab.right)]:
+            if spin == "b" and H.ab.right is H.ab.left:
+                cholesky_vectors["b"] = cholesky_vectors["a"]
+                continue
+            # Cholesky vectors R(x|pq) carry the auxiliary index first
+            cholesky_vectors[spin] = {block: np.ascontiguousarray(transform_block(array, "o" + block, spin * 3))
+                                      for block, array in vectors.items()}
+        fno_hamiltonian = Integral.from_cholesky(fno_system, onebody, cholesky_vectors, restricted=restricted)
+    else:
+        blocks = {}
+        for name in H.get_spin_cases():
+            spin_case = getattr(H, name)
+            if isinstance(spin_case, SortedIntegralAlias):
+                continue
+            spins = name * 2 if len(name) == 1 else name[0] + name[1] + name[0] + name[1]
+            blocks[name] = {block: transform_block(getattr(spin_case, block), block, spins)
+                            for block in spin_case.slices if getattr(spin_case, block) is not None}
+        fno_hamiltonian = Integral.from_blocks(fno_system, H.order, blocks, restricted=restricted)
+
+    delta_mp2 = 0.0
+    if mp2_correction:
+        _, fno_mp2_energy = calc_mp2_vv_density(fno_hamiltonian, fno_system)
+        delta_mp2 = mp2_energy - fno_mp2_energy
+        print("   MP2 correlation energy (full space) = {:>16.10f}".format(mp2_energy))
+        print("   MP2 correlation energy (FNO space)  = {:>16.10f}".format(fno_mp2_energy))
+        print("   FNO correction to MP2 = {:>16.10f}\n".format(delta_mp2))
+
+    return fno_hamiltonian, fno_system, delta_mp2
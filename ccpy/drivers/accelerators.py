@@ -0,0 +1,127 @@
+"""Convergence accelerators for the Jacobi iterations of the CC and left-CC solvers.
+
+Every accelerator follows the interface of DIIS: in each iteration, the Jacobi-updated
+amplitudes T and the Jacobi step dT are pushed, and extrapolate() returns the flattened
+amplitudes for the next iteration, or None if the Jacobi-updated amplitudes should be kept.
+Ill-conditioned subspaces are handled by leaving out the oldest vectors. The Jacobi step is the residual
+divided by the (level-shifted) orbital-energy denominators, i.e., a diagonal quasi-Newton
+step, so the accelerators below work with the amplitudes x_i = T_i - dT_i entering each
+iteration and the quasi-Newton steps f_i = dT_i."""
+import numpy as np
+from ccpy.drivers.diis import DIIS
+
+
+class Anderson(DIIS):
+    """Anderson mixing with damping. The next amplitudes are
+        x_{k+1} = x_k + beta*f_k - sum_i gamma_i (dx_i + beta*df_i),
+    where dx_i and df_i are the differences between consecutive iterations and gamma minimizes
+    |f_k - sum_i gamma_i df_i|. For beta = 1, this is equivalent to DIIS, while beta < 1 damps
+    the steps, which helps for oscillating iterations."""
+    def __init__(self, T, diis_size, out_of_core, scratch_directory=None, condition_threshold=1.0e+14, damping=1.0):
+        super().__init__(T, diis_size, out_of_core, scratch_directory, condition_threshold)
+        self.damping = damping
+
+    def extrapolate(self):
+        slots = self.ordered_slots()
+        newest = slots[-1]
+        # coefficients of the next amplitudes in terms of the stored T_i; using x_i = T_i - f_i,
+        # x_{k+1} = sum_i c_i T_i - (1 - beta) sum_i c_i f_i
+        coeff = np.zeros(self.num_stored)
+        coeff[newest] = 1.0
+        # leave out the oldest vectors until the least-squares problem is well-conditioned
+        for start in range(len(slots) - 1):
+            window = slots[start:]
+            # differences of consecutive residuals, df_i = f_{i+1} - f_i, as rows of D acting on B
+            D = np.zeros((len(window) - 1, self.num_stored))
+            D[np.arange(len(window) - 1), window[1:]] = 1.0
+            D[np.arange(len(window) - 1), window[:-1]] = -1.0
+            A = D @ self.B[:self.num_stored, :self.num_stored] @ D.T
+            if self.is_well_conditioned(A):
+                gamma = np.linalg.lstsq(A, D @ self.B[:self.num_stored, newest], rcond=None)[0]
+                coeff -= D.T @ gamma
+                break
+        x_xtrap = coeff @ self.T_list[:self.num_stored, :]
+        if self.damping != 1.0:
+            x_xtrap -= (1.0 - self.damping) * (coeff @ self.T_residuum_list[:self.num_stored, :])
+        return x_xtrap
+
+
+class KAIN(DIIS):
+    """Krylov-accelerated inexact Newton (KAIN) method of Harrison [J. Comput. Chem. 25, 328 (2004)].
+    The quasi-Newton steps of the stored iterations define a linear model of the step in the
+    subspace spanned by x_i - x_m, where m is the newest iteration, and the coefficients c are
+    obtained from the Galerkin condition <x_i - x_m|f_m + sum_j c_j (f_j - f_m)> = 0. The next
+    amplitudes are x_m + sum_j c_j (x_j - x_m) + f_m + sum_j c_j (f_j - f_m). If max_step is given,
+    the extrapolated step is scaled down to that norm."""
+    def __init__(self, T, diis_size, out_of_core, scratch_directory=None, condition_threshold=1.0e+14, max_step=None):
+        super().__init__(T, diis_size, out_of_core, scratch_directory, condition_threshold)
+        self.max_step = max_step
+        # overlap matrix C_ij = <T_i|f_j> of the stored amplitudes and steps
+        self.C = np.zeros((self.diis_size, self.diis_size))
+
+    def push(self, T, T_residuum, iteration):
+        slot = super().push(T, T_residuum, iteration)
+        if slot is None:
+            return None
+        n = self.num_stored
+        self.C[slot, :n] = self.T_residuum_list[:n, :] @ self.T_list[slot, :]
+        self.C[:n, slot] = self.T_list[:n, :] @ self.T_residuum_list[slot, :]
+        return slot
+
+    def get_state(self):
+        state = super().get_state()
+        state["C"] = self.C[:self.num_stored, :self.num_stored].copy()
+        return state
+
+    def set_state(self, state):
+        super().set_state(state)
+        if self.num_stored == state["C"].shape[0]:
+            self.C[:self.num_stored, :self.num_stored] = state["C"]
+
+    def extrapolate(self):
+        slots = self.ordered_slots()
+        m = slots[-1]
+        n = self.num_stored
+        # P_ij = <x_i|f_j>, with x_i = T_i - f_i
+        P = self.C[:n, :n] - self.B[:n, :n]
+        # the next amplitudes are sum_j w_j T_j, with w_j = c_j and w_m = 1 - sum_j c_j
+        coeff = np.zeros(n)
+        coeff[m] = 1.0
+        # leave out the oldest vectors until the Galerkin equations are well-conditioned
+        for start in range(len(slots) - 1):
+            window = slots[start:-1]
+            A = (P[np.ix_(window, window)] - P[m, window][np.newaxis, :]
+                 - P[window, m][:, np.newaxis] + P[m, m])
+            if self.is_well_conditioned(A):
+                b = -(P[window, m] - P[m, m])
+                c = np.linalg.solve(A, b)
+                coeff[window] += c
+                coeff[m] -= np.sum(c)
+                break
+        x_xtrap = coeff @ self.T_list[:n, :]
+        if self.max_step is not None:
+            # restrict the norm of the step taken from x_m = T_m - f_m
+            step = x_xtrap - (self.T_list[m, :] - self.T_residuum_list[m, :])
+            step_norm = np.linalg.norm(step)
+            if step_norm > self.max_step:
+                x_xtrap -= (1.0 - self.max_step / step_norm) * step
+        return x_xtrap
+
+
+def get_accelerator(T, options):
+    """Returns the convergence accelerator selected by options["acceleration"], which is one of
+    "diis", "anderson", "kain", or "jacobi" (plain quasi-Newton steps without extrapolation).
+    Returns None for "jacobi" or when options["diis_size"] is -1."""
+    method = options["acceleration"].lower()
+    if method == "jacobi" or options["diis_size"] == -1:
+        return None
+    if method == "diis":
+        return DIIS(T, options["diis_size"], options["diis_out_of_core"], options["scratch_directory"],
+                    options["acceleration_condition_threshold"])
+    elif method == "anderson":
+        return Anderson(T, options["diis_size"], options["diis_out_of_core"], options["scratch_directory"],
+                        options["acceleration_condition_threshold"], damping=options["anderson_damping"])
+    elif method == "kain":
+        return KAIN(T, options["diis_size"], options["diis_out_of_core"], options["scratch_directory"],
+                    options["acceleration_condition_threshold"], max_step=options["kain_max_step"])
+    raise NotImplementedError("Convergence accelerator {} not implemented".format(options["acceleration"]))
@@ -1,6 +1,6 @@
+import os
 import numpy as np
 import time
-from copy import deepcopy
 
 from ccpy.extrapolation.goodson_extrapolation import goodson_extrapolation
 from ccpy.utilities.printing import get_timestamp
@@ -39,8 +39,13 @@ class AdaptDriver:
                                "bbb": np.ones((1, 6), order="F")}
         self.excitation_count_by_symmetry = [{'aaa': 0, 'aab': 0, 'abb': 0, 'bbb': 0} for _ in range(len(self.driver.system.point_group_irrep_to_number))]
         self.n_det = 0
-        # Save the bare Hamiltonian for later iterations if using CR-CC(2,3)
-        self.bare_hamiltonian = deepcopy(self.driver.hamiltonian)
+        # Save the bare Hamiltonian for later iterations if using CR-CC(2,3); HBar is built as a
+        # copy-on-write copy, so the bare Hamiltonian is never modified and need not be copied
+        self.bare_hamiltonian = self.driver.hamiltonian
+        # The state after each macroiteration is saved if the driver uses a checkpoint directory
+        self.checkpoint_filename = None
+        if self.driver.options["checkpoint_directory"] is not None:
+            self.checkpoint_filename = os.path.join(self.driver.options["checkpoint_directory"], "adaptive_ccpq.npz")
 
     def print_options(self):
         print("   ------------------------------------------")
@@ -149,6 +154,56 @@ class AdaptDriver:
 
         return triples_list
 
+    def write_checkpoint(self, imacro, pspace_sizes):
+        """Writes the state of the calculation after macroiteration imacro to the checkpoint directory
+           of the driver. This includes the expanded P space and, unless the amplitudes are reset, the
+           CC(P) and left-CC amplitudes obtained in the P space of size pspace_sizes, which are used
+           as the initial guesses in the next macroiteration."""
+        from ccpy.drivers.restart import write_arrays
+        spin_cases = ["aaa", "aab", "abb", "bbb"]
+        arrays = {"imacro": imacro,
+                  "pspace_sizes": np.asarray(pspace_sizes),
+                  "excitation_count_by_symmetry": np.array([[count[x] for x in spin_cases] for count in self.excitation_count_by_symmetry]),
+                  "ccp_energy": self.ccp_energy,
+                  "ccpq_energy": self.ccpq_energy,
+                  "ex_ccq": self.ex_ccq,
+                  "ex_ccr": self.ex_ccr,
+                  "ex_cccf": self.ex_cccf}
+        for x in spin_cases:
+            arrays["excitations." + x] = self.t3_excitations[x]
+        if self.driver.T is not None:
+            arrays["T"] = self.driver.T.flatten()
+        if self.driver.L[0] is not None:
+            arrays["L"] = self.driver.L[0].flatten()
+        write_arrays(self.checkpoint_filename, arrays)
+
+    def read_checkpoint(self):
+        """Restores the state written by write_checkpoint() and returns the macroiteration from which
+           the calculation continues (0 if there is no checkpoint)."""
+        from ccpy.drivers.restart import read_arrays
+        from ccpy.models.operators import ClusterOperator
+        arrays = read_arrays(self.checkpoint_filename)
+        if arrays is None or arrays["ccp_energy"].shape[0] != self.nmacro:
+            return 0
+        spin_cases = ["aaa", "aab", "abb", "bbb"]
+        for name in ["ccp_energy", "ccpq_energy", "ex_ccq", "ex_ccr", "ex_cccf"]:
+            setattr(self, name, arrays[name])
+        self.t3_excitations = {x: np.asfortranarray(arrays["excitations." + x]) for x in spin_cases}
+        self.excitation_count_by_symmetry = [{x: int(count[i]) for i, x in enumerate(spin_cases)} for count in arrays["excitation_count_by_symmetry"]]
+        pspace_sizes = [list(arrays["pspace_sizes"])]
+        if "T" in arrays:
+            self.driver.T = ClusterOperator(self.driver.system, order=3, p_orders=[3], pspace_sizes=pspace_sizes)
+            self.driver.T.unflatten(arrays["T"])
+        if "L" in arrays:
+            if self.options["two_body_approx"]:
+                self.driver.L[0] = ClusterOperator(self.driver.system, order=2)
+            else:
+                self.driver.L[0] = ClusterOperator(self.driver.system, order=3, p_orders=[3], pspace_sizes=pspace_sizes)
+            self.driver.L[0].unflatten(arrays["L"])
+        print("   Resuming adaptive CC(P;Q) calculation from checkpoint", self.checkpoint_filename,
+              "at macroiteration", int(arrays["imacro"]) + 1)
+        return int(arrays["imacro"]) + 1
+
     def run_expand_pspace(self, triples_list):
         """This will expand the P space using the list of triply excited determinants identified
            using the CC(P;Q) moment expansions, above."""
@@ -183,8 +238,13 @@ class AdaptDriver:
         #print("      Determinant addition plan:", [int("{0:.0f}".format(v, i)) for i, v in enumerate(self.num_dets_to_add[:-1] * spin_fact)])
         print("")
 
+        # Resume from the state saved after the last completed macroiteration
+        start_macro = 0
+        if self.checkpoint_filename is not None and self.driver.options["restart"]:
+            start_macro = self.read_checkpoint()
+
         # Begin adaptive loop iterations
-        for imacro in range(self.nmacro):
+        for imacro in range(start_macro, self.nmacro):
             print("")
             print("   Adaptive CC(P;Q) Macroiteration - ", imacro)
             print("   ===========================================")
@@ -270,6 +330,7 @@ class AdaptDriver:
 
             # Step 5: Expand the P space
             x1 = time.perf_counter()
+            pspace_sizes = [self.t3_excitations[x].shape[0] for x in ["aaa", "aab", "abb", "bbb"]]
             self.run_expand_pspace(selection_arr)
             x2 = time.perf_counter()
             t_pspace_expand = x2 - x1
@@ -279,6 +340,8 @@ class AdaptDriver:
                 self.driver.T = None
                 self.driver.L[0] = None
             setattr(self.driver, "hamiltonian", self.bare_hamiltonian)
+            if self.checkpoint_filename is not None:
+                self.write_checkpoint(imacro, pspace_sizes)
 
             # Step 7: Report wall and CPU timings of each step
             print(f"   Timing breakdown for macrostep {imacro}")
@@ -363,8 +426,9 @@ class AdaptEOMDriverSS:
         # RHF flags for ground and excited states
         self.RHF_ground = self.driver.options["RHF_symmetry"]
         self.RHF_excited = True if self.multiplicity == 1 else False
-        # Save the bare Hamiltonian for later iterations if using CR-CC(2,3)
-        self.bare_hamiltonian = deepcopy(self.driver.hamiltonian)
+        # Save the bare Hamiltonian for later iterations if using CR-CC(2,3); HBar is built as a
+        # copy-on-write copy, so the bare Hamiltonian is never modified and need not be copied
+        self.bare_hamiltonian = self.driver.hamiltonian
 
     def print_options(self):
         print("   ------------------------------------------")
@@ -711,8 +775,9 @@ class AdaptEOMDriver:
         # RHF flags for ground and excited states
         self.RHF_ground = self.driver.options["RHF_symmetry"]
         self.RHF_excited = True if self.multiplicity == 1 else False
-        # Save the bare Hamiltonian for later iterations if using CR-CC(2,3)
-        self.bare_hamiltonian = deepcopy(self.driver.hamiltonian)
+        # Save the bare Hamiltonian for later iterations if using CR-CC(2,3); HBar is built as a
+        # copy-on-write copy, so the bare Hamiltonian is never modified and need not be copied
+        self.bare_hamiltonian = self.driver.hamiltonian
 
     def print_options(self):
         print("   ------------------------------------------")
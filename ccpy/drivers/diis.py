@@ -1,67 +1,122 @@
 import numpy as np
-import h5py
-from ccpy.utilities.utilities import remove_file
+from ccpy.utilities.vector_store import VectorStore
 
 
 class DIIS:
-    def __init__(self, T, diis_size, out_of_core):
+    """DIIS accelerator. The overlap matrix of the stored residual vectors is kept between
+    iterations and only the row and column of the newly pushed residual are computed.
+    If the DIIS equations are ill-conditioned (condition number of the residual overlaps,
+    normalized to a unit diagonal, above condition_threshold),
+    the oldest vectors are left out of the extrapolation. If no subspace of at least two
+    vectors is well-conditioned, extrapolate() returns None and the caller keeps the
+    current (Jacobi) vector. Residuals that are not finite, e.g., during a transient blow-up
+    of the iterations, are not stored, so that they do not enter the overlap matrix."""
+    def __init__(self, T, diis_size, out_of_core, scratch_directory=None, condition_threshold=1.0e+14):
 
         self.diis_size = diis_size
         self.out_of_core = out_of_core
         self.ndim = T.ndim
+        self.condition_threshold = condition_threshold
 
-        if self.out_of_core:
-            remove_file("cc-diis-vectors.hdf5")
-            f = h5py.File("cc-diis-vectors.hdf5", "w")
-            self.T_list = f.create_dataset("t-vectors", (self.diis_size, self.ndim), dtype=np.float64)
-            self.T_residuum_list = f.create_dataset("resid-vectors", (self.diis_size, self.ndim), dtype=np.float64)
-        else:
-            self.T_list = np.zeros((self.diis_size, self.ndim), dtype=np.float64)
-            self.T_residuum_list = np.zeros((self.diis_size, self.ndim), dtype=np.float64)
+        self.T_list = VectorStore(self.diis_size, self.ndim, self.out_of_core, scratch_directory, prefix="cc-diis-vectors")
+        self.T_residuum_list = VectorStore(self.diis_size, self.ndim, self.out_of_core, scratch_directory, prefix="cc-diis-residuals")
+
+        # overlap matrix B_ij = <r_i|r_j> of the stored residual vectors
+        self.B = np.zeros((self.diis_size, self.diis_size))
+        # iteration in which each slot was last pushed, used to order the stored vectors
+        self.iterations = np.zeros(self.diis_size, dtype=np.int64)
+        self.num_stored = 0
 
     def cleanup(self):
-        if self.out_of_core:
-            remove_file("cc-diis-vectors.hdf5")
+        self.T_list.cleanup()
+        self.T_residuum_list.cleanup()
             
     def push(self, T, T_residuum, iteration):
-            self.T_list[iteration % self.diis_size, :] = T.flatten()
-            self.T_residuum_list[iteration % self.diis_size, :] = T_residuum.flatten()
+        """Stores T and its residual in the next free slot, or in the slot of the oldest vectors
+        once all slots are used, and returns the slot. Returns None without storing anything if
+        the residual or its overlaps with the stored residuals are not finite."""
+        residuum = np.asarray(T_residuum.flatten(), dtype=np.float64)
+        # update the row and column of B belonging to the new residual with one GEMV; overflows
+        # are caught by the check below
+        with np.errstate(over="ignore", invalid="ignore"):
+            overlaps = np.append(self.T_residuum_list[:self.num_stored, :] @ residuum, residuum @ residuum)
+        if not np.all(np.isfinite(overlaps)):
+            return None
+        if self.num_stored < self.diis_size:
+            slot = self.num_stored
+            self.num_stored += 1
+        else:
+            slot = self.ordered_slots()[0]
+            overlaps = overlaps[:-1]
+            overlaps[slot] = residuum @ residuum
+        self.T_list[slot, :] = T.flatten()
+        self.T_residuum_list[slot, :] = residuum
+        self.iterations[slot] = iteration
+        # start reading the stored vectors needed by extrapolate
+        self.T_list.prefetch(range(self.num_stored))
+        self.B[slot, :self.num_stored] = overlaps
+        self.B[:self.num_stored, slot] = overlaps
+        return slot
 
-    def extrapolate(self):
-        B_dim = self.diis_size + 1
-        B = -1.0 * np.ones((B_dim, B_dim))
-        for i in range(self.diis_size):
-            for j in range(i, self.diis_size):
-                B[i, j] = np.dot(self.T_residuum_list[i, :].T, self.T_residuum_list[j, :])
-                B[j, i] = B[i, j]
-        B[-1, -1] = 0.0
+    def get_state(self):
+        """Returns the stored vectors, their overlaps, and iteration numbers as a dictionary of arrays."""
+        n = self.num_stored
+        return {"T_list": np.asarray(self.T_list[:n, :]),
+                "T_residuum_list": np.asarray(self.T_residuum_list[:n, :]),
+                "B": self.B[:n, :n].copy(),
+                "iterations": self.iterations[:n].copy()}
 
-        rhs = np.zeros(B_dim)
-        rhs[-1] = -1.0
+    def set_state(self, state):
+        """Restores the state returned by get_state(). The history is discarded if it does not fit
+        the slots of this accelerator, e.g., because it was obtained with a different subspace size."""
+        n = state["B"].shape[0]
+        if n > self.diis_size or state["T_list"].shape[1] != self.ndim:
+            return
+        self.T_list[:n, :] = state["T_list"]
+        self.T_residuum_list[:n, :] = state["T_residuum_list"]
+        self.B[:n, :n] = state["B"]
+        self.iterations[:n] = state["iterations"]
+        self.num_stored = n
 
-        # TODO: replace with numpy.linalg.solve
-        # TODO: replace with scipy.linalg.lu
-        coeff = solve_gauss(B, rhs)
-        x_xtrap = np.zeros(self.ndim)
-        for i in range(self.diis_size):
-            x_xtrap += coeff[i] * self.T_list[i, :]
+    def ordered_slots(self):
+        """Returns the slots of the stored vectors ordered from the oldest to the newest."""
+        return np.argsort(self.iterations[:self.num_stored], kind="stable")
 
-        return x_xtrap
+    def is_well_conditioned(self, A):
+        if not np.all(np.isfinite(A)):
+            return False
+        try:
+            return np.linalg.cond(A) < self.condition_threshold
+        except np.linalg.LinAlgError:
+            return False
 
-def solve_gauss(A, b):
-    """DIIS helper function. Solves the linear system Ax=b using
-    Gaussian elimination"""
-    n = A.shape[0]
-    for i in range(n - 1):
-        for j in range(i + 1, n):
-            m = A[j, i] / A[i, i]
-            A[j, :] -= m * A[i, :]
-            b[j] -= m * b[i]
-    x = np.zeros(n)
-    k = n - 1
-    x[k] = b[k] / A[k, k]
-    while k >= 0:
-        x[k] = (b[k] - np.dot(A[k, k + 1 :], x[k + 1 :])) / A[k, k]
-        k = k - 1
+    def extrapolate(self):
+        slots = self.ordered_slots()
+        # leave out the oldest vectors until the DIIS equations are well-conditioned
+        for start in range(len(slots) - 1):
+            window = slots[start:]
+            B_window = self.B[np.ix_(window, window)]
+            # normalize the residual overlaps to a unit diagonal, so that the conditioning reflects
+            # the linear dependence of the residuals rather than their norms, which differ by many
+            # orders of magnitude when the iterations blow up before DIIS takes over
+            d = 1.0 / np.sqrt(np.diagonal(B_window))
+            B_scaled = d[:, np.newaxis] * B_window * d[np.newaxis, :]
+            if self.is_well_conditioned(B_scaled):
+                break
+        else:
+            return None
 
-    return x
+        # the coefficients minimizing |sum_i c_i r_i| subject to sum_i c_i = 1 are proportional
+        # to B^-1 1 = d * B_scaled^-1 d; least squares remains well-defined for (nearly) linearly
+        # dependent residuals
+        try:
+            c = d * np.linalg.lstsq(B_scaled, d, rcond=None)[0]
+        except np.linalg.LinAlgError:
+            return None
+        if not np.isfinite(np.sum(c)) or np.sum(c) == 0.0:
+            return None
+        coeff = np.zeros(self.num_stored)
+        coeff[window] = c / np.sum(c)
+        x_xtrap = coeff @ self.T_list[:self.num_stored, :]
+
+        return x_xtrap
@@ -1,15 +1,30 @@
 """Main calculation driver module of CCpy."""
+import multiprocessing
 import numpy as np
 from importlib import import_module
+from importlib.util import find_spec
 import ccpy.cc
 import ccpy.hbar
 import ccpy.left
 import ccpy.eom_guess
 import ccpy.eomcc
+from ccpy.drivers.memory_planner import (
+                build_memory_plan,
+                fit_to_memory_limit,
+                get_array_memory,
+                get_cluster_operator_size,
+                get_fock_operator_size,
+                get_spinflip_operator_size,
+)
 from ccpy.drivers.solvers import (
                 cc_jacobi,
                 left_cc_jacobi,
                 eomcc_davidson,
+                eomcc_davidson_concurrent,
+                get_blas_threads_per_worker,
+                get_single_precision_operators,
+                lefteomcc_davidson,
+                eomcc_biorthogonal_davidson,
                 eomcc_block_davidson,
                 eomcc_nonlinear_diis,
                 eccc_jacobi,
@@ -30,26 +45,34 @@ from ccpy.utilities.printing import (
 from ccpy.utilities.utilities import convert_excitations_c_to_f, reorder_triples_amplitudes
 from ccpy.interfaces.pyscf_tools import load_pyscf_integrals
 from ccpy.interfaces.gamess_tools import load_gamess_integrals
+from ccpy.interfaces.checkpoint_tools import load_checkpoint, dump_checkpoint
 
 
 class Driver:
 
     @classmethod
-    def from_pyscf(cls, meanfield, nfrozen, ndelete=0, normal_ordered=True, dump_integrals=False, sorted=True, use_cholesky=False, cholesky_tol=1.0e-09):
+    def from_pyscf(cls, meanfield, nfrozen, ndelete=0, normal_ordered=True, dump_integrals=False, sorted=True, use_cholesky=False, cholesky_tol=1.0e-09, lazy_integrals=False, restricted_integrals=False, checkpoint=None, fragmented_ao2mo=False, required_blocks=None):
         return cls(
                     *load_pyscf_integrals(meanfield, nfrozen, ndelete, normal_ordered=normal_ordered, dump_integrals=dump_integrals, sorted=sorted,
-                                          use_cholesky=use_cholesky, cholesky_tol=cholesky_tol)
+                                          use_cholesky=use_cholesky, cholesky_tol=cholesky_tol, lazy=lazy_integrals,
+                                          restricted=restricted_integrals, checkpoint=checkpoint,
+                                          fragmented_ao2mo=fragmented_ao2mo, required_blocks=required_blocks)
                   )
 
     @classmethod
-    def from_gamess(cls, logfile, nfrozen, ndelete=0, multiplicity=None, fcidump=None, onebody=None, twobody=None, normal_ordered=True, sorted=True, data_type=np.float64):
+    def from_gamess(cls, logfile, nfrozen, ndelete=0, multiplicity=None, fcidump=None, onebody=None, twobody=None, normal_ordered=True, sorted=True, data_type=np.float64, lazy_integrals=False, restricted_integrals=False, cache_integrals=False):
         return cls(
-                    *load_gamess_integrals(logfile, fcidump, onebody, twobody, nfrozen, ndelete, multiplicity, normal_ordered=normal_ordered, sorted=sorted, data_type=data_type)
+                    *load_gamess_integrals(logfile, fcidump, onebody, twobody, nfrozen, ndelete, multiplicity, normal_ordered=normal_ordered, sorted=sorted, data_type=data_type, lazy=lazy_integrals, restricted=restricted_integrals, cache_integrals=cache_integrals)
                    )
 
+    @classmethod
+    def from_checkpoint(cls, path, mmap=True):
+        return cls(*load_checkpoint(path, mmap=mmap))
+
     def __init__(self, system, hamiltonian, max_number_states=50):
         self.system = system
         self.hamiltonian = hamiltonian
+        self.bare_hamiltonian = None
         self.flag_hbar = False
         self.options = {"method": None,
                         "maximum_iterations": 80,
@@ -57,13 +80,30 @@ class Driver:
                         "energy_convergence": 1.0e-07,
                         "energy_shift": 0.0,
                         "diis_size": 6,
+                        "acceleration": "diis",
+                        "acceleration_condition_threshold": 1.0e+14,
+                        "anderson_damping": 1.0,
+                        "kain_max_step": None,
                         "RHF_symmetry": (self.system.noccupied_alpha == self.system.noccupied_beta),
                         "diis_out_of_core": False,
                         "davidson_out_of_core": False,
+                        "scratch_directory": None,
+                        "checkpoint_directory": None,
+                        "checkpoint_interval": 10,
+                        "checkpoint_interval_minutes": None,
+                        "restart": False,
+                        "warm_start": True,
                         "amp_print_threshold": 0.09,
                         "davidson_max_subspace_size": 30,
+                        "davidson_restart_size": 4,
                         "davidson_solver": "standard",
-                        "davidson_selection_method": "overlap"}
+                        "davidson_selection_method": "overlap",
+                        "davidson_num_workers": 1,
+                        "left_solver": "jacobi",
+                        "mixed_precision": False,
+                        "mixed_precision_threshold": 1.0e-05,
+                        "memory_limit": None,
+                        "keep_bare_hamiltonian": False}
 
         # Disable DIIS for small problems to avoid inherent singularity
         if self.system.noccupied_alpha * self.system.nunoccupied_beta <= 4:
@@ -76,10 +116,12 @@ class Driver:
                                 "number_active_indices": None,
                                 "pspace_orders": [None]}
         self.T = None
+        self.T_excitations = None
         self.L = [None] * max_number_states
         self.R = [None] * max_number_states
         self.rdm1 = [[None] * max_number_states] * max_number_states
         self.correlation_energy = 0.0
+        self.fno_correction = 0.0
         self.vertical_excitation_energy = np.zeros(max_number_states)
         self.r0 = np.zeros(max_number_states)
         self.relative_excitation_level = np.zeros(max_number_states)
@@ -92,17 +134,20 @@ class Driver:
         self.ddeltap4 = [None] * max_number_states
 
         # Store alpha and beta fock matrices for later usage before HBar overwrites bare Hamiltonian
-        self.fock = Integral.from_empty(system, 1, data_type=self.hamiltonian.a.oo.dtype)
-        self.fock.a.oo = self.hamiltonian.a.oo.copy()
-        self.fock.b.oo = self.hamiltonian.b.oo.copy()
-        self.fock.a.vv = self.hamiltonian.a.vv.copy()
-        self.fock.b.vv = self.hamiltonian.b.vv.copy()
+        self.set_fock()
 
         # Potentially used container for the CCS-transformed intermediates used in CC3 models. This is required
         # because the CCSDT-like HBar used for R1 and R2 updates in CC3 overwrites the parts of Hbar needed to compute
         # the intermediates used in R3 equation.
         self.cc3_intermediates = None
 
+    def set_fock(self):
+        self.fock = Integral.from_empty(self.system, 1, data_type=self.hamiltonian.a.oo.dtype)
+        self.fock.a.oo = self.hamiltonian.a.oo.copy()
+        self.fock.b.oo = self.hamiltonian.b.oo.copy()
+        self.fock.a.vv = self.hamiltonian.a.vv.copy()
+        self.fock.b.vv = self.hamiltonian.b.vv.copy()
+
     def set_operator_params(self, method):
         if method.lower() in ["ccs"]:
             self.operator_params["order"] = 1
@@ -180,6 +225,109 @@ class Driver:
             print("  ", option_key, "=", option_value)
         print("   ------------------------------------------\n")
 
+    def get_operator_size(self, method, pspace_sizes=None):
+        """Returns the number of amplitudes of the T, R, or L operator used by method without building it."""
+        self.set_operator_params(method)
+        name = method.lower()
+        if name.startswith("sfeom"):
+            return get_spinflip_operator_size(self.system, self.order)
+        if any(name.replace("left_", "").startswith(x) for x in ["ipeom", "eaeom", "dipeom", "deaeom"]):
+            return get_fock_operator_size(self.system, self.num_particles, self.num_holes)
+        return get_cluster_operator_size(self.system, self.operator_params["order"], pspace_sizes)
+
+    def plan_memory(self, method, state_index=[0], pspace_sizes=None, solver=None):
+        """Returns the MemoryPlan with the expected peak memory, by component, of running method, which
+        is either a CC, HBar ("hbar"), EOMCC, or left-CC method, or the CR-CC(2,3) ("crcc23") or
+        CR-CC(2,4) ("crcc24") correction, for the roots in state_index with the current options. For
+        CC(P) methods, pspace_sizes = {3: [counts of each spin case]} gives the size of the P space.
+        For EOMCC methods, solver overrides options["davidson_solver"]; solver="biorthogonal" plans
+        the simultaneous right and left calculation of run_biorthogonal_eomcc."""
+        name = method.lower()
+        integral_bytes = get_array_memory(self.hamiltonian)
+        T_size = self.T.ndim if self.T is not None else 0
+        options = self.options
+        kwargs = {}
+        if name in ccpy.cc.MODULES:
+            T_size = self.get_operator_size(method, pspace_sizes)
+            if name in ccpy.cc.DOUBLE_PRECISION_MODULES:
+                options = dict(self.options, mixed_precision=False)
+        elif name == "hbar":
+            kwargs["hbar"] = True
+        elif name in ccpy.eomcc.MODULES:
+            kwargs["eom_size"] = self.get_operator_size(method, pspace_sizes)
+            kwargs["num_roots"] = len(state_index)
+            kwargs["eom_solver"] = solver if solver is not None else self.options["davidson_solver"]
+            if kwargs["eom_solver"] == "biorthogonal":
+                kwargs["left_size"] = kwargs["eom_size"]
+                kwargs["num_left_roots"] = len(state_index)
+                kwargs["left_solver"] = "biorthogonal"
+        elif name in ccpy.left.MODULES:
+            kwargs["left_size"] = self.get_operator_size(method, pspace_sizes)
+            kwargs["num_left_roots"] = len(state_index)
+            if any(i != 0 for i in state_index) and self.options["left_solver"] == "davidson":
+                kwargs["left_solver"] = "davidson"
+        elif name in ["crcc23", "crcc24"]:
+            kwargs["left_size"] = self.L[state_index[0]].ndim if self.L[state_index[0]] is not None else 0
+            kwargs["num_left_roots"] = 1
+            kwargs["correction"] = name
+            kwargs["system"] = self.system
+        else:
+            raise NotImplementedError("Memory plan for {} not implemented".format(name))
+        return build_memory_plan(method.upper(), options, integral_bytes, T_size, **kwargs)
+
+    def enforce_memory_limit(self, method, state_index=[0], pspace_sizes=None, solver=None):
+        """If options["memory_limit"] (in MB) is set, prints the memory plan of method and adjusts the
+        out-of-core and subspace options so that it fits, raising MemoryError if it cannot."""
+        if self.options["memory_limit"] is None:
+            return
+        plan = fit_to_memory_limit(lambda: self.plan_memory(method, state_index, pspace_sizes, solver),
+                                   self.options, self.options["memory_limit"])
+        plan.print_summary(self.options["memory_limit"])
+
+    def dump_checkpoint(self, path):
+        """Write the System and bare Hamiltonian to a binary checkpoint that can be
+        reloaded with Driver.from_checkpoint."""
+        dump_checkpoint(path, self.system, self.hamiltonian)
+
+    def get_cc_options(self, method):
+        """Returns the options used for the CC iterations of method, where mixed precision is turned
+        off, with a warning, for the methods in ccpy.cc.DOUBLE_PRECISION_MODULES."""
+        if self.options["mixed_precision"] and method.lower() in ccpy.cc.DOUBLE_PRECISION_MODULES:
+            print("   WARNING: {} updates go through double-precision Fortran kernels; "
+                  "running it in double precision\n".format(method.upper()))
+            return dict(self.options, mixed_precision=False)
+        return self.options
+
+    def get_single_precision_operators(self):
+        """Returns the single-precision copies of HBar and T used by the mixed-precision Davidson
+        solver, or None if options["mixed_precision"] is False. They are made once per EOMCC
+        calculation and shared by all roots, including those solved in worker processes."""
+        if not self.options["mixed_precision"]:
+            return None
+        return get_single_precision_operators(self.hamiltonian, self.T)
+
+    def solve_roots_concurrently(self, HR_function, update_function, dR, state_index, single_precision_operators=None):
+        """Solve for the roots in state_index concurrently using options["davidson_num_workers"]
+        processes that share HBar (and its single-precision copy, if given). Each process is limited
+        to its share of the cores for its BLAS threads, which requires threadpoolctl. Returns None
+        when the roots should be solved one at a time."""
+        num_workers = self.options["davidson_num_workers"]
+        if num_workers <= 1 or len(state_index) <= 1:
+            return None
+        if "fork" not in multiprocessing.get_all_start_methods():
+            print("   WARNING: concurrent roots require the fork start method; solving one root at a time\n")
+            return None
+        num_processes = min(num_workers, len(state_index))
+        print("   Solving for {} roots concurrently using {} processes with {} BLAS threads each\n".format(
+              len(state_index), num_processes, get_blas_threads_per_worker(num_processes)))
+        if find_spec("threadpoolctl") is None:
+            print("   WARNING: threadpoolctl is not installed; the BLAS threads of each process cannot be limited\n")
+        return eomcc_davidson_concurrent(HR_function, update_function,
+                                         [self.R[i] for i in state_index], dR,
+                                         [self.vertical_excitation_energy[i] for i in state_index],
+                                         self.T, self.hamiltonian, self.system, self.options, num_workers,
+                                         single_precision_operators)
+
     def run_mbpt(self, method):
 
         if method.lower() == "mp2":
@@ -194,6 +342,19 @@ class Driver:
         else:
             raise NotImplementedError("MBPT method {} not implemented".format(method.lower()))
 
+    def run_fno(self, occupation_threshold=1.0e-05, mp2_correction=True):
+        """Truncate the virtual space of the bare Hamiltonian using MP2 frozen natural orbitals.
+        The MP2 correction for the discarded virtuals is stored in self.fno_correction."""
+        from ccpy.density.natural_orbitals import transform_to_fno
+        # FNOs are defined for the bare Hamiltonian only
+        assert not self.flag_hbar
+        self.hamiltonian, self.system, self.fno_correction = transform_to_fno(self.hamiltonian,
+                                                                             self.system,
+                                                                             occupation_threshold,
+                                                                             mp2_correction)
+        self.set_fock()
+        self.T = None
+
     def run_cc(self, method):
         # check if requested CC calculation is implemented in modules
         if method.lower() not in ccpy.cc.MODULES:
@@ -203,6 +364,7 @@ class Driver:
         # Set operator parameters needed to build T
         self.set_operator_params(method)
         self.options["method"] = method.upper()
+        self.enforce_memory_limit(method)
 
         # import the specific CC method module and get its update function
         cc_mod = import_module("ccpy.cc." + method.lower())
@@ -212,17 +374,27 @@ class Driver:
         self.print_options()
         print("   CC calculation started on", get_timestamp())
 
-        # Create either the standard CC cluster operator
-        if self.T is None:
-            self.T = ClusterOperator(self.system,
-                                     order=self.operator_params["order"],
-                                     active_orders=self.operator_params["active_orders"],
-                                     num_active=self.operator_params["number_active_indices"])
         # regardless of restart status, initialize residual anew
         dT = ClusterOperator(self.system,
                              order=self.operator_params["order"],
                              active_orders=self.operator_params["active_orders"],
                              num_active=self.operator_params["number_active_indices"])
+        # Create the standard CC cluster operator unless the previous one has the same dimensions
+        if self.T is None or self.T.dimensions != dT.dimensions:
+            T = ClusterOperator(self.system,
+                                order=self.operator_params["order"],
+                                active_orders=self.operator_params["active_orders"],
+                                num_active=self.operator_params["number_active_indices"])
+            # start from the solution of the previous calculation of a different rank, with missing
+            # T3 amplitudes given by the perturbative estimate of the method module (if available)
+            if self.T is not None and self.options["warm_start"]:
+                T.load_from(self.T)
+                t3_guess_function = getattr(cc_mod, 'get_t3_guess', None)
+                if "aaa" not in self.T.spin_cases and t3_guess_function is not None:
+                    T = t3_guess_function(T, self.hamiltonian, self.options["energy_shift"], self.options["RHF_symmetry"])
+                print("   Initial guess taken from the previous CC calculation")
+            self.T = T
+        self.T_excitations = None
         # Create the container for 1- and 2-body intermediates
         cc_intermediates = Integral.from_empty(self.system, 2, data_type=self.hamiltonian.a.oo.dtype, use_none=True)
         # Run the CC calculation
@@ -232,7 +404,8 @@ class Driver:
                                                 self.hamiltonian,
                                                 cc_intermediates,
                                                 self.system,
-                                                self.options,
+                                                self.get_cc_options(method),
+                                                checkpoint_label="cc_" + method.lower(),
                                                )
         cc_calculation_summary(self.T, self.system.reference_energy, self.correlation_energy, self.system, self.options["amp_print_threshold"])
         print("   CC calculation ended on", get_timestamp())
@@ -264,6 +437,7 @@ class Driver:
         n3abb = t3_excitations["abb"].shape[0]
         n3bbb = t3_excitations["bbb"].shape[0]
         excitation_count = [[n3aaa, n3aab, n3abb, n3bbb]]
+        self.enforce_memory_limit(method, pspace_sizes={3: excitation_count[0]})
 
         # If RHF, copy aab into abb and aaa in bbb
         if self.options["RHF_symmetry"]:
@@ -277,6 +451,16 @@ class Driver:
                                      order=self.operator_params["order"],
                                      p_orders=self.operator_params["pspace_orders"],
                                      pspace_sizes=excitation_count)
+        elif "aaa" not in self.T.spin_cases or (self.T_excitations is not None and self.options["warm_start"]):
+            # start from the solution of a lower-rank calculation or of the previous P space, where the
+            # P-space amplitudes are matched by excitation
+            T = ClusterOperator(self.system,
+                                order=self.operator_params["order"],
+                                p_orders=self.operator_params["pspace_orders"],
+                                pspace_sizes=excitation_count)
+            if self.options["warm_start"]:
+                T.load_from(self.T, t3_excitations, self.T_excitations)
+            self.T = T
         else:
             # extend self.T to hold a longer T vector. It is assumed that the new amplitudes and corresponding
             # excitations are simply appended to the previous ones. This will break if this is not true.
@@ -297,8 +481,11 @@ class Driver:
                                                        self.hamiltonian,
                                                        cc_intermediates,
                                                        self.system,
-                                                       self.options,
-                                                       t3_excitations)
+                                                       self.get_cc_options(method),
+                                                       t3_excitations,
+                                                       checkpoint_label="cc_" + method.lower())
+        # P space of the converged T, used to map the amplitudes onto a different P space
+        self.T_excitations = {key: value.copy() for key, value in t3_excitations.items()}
         cc_calculation_summary(self.T, self.system.reference_energy, self.correlation_energy, self.system, self.options["amp_print_threshold"])
         print("   CC(P) calculation ended on", get_timestamp())
 
@@ -312,7 +499,16 @@ class Driver:
         # import the specific CC method module and get its update function
         hbar_mod = import_module("ccpy.hbar." + "hbar_" + method.lower())
         hbar_build_function = getattr(hbar_mod, 'build_hbar_' + method.lower())
-
+        self.enforce_memory_limit("hbar")
+
+        # HBar shares the blocks that it does not transform with the bare Hamiltonian, so keeping the
+        # bare Hamiltonian only costs the memory of the transformed blocks
+        if self.options["keep_bare_hamiltonian"] and not self.flag_hbar:
+            self.bare_hamiltonian = self.hamiltonian
+        # HBar is the last object built from the bare integrals, so lazily sorted blocks that have not
+        # been used yet are built now and the parent twobody arrays are released
+        if not self.flag_hbar:
+            self.hamiltonian.materialize()
         # Replace the driver hamiltonian with the Hbar
         print("")
         print("   HBar construction began on", get_timestamp(), end="")
@@ -320,6 +516,8 @@ class Driver:
             self.hamiltonian, self.cc3_intermediates = hbar_build_function(self.T, self.hamiltonian, self.options["RHF_symmetry"], self.system)
         else:
             self.hamiltonian = hbar_build_function(self.T, self.hamiltonian, self.options["RHF_symmetry"], self.system, t3_excitations)
+        # HBar only keeps the blocks of the bare Hamiltonian that it shares
+        self.hamiltonian.detach()
         print("... completed on", get_timestamp(), "\n")
         # Set flag indicating that hamiltonian is set to Hbar is now true
         self.flag_hbar = True
@@ -385,7 +583,7 @@ class Driver:
                                                   order=self.operator_params["order"],
                                                   p_orders=self.operator_params["pspace_orders"],
                                                   pspace_sizes=excitation_count)
-            self.R[state_index].unflatten(self.guess_vectors[:, state_index - 1], order=self.guess_order)
+            self.R[state_index].unflatten(self.guess_vectors[:, state_index - 1], order=self.guess_order, layout="C")
             self.vertical_excitation_energy[state_index] = self.guess_energy[state_index - 1]
         else:
             # extend self.R to hold a longer R vector. It is assumed that the new amplitudes and corresponding
@@ -429,7 +627,8 @@ class Driver:
                                                                                                          self.system,
                                                                                                          self.options,
                                                                                                          t3_excitations,
-                                                                                                         r3_excitations)
+                                                                                                         r3_excitations,
+                                                                                                         single_precision_operators=self.get_single_precision_operators())
         # Compute r0 a posteriori
         self.r0[state_index] = get_r0(self.R[state_index], self.hamiltonian, self.vertical_excitation_energy[state_index])
         # compute the relative excitation level (REL) metric
@@ -450,6 +649,7 @@ class Driver:
         # If running EOM-CC3, use the nonlinear excited state DIIS solver
         if method.lower() == "eomcc3":
             self.options["davidson_solver"] = "diis"
+        self.enforce_memory_limit(method, state_index)
 
         # Ensure that Hbar is set upon entry
         assert(self.flag_hbar)
@@ -465,7 +665,7 @@ class Driver:
                                             order=self.operator_params["order"],
                                             active_orders=self.operator_params["active_orders"],
                                             num_active=self.operator_params["number_active_indices"])
-                self.R[i].unflatten(self.guess_vectors[:, i - 1], order=self.guess_order)
+                self.R[i].unflatten(self.guess_vectors[:, i - 1], order=self.guess_order, layout="C")
                 self.vertical_excitation_energy[i] = self.guess_energy[i - 1]
 
         # Print the options as a header
@@ -489,7 +689,8 @@ class Driver:
                                                                                          self.R, dR,
                                                                                          self.vertical_excitation_energy,
                                                                                          self.T, self.hamiltonian,
-                                                                                         self.system, state_index, self.options)
+                                                                                         self.system, state_index, self.options,
+                                                                                         block_hr=method.lower() in ccpy.eomcc.BLOCK_HR_MODULES)
             for j, istate in enumerate(state_index):
                 # Compute r0 a posteriori
                 self.r0[istate] = get_r0(self.R[istate], self.hamiltonian, self.vertical_excitation_energy[istate])
@@ -522,6 +723,9 @@ class Driver:
                 eomcc_calculation_summary(self.R[istate], self.vertical_excitation_energy[istate], self.correlation_energy, self.r0[istate], self.relative_excitation_level[istate], is_converged, istate, self.system, self.options["amp_print_threshold"])
                 print("   EOMCC calculation for root %d ended on" % istate, get_timestamp(), "\n")
         else:
+            # Solve for the roots concurrently, if requested; their output is printed in order below
+            single_precision_operators = self.get_single_precision_operators()
+            concurrent_results = self.solve_roots_concurrently(HR_function, update_function, dR, state_index, single_precision_operators)
             for j, istate in enumerate(state_index):
                 print("   EOMCC calculation for root %d started on" % istate, get_timestamp())
                 print("\n   Energy of initial guess = {:>10.10f}".format(self.vertical_excitation_energy[istate]))
@@ -529,10 +733,15 @@ class Driver:
                 # self.R[istate], self.vertical_excitation_energy[istate], is_converged = eomcc_davidson(HR_function, update_function, B0[:, j],
                 #                                                                                        self.R[istate], dR, self.vertical_excitation_energy[istate],
                 #                                                                                        self.T, self.hamiltonian, self.system, self.options)
-                self.R[istate], self.vertical_excitation_energy[istate], is_converged = eomcc_davidson(HR_function, update_function,
-                                                                                                       self.R[istate].flatten() / np.linalg.norm(self.R[istate].flatten()),
-                                                                                                       self.R[istate], dR, self.vertical_excitation_energy[istate],
-                                                                                                       self.T, self.hamiltonian, self.system, self.options)
+                if concurrent_results is not None:
+                    self.R[istate], self.vertical_excitation_energy[istate], is_converged, log = concurrent_results[j]
+                    print(log, end="")
+                else:
+                    self.R[istate], self.vertical_excitation_energy[istate], is_converged = eomcc_davidson(HR_function, update_function,
+                                                                                                           self.R[istate].flatten() / np.linalg.norm(self.R[istate].flatten()),
+                                                                                                           self.R[istate], dR, self.vertical_excitation_energy[istate],
+                                                                                                           self.T, self.hamiltonian, self.system, self.options,
+                                                                                                           single_precision_operators=single_precision_operators)
                 # Compute r0 a posteriori
                 self.r0[istate] = get_r0(self.R[istate], self.hamiltonian, self.vertical_excitation_energy[istate])
                 # compute the relative excitation level (REL) metric
@@ -550,6 +759,7 @@ class Driver:
         # Set operator parameters needed to build R
         self.set_operator_params(method)
         self.options["method"] = method.upper()
+        self.enforce_memory_limit(method, state_index)
 
         # Ensure that Hbar is set upon entry
         assert (self.flag_hbar)
@@ -564,7 +774,7 @@ class Driver:
                 self.R[i] = SpinFlipOperator(self.system,
                                              Ms=-1,
                                              order=self.operator_params["order"])
-                self.R[i].unflatten(self.guess_vectors[:, i], order=self.guess_order)
+                self.R[i].unflatten(self.guess_vectors[:, i], order=self.guess_order, layout="C")
                 self.vertical_excitation_energy[i] = self.guess_energy[i]
 
         # Form the initial subspace vectors
@@ -578,20 +788,28 @@ class Driver:
                               Ms=-1,
                               order=self.operator_params["order"])
 
+        # Solve for the roots concurrently, if requested; their output is printed in order below
+        single_precision_operators = self.get_single_precision_operators()
+        concurrent_results = self.solve_roots_concurrently(HR_function, update_function, dR, state_index, single_precision_operators)
         for j, istate in enumerate(state_index):
             print("   SF-EOMCC calculation for root %d started on" % istate, get_timestamp())
             print("\n   Energy of initial guess = {:>10.10f}".format(self.vertical_excitation_energy[istate]))
             print_sf_amplitudes(self.R[istate], self.system, self.R[istate].order, self.options["amp_print_threshold"])
-            self.R[istate], self.vertical_excitation_energy[istate], is_converged = eomcc_davidson(HR_function,
-                                                                                         update_function,
-                                                                                         #B0[:, j],
-                                                                                         self.R[istate].flatten() / np.linalg.norm(self.R[istate].flatten()),
-                                                                                         self.R[istate], dR,
-                                                                                         self.vertical_excitation_energy[istate],
-                                                                                         self.T,
-                                                                                         self.hamiltonian,
-                                                                                         self.system,
-                                                                                         self.options)
+            if concurrent_results is not None:
+                self.R[istate], self.vertical_excitation_energy[istate], is_converged, log = concurrent_results[j]
+                print(log, end="")
+            else:
+                self.R[istate], self.vertical_excitation_energy[istate], is_converged = eomcc_davidson(HR_function,
+                                                                                             update_function,
+                                                                                             #B0[:, j],
+                                                                                             self.R[istate].flatten() / np.linalg.norm(self.R[istate].flatten()),
+                                                                                             self.R[istate], dR,
+                                                                                             self.vertical_excitation_energy[istate],
+                                                                                             self.T,
+                                                                                             self.hamiltonian,
+                                                                                             self.system,
+                                                                                             self.options,
+                                                                                             single_precision_operators=single_precision_operators)
             sfeomcc_calculation_summary(self.R[istate], self.vertical_excitation_energy[istate], self.correlation_energy, is_converged, self.system, self.options["amp_print_threshold"])
             print("   SF-EOMCC calculation for root %d ended on" % istate, get_timestamp(), "\n")
 
@@ -605,6 +823,7 @@ class Driver:
         # Set operator parameters needed to build R
         self.set_operator_params(method)
         self.options["method"] = method.upper()
+        self.enforce_memory_limit(method, state_index)
 
         # Ensure that Hbar is set upon entry
         assert (self.flag_hbar)
@@ -619,7 +838,7 @@ class Driver:
                 self.R[i] = FockOperator(self.system,
                                          self.num_particles,
                                          self.num_holes)
-                self.R[i].unflatten(self.guess_vectors[:, i], order=self.guess_order)
+                self.R[i].unflatten(self.guess_vectors[:, i], order=self.guess_order, layout="C")
                 self.vertical_excitation_energy[i] = self.guess_energy[i]
 
         # Form the initial subspace vectors
@@ -633,21 +852,29 @@ class Driver:
                           self.num_particles,
                           self.num_holes)
 
+        # Solve for the roots concurrently, if requested; their output is printed in order below
+        single_precision_operators = self.get_single_precision_operators()
+        concurrent_results = self.solve_roots_concurrently(HR_function, update_function, dR, state_index, single_precision_operators)
         for j, istate in enumerate(state_index):
             print("   DEA-EOMCC calculation for root %d started on" % istate, get_timestamp())
             print("\n   Energy of initial guess = {:>10.10f}".format(self.vertical_excitation_energy[istate]))
             print_dea_amplitudes(self.R[istate], self.system, self.R[istate].order, self.options["amp_print_threshold"])
-            self.R[istate], self.vertical_excitation_energy[istate], is_converged = eomcc_davidson(HR_function,
-                                                                                                   update_function,
-                                                                                                   #B0[:, j],
-                                                                                                   self.R[istate].flatten() / np.linalg.norm(self.R[istate].flatten()),
-                                                                                                   self.R[istate],
-                                                                                                   dR,
-                                                                                                   self.vertical_excitation_energy[istate],
-                                                                                                   self.T,
-                                                                                                   self.hamiltonian,
-                                                                                                   self.system,
-                                                                                                   self.options)
+            if concurrent_results is not None:
+                self.R[istate], self.vertical_excitation_energy[istate], is_converged, log = concurrent_results[j]
+                print(log, end="")
+            else:
+                self.R[istate], self.vertical_excitation_energy[istate], is_converged = eomcc_davidson(HR_function,
+                                                                                                       update_function,
+                                                                                                       #B0[:, j],
+                                                                                                       self.R[istate].flatten() / np.linalg.norm(self.R[istate].flatten()),
+                                                                                                       self.R[istate],
+                                                                                                       dR,
+                                                                                                       self.vertical_excitation_energy[istate],
+                                                                                                       self.T,
+                                                                                                       self.hamiltonian,
+                                                                                                       self.system,
+                                                                                                       self.options,
+                                                                                                       single_precision_operators=single_precision_operators)
             deaeomcc_calculation_summary(self.R[istate], self.vertical_excitation_energy[istate], self.correlation_energy, is_converged, self.system, self.options["amp_print_threshold"])
             print("   DEA-EOMCC calculation for root %d ended on" % istate, get_timestamp(), "\n")
 
@@ -661,6 +888,7 @@ class Driver:
         # Set operator parameters needed to build R
         self.set_operator_params(method)
         self.options["method"] = method.upper()
+        self.enforce_memory_limit(method, state_index)
 
         # Ensure that Hbar is set upon entry
         assert (self.flag_hbar)
@@ -675,7 +903,7 @@ class Driver:
                 self.R[i] = FockOperator(self.system,
                                          self.num_particles,
                                          self.num_holes)
-                self.R[i].unflatten(self.guess_vectors[:, i], order=self.guess_order)
+                self.R[i].unflatten(self.guess_vectors[:, i], order=self.guess_order, layout="C")
                 self.vertical_excitation_energy[i] = self.guess_energy[i]
 
         # Form the initial subspace vectors
@@ -688,21 +916,29 @@ class Driver:
         dR = FockOperator(self.system,
                           self.num_particles,
                           self.num_holes)
+        # Solve for the roots concurrently, if requested; their output is printed in order below
+        single_precision_operators = self.get_single_precision_operators()
+        concurrent_results = self.solve_roots_concurrently(HR_function, update_function, dR, state_index, single_precision_operators)
         for j, istate in enumerate(state_index):
             print("   DIP-EOMCC calculation for root %d started on" % istate, get_timestamp())
             print("\n   Energy of initial guess = {:>10.10f}".format(self.vertical_excitation_energy[istate]))
             print_dip_amplitudes(self.R[istate], self.system, self.R[istate].order, self.options["amp_print_threshold"])
-            self.R[istate], self.vertical_excitation_energy[istate], is_converged = eomcc_davidson(HR_function,
-                                                                                                   update_function,
-                                                                                                   #B0[:, j],
-                                                                                                   self.R[istate].flatten() / np.linalg.norm(self.R[istate].flatten()),
-                                                                                                   self.R[istate],
-                                                                                                   dR,
-                                                                                                   self.vertical_excitation_energy[istate],
-                                                                                                   self.T,
-                                                                                                   self.hamiltonian,
-                                                                                                   self.system,
-                                                                                                   self.options)
+            if concurrent_results is not None:
+                self.R[istate], self.vertical_excitation_energy[istate], is_converged, log = concurrent_results[j]
+                print(log, end="")
+            else:
+                self.R[istate], self.vertical_excitation_energy[istate], is_converged = eomcc_davidson(HR_function,
+                                                                                                       update_function,
+                                                                                                       #B0[:, j],
+                                                                                                       self.R[istate].flatten() / np.linalg.norm(self.R[istate].flatten()),
+                                                                                                       self.R[istate],
+                                                                                                       dR,
+                                                                                                       self.vertical_excitation_energy[istate],
+                                                                                                       self.T,
+                                                                                                       self.hamiltonian,
+                                                                                                       self.system,
+                                                                                                       self.options,
+                                                                                                       single_precision_operators=single_precision_operators)
             dipeomcc_calculation_summary(self.R[istate], self.vertical_excitation_energy[istate], self.correlation_energy, is_converged, self.system, self.options["amp_print_threshold"])
             print("   DIP-EOMCC calculation for root %d ended on" % istate, get_timestamp(), "\n")
 
@@ -716,6 +952,7 @@ class Driver:
         # Set operator parameters needed to build R
         self.set_operator_params(method)
         self.options["method"] = method.upper()
+        self.enforce_memory_limit(method, state_index)
 
         # Ensure that Hbar is set upon entry
         assert (self.flag_hbar)
@@ -730,12 +967,9 @@ class Driver:
                 self.R[i] = FockOperator(self.system,
                                          self.num_particles,
                                          self.num_holes)
-                self.R[i].unflatten(self.guess_vectors[:, i], order=self.guess_order)
+                self.R[i].unflatten(self.guess_vectors[:, i], order=self.guess_order, layout="C")
                 self.vertical_excitation_energy[i] = self.guess_energy[i]
 
-        # Form the initial subspace vectors
-        # B0, _ = np.linalg.qr(np.asarray([self.R[i].flatten() for i in state_index]).T)
-
         # Print the options as a header
         self.print_options()
 
@@ -744,25 +978,53 @@ class Driver:
                           self.num_particles,
                           self.num_holes)
 
-        for j, istate in enumerate(state_index):
-            print("   IP-EOMCC calculation for root %d started on" % istate, get_timestamp())
-            print("\n   Energy of initial guess = {:>10.10f}".format(self.vertical_excitation_energy[istate]))
-            print_ip_amplitudes(self.R[istate], self.system, self.R[istate].order, self.options["amp_print_threshold"])
-            self.R[istate], self.vertical_excitation_energy[istate], is_converged = eomcc_davidson(HR_function,
-                                                                                                   update_function,
-                                                                                                   #B0[:, j],
-                                                                                                   self.R[istate].flatten() / np.linalg.norm(self.R[istate].flatten()),
-                                                                                                   self.R[istate],
-                                                                                                   dR,
-                                                                                                   self.vertical_excitation_energy[istate],
-                                                                                                   self.T,
-                                                                                                   self.hamiltonian,
-                                                                                                   self.system,
-                                                                                                   self.options)
-            # compute the relative excitation level (REL) metric
-            self.relative_excitation_level[istate] = get_rel_ip(self.R[istate])
-            ipeomcc_calculation_summary(self.R[istate], self.vertical_excitation_energy[istate], self.correlation_energy, self.relative_excitation_level[istate], is_converged, self.system, self.options["amp_print_threshold"])
-            print("   IP-EOMCC calculation for root %d ended on" % istate, get_timestamp(), "\n")
+        if self.options["davidson_solver"] == "multiroot":
+            print("   Multiroot IP-EOMCC calculation started on", get_timestamp(), "\n")
+            # Form the initial subspace vectors
+            B0, _ = np.linalg.qr(np.asarray([self.R[i].flatten() for i in state_index]).T)
+            print("   Energy of initial guess")
+            for istate in state_index:
+                print("      Root  {} = {:>10.10f}".format(istate, self.vertical_excitation_energy[istate]))
+            self.R, self.vertical_excitation_energy, is_converged = eomcc_block_davidson(HR_function, update_function,
+                                                                                         B0,
+                                                                                         self.R, dR,
+                                                                                         self.vertical_excitation_energy,
+                                                                                         self.T, self.hamiltonian,
+                                                                                         self.system, state_index, self.options,
+                                                                                         block_hr=method.lower() in ccpy.eomcc.BLOCK_HR_MODULES)
+            for j, istate in enumerate(state_index):
+                # compute the relative excitation level (REL) metric
+                self.relative_excitation_level[istate] = get_rel_ip(self.R[istate])
+                ipeomcc_calculation_summary(self.R[istate], self.vertical_excitation_energy[istate], self.correlation_energy, self.relative_excitation_level[istate], is_converged[j], self.system, self.options["amp_print_threshold"])
+            print("   Multiroot IP-EOMCC calculation ended on", get_timestamp(), "\n")
+        else:
+            # Solve for the roots concurrently, if requested; their output is printed in order below
+            single_precision_operators = self.get_single_precision_operators()
+            concurrent_results = self.solve_roots_concurrently(HR_function, update_function, dR, state_index, single_precision_operators)
+            for j, istate in enumerate(state_index):
+                print("   IP-EOMCC calculation for root %d started on" % istate, get_timestamp())
+                print("\n   Energy of initial guess = {:>10.10f}".format(self.vertical_excitation_energy[istate]))
+                print_ip_amplitudes(self.R[istate], self.system, self.R[istate].order, self.options["amp_print_threshold"])
+                if concurrent_results is not None:
+                    self.R[istate], self.vertical_excitation_energy[istate], is_converged, log = concurrent_results[j]
+                    print(log, end="")
+                else:
+                    self.R[istate], self.vertical_excitation_energy[istate], is_converged = eomcc_davidson(HR_function,
+                                                                                                           update_function,
+                                                                                                           #B0[:, j],
+                                                                                                           self.R[istate].flatten() / np.linalg.norm(self.R[istate].flatten()),
+                                                                                                           self.R[istate],
+                                                                                                           dR,
+                                                                                                           self.vertical_excitation_energy[istate],
+                                                                                                           self.T,
+                                                                                                           self.hamiltonian,
+                                                                                                           self.system,
+                                                                                                           self.options,
+                                                                                                           single_precision_operators=single_precision_operators)
+                # compute the relative excitation level (REL) metric
+                self.relative_excitation_level[istate] = get_rel_ip(self.R[istate])
+                ipeomcc_calculation_summary(self.R[istate], self.vertical_excitation_energy[istate], self.correlation_energy, self.relative_excitation_level[istate], is_converged, self.system, self.options["amp_print_threshold"])
+                print("   IP-EOMCC calculation for root %d ended on" % istate, get_timestamp(), "\n")
 
     def run_eaeomcc(self, method, state_index):
         """Performs the particle-nonconserving EA-EOMCC calculation specified by the user in the input."""
@@ -774,6 +1036,7 @@ class Driver:
         # Set operator parameters needed to build R
         self.set_operator_params(method)
         self.options["method"] = method.upper()
+        self.enforce_memory_limit(method, state_index)
 
         # Ensure that Hbar is set upon entry
         assert (self.flag_hbar)
@@ -788,12 +1051,9 @@ class Driver:
                 self.R[i] = FockOperator(self.system,
                                          self.num_particles,
                                          self.num_holes)
-                self.R[i].unflatten(self.guess_vectors[:, i], order=self.guess_order)
+                self.R[i].unflatten(self.guess_vectors[:, i], order=self.guess_order, layout="C")
                 self.vertical_excitation_energy[i] = self.guess_energy[i]
 
-        # Form the initial subspace vectors
-        # B0, _ = np.linalg.qr(np.asarray([self.R[i].flatten() for i in state_index]).T)
-
         # Print the options as a header
         self.print_options()
 
@@ -802,25 +1062,53 @@ class Driver:
                           self.num_particles,
                           self.num_holes)
 
-        for j, istate in enumerate(state_index):
-            print("   EA-EOMCC calculation for root %d started on" % istate, get_timestamp())
-            print("\n   Energy of initial guess = {:>10.10f}".format(self.vertical_excitation_energy[istate]))
-            print_ea_amplitudes(self.R[istate], self.system, self.R[istate].order, self.options["amp_print_threshold"])
-            self.R[istate], self.vertical_excitation_energy[istate], is_converged = eomcc_davidson(HR_function,
-                                                                                                   update_function,
-                                                                                                   #B0[:, j],
-                                                                                                   self.R[istate].flatten() / np.linalg.norm(self.R[istate].flatten()),
-                                                                                                   self.R[istate],
-                                                                                                   dR,
-                                                                                                   self.vertical_excitation_energy[istate],
-                                                                                                   self.T,
-                                                                                                   self.hamiltonian,
-                                                                                                   self.system,
-                                                                                                   self.options)
-            # compute the relative excitation level (REL) metric
-            self.relative_excitation_level[istate] = get_rel_ea(self.R[istate])
-            eaeomcc_calculation_summary(self.R[istate], self.vertical_excitation_energy[istate], self.correlation_energy, self.relative_excitation_level[istate], is_converged, self.system, self.options["amp_print_threshold"])
-            print("   EA-EOMCC calculation for root %d ended on" % istate, get_timestamp(), "\n")
+        if self.options["davidson_solver"] == "multiroot":
+            print("   Multiroot EA-EOMCC calculation started on", get_timestamp(), "\n")
+            # Form the initial subspace vectors
+            B0, _ = np.linalg.qr(np.asarray([self.R[i].flatten() for i in state_index]).T)
+            print("   Energy of initial guess")
+            for istate in state_index:
+                print("      Root  {} = {:>10.10f}".format(istate, self.vertical_excitation_energy[istate]))
+            self.R, self.vertical_excitation_energy, is_converged = eomcc_block_davidson(HR_function, update_function,
+                                                                                         B0,
+                                                                                         self.R, dR,
+                                                                                         self.vertical_excitation_energy,
+                                                                                         self.T, self.hamiltonian,
+                                                                                         self.system, state_index, self.options,
+                                                                                         block_hr=method.lower() in ccpy.eomcc.BLOCK_HR_MODULES)
+            for j, istate in enumerate(state_index):
+                # compute the relative excitation level (REL) metric
+                self.relative_excitation_level[istate] = get_rel_ea(self.R[istate])
+                eaeomcc_calculation_summary(self.R[istate], self.vertical_excitation_energy[istate], self.correlation_energy, self.relative_excitation_level[istate], is_converged[j], self.system, self.options["amp_print_threshold"])
+            print("   Multiroot EA-EOMCC calculation ended on", get_timestamp(), "\n")
+        else:
+            # Solve for the roots concurrently, if requested; their output is printed in order below
+            single_precision_operators = self.get_single_precision_operators()
+            concurrent_results = self.solve_roots_concurrently(HR_function, update_function, dR, state_index, single_precision_operators)
+            for j, istate in enumerate(state_index):
+                print("   EA-EOMCC calculation for root %d started on" % istate, get_timestamp())
+                print("\n   Energy of initial guess = {:>10.10f}".format(self.vertical_excitation_energy[istate]))
+                print_ea_amplitudes(self.R[istate], self.system, self.R[istate].order, self.options["amp_print_threshold"])
+                if concurrent_results is not None:
+                    self.R[istate], self.vertical_excitation_energy[istate], is_converged, log = concurrent_results[j]
+                    print(log, end="")
+                else:
+                    self.R[istate], self.vertical_excitation_energy[istate], is_converged = eomcc_davidson(HR_function,
+                                                                                                           update_function,
+                                                                                                           #B0[:, j],
+                                                                                                           self.R[istate].flatten() / np.linalg.norm(self.R[istate].flatten()),
+                                                                                                           self.R[istate],
+                                                                                                           dR,
+                                                                                                           self.vertical_excitation_energy[istate],
+                                                                                                           self.T,
+                                                                                                           self.hamiltonian,
+                                                                                                           self.system,
+                                                                                                           self.options,
+                                                                                                           single_precision_operators=single_precision_operators)
+                # compute the relative excitation level (REL) metric
+                self.relative_excitation_level[istate] = get_rel_ea(self.R[istate])
+                eaeomcc_calculation_summary(self.R[istate], self.vertical_excitation_energy[istate], self.correlation_energy, self.relative_excitation_level[istate], is_converged, self.system, self.options["amp_print_threshold"])
+                print("   EA-EOMCC calculation for root %d ended on" % istate, get_timestamp(), "\n")
 
     def run_leftcc(self, method, state_index=[0]):
         # check if requested CC calculation is implemented in modules
@@ -831,6 +1119,7 @@ class Driver:
         # Set operator parameters needed to build L
         self.set_operator_params(method)
         self.options["method"] = method.upper()
+        self.enforce_memory_limit(method, state_index)
 
         # Ensure that Hbar is set upon entry
         assert(self.flag_hbar)
@@ -838,8 +1127,16 @@ class Driver:
         # import the specific CC method module and get its update function
         lcc_mod = import_module("ccpy.left." + method.lower())
         update_function = getattr(lcc_mod, 'update')
+        LH_function = getattr(lcc_mod, 'LH_fun', None)
+        update_l_function = getattr(lcc_mod, 'update_l', None)
 
         LR_function = None
+        # excited-state roots are solved for with the left Davidson solver if options["left_solver"] = "davidson"
+        use_davidson = self.options["left_solver"] == "davidson" and any(i != 0 for i in state_index)
+        if use_davidson and LH_function is None:
+            raise NotImplementedError(
+                "Left Davidson solver not implemented for {}".format(method.lower())
+            )
 
         # Print the options as a header
         self.print_options()
@@ -874,13 +1171,19 @@ class Driver:
             # Zero out the residual
             LH.unflatten(0.0 * LH.flatten())
 
-            # Run the left CC calculation
-            self.L[i], _, LR, is_converged = left_cc_jacobi(update_function, self.L[i], LH, self.T, self.hamiltonian,
-                                                            LR_function, self.vertical_excitation_energy[i],
-                                                            ground_state, self.system, self.options)
-
-            if not ground_state:
-                self.L[i].unflatten(1.0 / LR_function(self.L[i], None) * self.L[i].flatten())
+            # Run the left CC calculation; the left Davidson solver returns L biorthonormalized to R
+            if ground_state or not use_davidson:
+                self.L[i], _, LR, is_converged = left_cc_jacobi(update_function, self.L[i], LH, self.T, self.hamiltonian,
+                                                                LR_function, self.vertical_excitation_energy[i],
+                                                                ground_state, self.system, self.options,
+                                                                checkpoint_label="{}_root{}".format(method.lower(), i))
+                if not ground_state:
+                    self.L[i].unflatten(1.0 / LR_function(self.L[i], None) * self.L[i].flatten())
+            else:
+                self.L[i], _, LR, is_converged = lefteomcc_davidson(LH_function, update_l_function, self.L[i], LH,
+                                                                    self.vertical_excitation_energy[i], LR_function,
+                                                                    self.T, self.hamiltonian, self.system, self.options,
+                                                                    checkpoint_label="{}_root{}".format(method.lower(), i))
 
             leftcc_calculation_summary(self.L[i], self.vertical_excitation_energy[i], LR, is_converged, self.system, self.options["amp_print_threshold"])
             print("   Left CC calculation for root %d ended on" % i, get_timestamp(), "\n")
@@ -929,24 +1232,100 @@ class Driver:
             print("   Left-EOMCC calculation for root %d started on" % istate, get_timestamp())
             print("\n   Energy of initial guess = {:>10.10f}".format(self.vertical_excitation_energy[istate]))
             print_ee_amplitudes(self.L[istate], self.system, self.L[istate].order, self.options["amp_print_threshold"])
-            self.L[istate], self.vertical_excitation_energy[istate], is_converged = eomcc_davidson(LH_function,
-                                                                                                   update_function,
-                                                                                                   #B0[:, j],
-                                                                                                   self.L[istate].flatten() / np.linalg.norm(self.L[istate].flatten()),
-                                                                                                   self.L[istate],
-                                                                                                   LH,
-                                                                                                   self.vertical_excitation_energy[istate],
-                                                                                                   self.T,
-                                                                                                   self.hamiltonian,
-                                                                                                   self.system,
-                                                                                                   self.options)
             # Create the LR normalization function
-            LR_function = lambda L: get_LR(self.R[istate], L, l3_excitations=None, r3_excitations=None)
-            LR = LR_function(self.L[istate])
-            self.L[istate].unflatten(1.0 / LR * self.L[istate].flatten())
+            LR_function = lambda L, l3_excitations: get_LR(self.R[istate], L, l3_excitations=None, r3_excitations=None)
+            self.L[istate], self.vertical_excitation_energy[istate], LR, is_converged = lefteomcc_davidson(LH_function,
+                                                                                                           update_function,
+                                                                                                           self.L[istate],
+                                                                                                           LH,
+                                                                                                           self.vertical_excitation_energy[istate],
+                                                                                                           LR_function,
+                                                                                                           self.T,
+                                                                                                           self.hamiltonian,
+                                                                                                           self.system,
+                                                                                                           self.options)
             leftcc_calculation_summary(self.L[istate], self.vertical_excitation_energy[istate], LR, is_converged, self.system, self.options["amp_print_threshold"])
             print("   Left-EOMCC calculation for root %d ended on" % istate, get_timestamp(), "\n")
 
+    def run_biorthogonal_eomcc(self, method, state_index):
+        """Solves for the right and left EOMCC eigenvectors of each root simultaneously using
+        the biorthogonal Davidson solver. The method is the right EOMCC method (e.g., "eomccsd"),
+        and the corresponding left-CC module (e.g., "left_ccsd") provides the left eigenproblem."""
+        left_method = "left_" + method.lower()[3:]
+        # check if requested EOMCC and left-CC calculations are implemented in modules
+        if method.lower() not in ccpy.eomcc.MODULES or left_method not in ccpy.left.MODULES:
+            raise NotImplementedError(
+                "{} not implemented".format(method.lower())
+            )
+        # Set operator parameters needed to build R and L
+        self.set_operator_params(method)
+        self.options["method"] = method.upper()
+        self.enforce_memory_limit(method, state_index, solver="biorthogonal")
+
+        # Ensure that Hbar is set upon entry
+        assert(self.flag_hbar)
+
+        # import the specific EOMCC and left-CC method modules and get their update functions
+        eom_module = import_module("ccpy.eomcc." + method.lower())
+        HR_function = getattr(eom_module, 'HR')
+        update_r_function = getattr(eom_module, 'update')
+        lcc_mod = import_module("ccpy.left." + left_method)
+        LH_function = getattr(lcc_mod, 'LH_fun')
+        update_l_function = getattr(lcc_mod, 'update_l')
+
+        for i in state_index:
+            if self.R[i] is None:
+                self.R[i] = ClusterOperator(self.system,
+                                            order=self.operator_params["order"],
+                                            active_orders=self.operator_params["active_orders"],
+                                            num_active=self.operator_params["number_active_indices"])
+                self.R[i].unflatten(self.guess_vectors[:, i - 1], order=self.guess_order, layout="C")
+                self.vertical_excitation_energy[i] = self.guess_energy[i - 1]
+            # the left vector is initialized with the right one
+            self.L[i] = ClusterOperator(self.system,
+                                        order=self.operator_params["order"],
+                                        active_orders=self.operator_params["active_orders"],
+                                        num_active=self.operator_params["number_active_indices"])
+            self.L[i].unflatten(self.R[i].flatten())
+
+        # Print the options as a header
+        self.print_options()
+
+        # Create the residuals HR and LH that are re-used for each root
+        dR = ClusterOperator(self.system,
+                             order=self.operator_params["order"],
+                             active_orders=self.operator_params["active_orders"],
+                             num_active=self.operator_params["number_active_indices"])
+        LH = ClusterOperator(self.system,
+                             order=self.operator_params["order"],
+                             active_orders=self.operator_params["active_orders"],
+                             num_active=self.operator_params["number_active_indices"])
+
+        for j, istate in enumerate(state_index):
+            print("   Biorthogonal EOMCC calculation for root %d started on" % istate, get_timestamp())
+            print("\n   Energy of initial guess = {:>10.10f}".format(self.vertical_excitation_energy[istate]))
+            print_ee_amplitudes(self.R[istate], self.system, self.R[istate].order, self.options["amp_print_threshold"])
+            self.R[istate], self.L[istate], self.vertical_excitation_energy[istate], LR, is_converged = eomcc_biorthogonal_davidson(HR_function,
+                                                                                                                                 update_r_function,
+                                                                                                                                 LH_function,
+                                                                                                                                 update_l_function,
+                                                                                                                                 self.R[istate],
+                                                                                                                                 self.L[istate],
+                                                                                                                                 dR,
+                                                                                                                                 LH,
+                                                                                                                                 self.vertical_excitation_energy[istate],
+                                                                                                                                 self.T,
+                                                                                                                                 self.hamiltonian,
+                                                                                                                                 self.system,
+                                                                                                                                 self.options)
+            # Compute r0 a posteriori
+            self.r0[istate] = get_r0(self.R[istate], self.hamiltonian, self.vertical_excitation_energy[istate])
+            # compute the relative excitation level (REL) metric
+            self.relative_excitation_level[istate] = get_rel(self.R[istate], self.r0[istate])
+            eomcc_calculation_summary(self.R[istate], self.vertical_excitation_energy[istate], self.correlation_energy, self.r0[istate], self.relative_excitation_level[istate], is_converged, istate, self.system, self.options["amp_print_threshold"])
+            leftcc_calculation_summary(self.L[istate], self.vertical_excitation_energy[istate], LR, is_converged, self.system, self.options["amp_print_threshold"])
+            print("   Biorthogonal EOMCC calculation for root %d ended on" % istate, get_timestamp(), "\n")
+
     def run_leftccp(self, method, t3_excitations, state_index=[0], r3_excitations=None, pspace=None):
         # check if requested CC calculation is implemented in modules
         if method.lower() not in ccpy.left.MODULES:
@@ -1033,7 +1412,8 @@ class Driver:
             self.L[i], _, LR, is_converged = left_cc_jacobi(update_function, self.L[i], LH, self.T, self.hamiltonian,
                                                             LR_function, self.vertical_excitation_energy[i],
                                                             ground_state, self.system, self.options,
-                                                            t3_excitations, l3_excitations)
+                                                            t3_excitations, l3_excitations,
+                                                            checkpoint_label="{}_root{}".format(method.lower(), i))
 
             if not ground_state:
                 self.L[i].unflatten(1.0 / LR_function(self.L[i], l3_excitations) * self.L[i].flatten())
@@ -1101,21 +1481,20 @@ class Driver:
         print("   Left-EOMCC(P) calculation for root %d started on" % state_index, get_timestamp())
         print("\n   Energy of initial guess = {:>10.10f}".format(self.vertical_excitation_energy[state_index]))
         print_ee_amplitudes(self.L[state_index], self.system, self.L[state_index].order, self.options["amp_print_threshold"])
-        self.L[state_index], self.vertical_excitation_energy[state_index], is_converged = eomcc_davidson(LH_function,
-                                                                                                         update_function,
-                                                                                                         self.L[state_index].flatten()/np.linalg.norm(self.L[state_index].flatten()),
-                                                                                                         self.L[state_index],
-                                                                                                         LH,
-                                                                                                         self.vertical_excitation_energy[state_index],
-                                                                                                         self.T,
-                                                                                                         self.hamiltonian,
-                                                                                                         self.system,
-                                                                                                         self.options,
-                                                                                                         t3_excitations,
-                                                                                                         l3_excitations) # THIS USED TO BE r3!!!
-        # Compute L*R and normalize the computed left vector by LR
-        LR = get_LR(self.R[state_index], self.L[state_index], l3_excitations=l3_excitations, r3_excitations=r3_excitations)
-        self.L[state_index].unflatten(1.0 / LR * self.L[state_index].flatten())
+        # Create the LR normalization function
+        LR_function = lambda L, l3_excitations: get_LR(self.R[state_index], L, l3_excitations=l3_excitations, r3_excitations=r3_excitations)
+        self.L[state_index], self.vertical_excitation_energy[state_index], LR, is_converged = lefteomcc_davidson(LH_function,
+                                                                                                                 update_function,
+                                                                                                                 self.L[state_index],
+                                                                                                                 LH,
+                                                                                                                 self.vertical_excitation_energy[state_index],
+                                                                                                                 LR_function,
+                                                                                                                 self.T,
+                                                                                                                 self.hamiltonian,
+                                                                                                                 self.system,
+                                                                                                                 self.options,
+                                                                                                                 t3_excitations,
+                                                                                                                 l3_excitations)
         # Reorder L to match the order of r3_excitations (this is unnecessary actually because L3 and R3 are already aligned)
         # self.L[state_index] = reorder_triples_amplitudes(self.L[state_index], l3_excitations, r3_excitations)
         leftcc_calculation_summary(self.L[state_index], self.vertical_excitation_energy[state_index], LR, is_converged, self.system, self.options["amp_print_threshold"])
@@ -1164,7 +1543,8 @@ class Driver:
             self.L[i], _, LR, is_converged = left_cc_jacobi(update_function, self.L[i], LH, self.T, self.hamiltonian,
                                                             LR_function, self.vertical_excitation_energy[i],
                                                             ground_state, self.system, self.options,
-                                                            t3_excitations, l3_excitations)
+                                                            t3_excitations, l3_excitations,
+                                                            checkpoint_label="{}_root{}".format(method.lower(), i))
             # Perform final biorthgonalization to R
             self.L[i].unflatten(1.0 / LR_function(self.L[i], l3_excitations) * self.L[i].flatten())
             leftcc_calculation_summary(self.L[i], self.vertical_excitation_energy[i], LR, is_converged, self.system, self.options["amp_print_threshold"])
@@ -1222,6 +1602,7 @@ class Driver:
                                                   T_ext, VT_ext,
                                                   self.system,
                                                   self.options,
+                                                  checkpoint_label="eccc_" + method.lower(),
                                                )
 
         cc_calculation_summary(self.T, self.system.reference_energy, self.correlation_energy, self.system, self.options["amp_print_threshold"])
@@ -1234,6 +1615,7 @@ class Driver:
             from ccpy.moments.creomcc23 import calc_creomcc23
             # Ensure that HBar is set upon entry
             assert self.flag_hbar
+            self.enforce_memory_limit(method, state_index)
             for i in state_index:
                 # Perform ground-state correction
                 if i == 0:
@@ -1320,6 +1702,7 @@ class Driver:
             from ccpy.moments.crcc24 import calc_crcc24
             # Ensure that HBar is set
             assert self.flag_hbar
+            self.enforce_memory_limit(method)
             # Perform ground-state correction
             _, self.deltap4[0] = calc_crcc24(self.T, self.L[0], self.correlation_energy, self.hamiltonian, self.fock, self.system, self.options["RHF_symmetry"])
 
@@ -0,0 +1,236 @@
+"""Estimates of the peak memory of CC, EOMCC, left-CC, and CR-CC calculations.
+
+The driver builds a MemoryPlan for each step of a calculation from the dimensions of the
+System, the sizes of the operators used by the requested method, and the solver options.
+The plan lists the memory by component (integrals, T and its update, HBar, DIIS history,
+EOM vectors, Davidson subspace, L and LH, and CR-CC diagonals and work arrays). When a
+memory limit is given, fit_to_memory_limit moves the DIIS history to disk and shrinks the
+Davidson subspace, or moves it to disk, until the plan fits, or raises MemoryError with the
+breakdown if it cannot. The integrals are measured from the arrays held in memory, so that
+memory-mapped (e.g., loaded with Driver.from_checkpoint) integrals are not counted; they
+cannot be moved out of core once loaded."""
+import numpy as np
+from ccpy.models.operators import get_operator_dimension
+
+# size of a double-precision number in bytes
+WORD = 8
+# the smallest Davidson subspace size considered when reducing the subspace to fit the memory limit
+MIN_DAVIDSON_SUBSPACE_SIZE = 8
+
+
+def get_cluster_operator_size(system, order, pspace_sizes=None):
+    """Returns the number of amplitudes of the particle-conserving operator of the given order.
+    If pspace_sizes = {n: [counts for each spin case]} is given, the n-body components contain
+    only the P-space amplitudes."""
+    ndim = 0
+    for i in range(1, order + 1):
+        for j in range(i + 1):
+            if pspace_sizes is not None and i in pspace_sizes:
+                ndim += pspace_sizes[i][j]
+            else:
+                ndim += np.prod(get_operator_dimension(i, j, system))
+    return int(ndim)
+
+def get_fock_operator_size(system, num_particles, num_holes):
+    """Returns the number of amplitudes of the particle-nonconserving FockOperator."""
+    if num_particles > num_holes:
+        add_dims = [system.nunoccupied_alpha, system.nunoccupied_beta]
+    else:
+        add_dims = [system.noccupied_alpha, system.noccupied_beta]
+    num_add = abs(num_particles - num_holes)
+    # EA/IP add an alpha particle/hole, DEA/DIP an alpha-beta pair
+    add_size = int(np.prod(add_dims[:num_add]))
+    return add_size * (1 + get_cluster_operator_size(system, min(num_particles, num_holes)))
+
+def get_spinflip_operator_size(system, order):
+    """Returns the number of amplitudes of the Ms = -1 SpinFlipOperator of the given order."""
+    noa, nob = system.noccupied_alpha, system.noccupied_beta
+    nua, nub = system.nunoccupied_alpha, system.nunoccupied_beta
+    sizes = [nub * noa,
+             nua * nub * noa * noa + nub * nub * nob * noa,
+             nua * nua * nub * noa**3 + nua * nub * nub * noa * nob * noa + nub**3 * nob * nob * noa]
+    return int(sum(sizes[:order]))
+
+def get_array_memory(obj):
+    """Returns the number of bytes of the in-core arrays reachable from obj through attributes,
+    dictionaries, lists, and tuples. Views are counted once through the array they view, and
+    memory-mapped arrays are not counted."""
+    total = 0
+    visited = set()
+    counted = set()
+    stack = [obj]
+    while stack:
+        x = stack.pop()
+        if id(x) in visited:
+            continue
+        visited.add(id(x))
+        if isinstance(x, np.ndarray):
+            base = x
+            while isinstance(base.base, np.ndarray):
+                base = base.base
+            # arrays backed by a file (np.memmap or np.load(..., mmap_mode)) do not occupy memory
+            if isinstance(base, np.memmap) or base.base is not None:
+                continue
+            if id(base) not in counted:
+                counted.add(id(base))
+                total += base.nbytes
+        elif isinstance(x, dict):
+            stack.extend(x.values())
+        elif isinstance(x, (list, tuple)):
+            stack.extend(x)
+        elif hasattr(x, "__dict__") and type(x).__module__.startswith("ccpy"):
+            stack.extend(vars(x).values())
+    return total
+
+
+class MemoryPlan:
+    """Expected memory, in bytes, of each component of a calculation step."""
+    def __init__(self, name):
+        self.name = name
+        self.components = {}
+
+    def add(self, component, nbytes):
+        if nbytes > 0:
+            self.components[component] = self.components.get(component, 0) + int(nbytes)
+
+    @property
+    def total(self):
+        return sum(self.components.values())
+
+    def summary(self, memory_limit=None):
+        """Returns the breakdown of the plan in MB as a printable string."""
+        lines = ["   Memory plan for {}".format(self.name)]
+        for component, nbytes in self.components.items():
+            lines.append("      {:<30} {:>12.1f} MB".format(component, nbytes / 1024**2))
+        lines.append("      {:<30} {:>12.1f} MB".format("Total", self.total / 1024**2))
+        if memory_limit is not None:
+            lines.append("      {:<30} {:>12.1f} MB".format("Memory limit", memory_limit))
+        return "\n".join(lines)
+
+    def print_summary(self, memory_limit=None):
+        print(self.summary(memory_limit))
+        print("")
+
+
+def get_davidson_subspace_size(options, solver, num_roots):
+    """Returns the number of vectors held in the subspace(s) of the given Davidson solver,
+    which is one of "standard" (eomcc_davidson, run concurrently for several roots if
+    options["davidson_num_workers"] > 1), "multiroot" (eomcc_block_davidson), "biorthogonal"
+    (eomcc_biorthogonal_davidson), or "left" (lefteomcc_davidson)."""
+    max_size = options["davidson_max_subspace_size"]
+    if solver == "multiroot":
+        # B and sigma with max(max_size, 3) vectors per root
+        return 2 * num_roots * max(max_size, 3)
+    if solver == "biorthogonal":
+        # right and left subspaces and their sigma vectors
+        return 4 * max_size
+    if solver == "standard":
+        # B and sigma in each of the processes solving for the roots concurrently
+        return 2 * max_size * get_num_processes(options, num_roots)
+    return 2 * max_size
+
+def get_num_processes(options, num_roots):
+    """Returns the number of processes used to solve for num_roots roots concurrently."""
+    if num_roots > 1 and options["davidson_num_workers"] > 1:
+        return min(options["davidson_num_workers"], num_roots)
+    return 1
+
+def build_memory_plan(name, options, integral_bytes, T_size,
+                      hbar=False, eom_size=0, num_roots=0, eom_solver="standard",
+                      left_size=0, num_left_roots=0, left_solver="jacobi", correction=None, system=None):
+    """Returns the MemoryPlan of a calculation step. The arguments give the bytes held by the
+    integrals, the number of amplitudes in T, whether HBar is built from the integrals, the size
+    and number of the EOM (R) operators and the EOM solver ("standard", "multiroot", "diis", or
+    "biorthogonal", whose subspace holds both the R and L vectors), the size and number of the
+    left (L) operators and their solver ("jacobi", "davidson", or "biorthogonal"), and the noniterative correction ("crcc23" or "crcc24")
+    computed at the end."""
+    plan = MemoryPlan(name)
+    plan.add("Integrals", integral_bytes)
+    # HBar shares the blocks it does not transform with the bare Hamiltonian, so a full copy is an upper bound
+    if hbar:
+        plan.add("HBar", integral_bytes)
+    plan.add("T and dT", 2 * T_size * WORD)
+    use_diis = options["diis_size"] > 0 and options["acceleration"].lower() != "jacobi"
+    is_cc = left_size == 0 and eom_size == 0 and not hbar and correction is None
+    if is_cc:
+        if use_diis and not options["diis_out_of_core"]:
+            plan.add("DIIS", 2 * options["diis_size"] * T_size * WORD)
+        # single-precision copy of the integrals used by cc_jacobi (T and dT are cast in place)
+        if options["mixed_precision"]:
+            plan.add("Single-precision copies", integral_bytes // 2)
+    if eom_size > 0:
+        # one R per root and the residual vector
+        plan.add("EOM vectors", (num_roots + 1) * eom_size * WORD)
+        if eom_solver == "diis":
+            if not options["diis_out_of_core"]:
+                plan.add("DIIS", 2 * options["diis_size"] * eom_size * WORD)
+        elif not options["davidson_out_of_core"]:
+            plan.add("Davidson subspace", get_davidson_subspace_size(options, eom_solver, num_roots) * eom_size * WORD)
+        # single-precision copies of HBar and T made once and shared by the roots (and processes) of eomcc_davidson
+        if options["mixed_precision"] and eom_solver == "standard":
+            plan.add("Single-precision copies", (integral_bytes + T_size * WORD) // 2)
+    if left_size > 0:
+        # one L per root and LH
+        plan.add("L and LH", (num_left_roots + 1) * left_size * WORD)
+        if left_solver == "jacobi":
+            if use_diis and not options["diis_out_of_core"]:
+                plan.add("DIIS", 2 * options["diis_size"] * left_size * WORD)
+        elif left_solver == "davidson" and not options["davidson_out_of_core"]:
+            plan.add("Davidson subspace", get_davidson_subspace_size(options, "left", 1) * left_size * WORD)
+    if correction is not None:
+        noa, nob = system.noccupied_alpha, system.noccupied_beta
+        nua, nub = system.nunoccupied_alpha, system.nunoccupied_beta
+        # H3 diagonals d3(v,o,v) and d3(v,o,o) of the aaa, aab, abb, and bbb spin cases
+        plan.add("CR-CC diagonals", WORD * (nua * noa * (nua + noa) + nua * noa * (nub + nob)
+                                           + nub * nob * (nub + noa) + nub * nob * (nub + nob)))
+        nu = max(nua, nub)
+        if correction.lower() == "crcc23":
+            # moments, L3, and denominators for a fixed triple of occupied indices
+            plan.add("CR-CC work arrays", 3 * nu**3 * WORD)
+        elif correction.lower() == "crcc24":
+            # moments and L4 for a fixed quadruple of occupied indices
+            plan.add("CR-CC work arrays", 2 * nu**4 * WORD)
+    return plan
+
+def fit_to_memory_limit(build_plan, options, memory_limit):
+    """Adjusts the solver options until the plan returned by build_plan() fits within
+    memory_limit (in MB) by (1) moving the DIIS history to disk, (2) halving the in-core
+    Davidson subspace size down to MIN_DAVIDSON_SUBSPACE_SIZE (or twice the restart size),
+    and, if that is not enough, (3) moving the Davidson subspace of the original size to disk.
+    Returns the final plan, or raises MemoryError with the breakdown if it does not fit."""
+    limit = memory_limit * 1024**2
+    plan = build_plan()
+    if plan.total <= limit:
+        return plan
+
+    changes = []
+    if "DIIS" in plan.components:
+        options["diis_out_of_core"] = True
+        changes.append("diis_out_of_core = True")
+        plan = build_plan()
+    if plan.total > limit and "Davidson subspace" in plan.components:
+        subspace_size = options["davidson_max_subspace_size"]
+        min_subspace_size = max(MIN_DAVIDSON_SUBSPACE_SIZE, 2 * options["davidson_restart_size"])
+        while plan.total > limit and options["davidson_max_subspace_size"] > min_subspace_size:
+            options["davidson_max_subspace_size"] = max(min_subspace_size, options["davidson_max_subspace_size"] // 2)
+            plan = build_plan()
+        if plan.total > limit:
+            # a smaller subspace does not help once it is stored on disk
+            options["davidson_max_subspace_size"] = subspace_size
+            options["davidson_out_of_core"] = True
+            changes.append("davidson_out_of_core = True")
+            plan = build_plan()
+        else:
+            changes.append("davidson_max_subspace_size = {}".format(options["davidson_max_subspace_size"]))
+
+    if plan.total > limit:
+        raise MemoryError(
+            plan.summary(memory_limit)
+            + "\n   The calculation does not fit within the memory limit"
+            + (" after setting " + ", ".join(changes) if changes else "")
+            + ". Consider loading the integrals with lazy_integrals=True, use_cholesky=True,"
+            + " or from a memory-mapped checkpoint (Driver.from_checkpoint), or freezing/deleting orbitals."
+        )
+    for change in changes:
+        print("   Memory limit of {} MB: setting {}".format(memory_limit, change))
+    return plan
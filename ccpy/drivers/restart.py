@@ -0,0 +1,103 @@
+"""Checkpoint files used to resume interrupted iterative calculations. The Jacobi CC and
+left-CC solvers periodically write the current amplitudes, the history of the convergence
+accelerator, and the iteration count to <checkpoint_directory>/<label>.npz (the left
+Davidson solver writes its current Ritz vector). When the same
+calculation is rerun with options["restart"] = True, the solver reloads this file and
+continues from the next iteration. A checkpoint written at convergence only provides the
+starting amplitudes, and checkpoints that do not match the calculation being run (different
+number of amplitudes or P space) are ignored."""
+import os
+import time
+
+import numpy as np
+
+
+def write_arrays(filename, arrays):
+    """Writes the dictionary of arrays to the .npz file `filename`. The arrays are written
+    to a temporary file first, so that an interrupted write never replaces a valid checkpoint."""
+    os.makedirs(os.path.dirname(os.path.abspath(filename)), exist_ok=True)
+    temporary_filename = filename[:-len(".npz")] + ".tmp.npz"
+    np.savez(temporary_filename, **arrays)
+    os.replace(temporary_filename, filename)
+
+def read_arrays(filename):
+    """Returns the dictionary of arrays stored in the .npz file `filename`, or None if it does not exist."""
+    if not os.path.exists(filename):
+        return None
+    with np.load(filename) as f:
+        return {key: f[key] for key in f.files}
+
+def excitations_match(arrays, excitations):
+    """Checks whether the P-space excitations stored in the checkpoint are the ones used by the calculation."""
+    stored_keys = {key[len("excitations."):] for key in arrays if key.startswith("excitations.")}
+    if excitations is None:
+        return not stored_keys
+    return stored_keys == set(excitations.keys()) and all(
+        np.array_equal(arrays["excitations." + key], value) for key, value in excitations.items()
+    )
+
+
+class SolverCheckpoint:
+    """Checkpoint of an iterative solver, written every options["checkpoint_interval"] iterations
+    and/or every options["checkpoint_interval_minutes"] minutes of wall time (either may be None)."""
+    def __init__(self, label, options):
+        self.filename = os.path.join(options["checkpoint_directory"], label + ".npz")
+        self.interval = options["checkpoint_interval"]
+        self.interval_minutes = options["checkpoint_interval_minutes"]
+        self.t_last_write = time.perf_counter()
+
+    def is_due(self, niter):
+        if self.interval is not None and (niter + 1) % self.interval == 0:
+            return True
+        if self.interval_minutes is not None and time.perf_counter() - self.t_last_write >= 60.0 * self.interval_minutes:
+            return True
+        return False
+
+    def write(self, niter, X, energy, engine=None, excitations=None, single_precision=False, is_converged=False):
+        """Writes the operator X, the energy of iteration niter, the state of the convergence accelerator
+        engine, and the P-space excitations used by the calculation."""
+        arrays = {"niter": niter,
+                  "energy": energy,
+                  "single_precision": single_precision,
+                  "is_converged": is_converged,
+                  "vector": X.flatten()}
+        if engine is not None:
+            arrays["accelerator"] = type(engine).__name__
+            for key, array in engine.get_state().items():
+                arrays["accelerator." + key] = array
+        if excitations is not None:
+            for key, array in excitations.items():
+                arrays["excitations." + key] = array
+        write_arrays(self.filename, arrays)
+        self.t_last_write = time.perf_counter()
+
+    def read(self, X, engine=None, excitations=None):
+        """Loads the checkpointed amplitudes into X and, if the same accelerator is used, restores its
+        history. Returns a dictionary with the iteration count (-1 for converged amplitudes), energy,
+        and precision of the last checkpointed iteration, or None if no matching checkpoint exists."""
+        arrays = read_arrays(self.filename)
+        if arrays is None:
+            return None
+        if arrays["vector"].shape[0] != X.ndim or not excitations_match(arrays, excitations):
+            print("   Checkpoint {} does not match this calculation and is ignored".format(self.filename))
+            return None
+        X.unflatten(arrays["vector"].astype(X.flatten().dtype))
+        if bool(arrays["is_converged"]):
+            # the converged amplitudes are used as the initial guess of a new set of iterations
+            print("   Using the converged amplitudes in checkpoint {} as the initial guess".format(self.filename))
+            return {"niter": -1,
+                    "energy": float(arrays["energy"]),
+                    "single_precision": bool(arrays["single_precision"])}
+        if engine is not None and "accelerator" in arrays and str(arrays["accelerator"]) == type(engine).__name__:
+            engine.set_state({key[len("accelerator."):]: array for key, array in arrays.items() if key.startswith("accelerator.")})
+        print("   Resuming from checkpoint {} after iteration {}".format(self.filename, int(arrays["niter"])))
+        return {"niter": int(arrays["niter"]),
+                "energy": float(arrays["energy"]),
+                "single_precision": bool(arrays["single_precision"])}
+
+
+def get_checkpoint(label, options):
+    """Returns the SolverCheckpoint for the given label, or None if checkpointing is disabled."""
+    if label is None or options["checkpoint_directory"] is None:
+        return None
+    return SolverCheckpoint(label, options)
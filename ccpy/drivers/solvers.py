@@ -1,4 +1,8 @@
 """Module containing the driving solvers"""
+import contextlib
+import io
+import multiprocessing
+import os
 import time
 import numpy as np
 from ccpy.utilities.printing import (
@@ -7,8 +11,6 @@ from ccpy.utilities.printing import (
         print_block_eomcc_iteration,
         print_ee_amplitudes
 )
-# [TODO]: (1) Add left-EOMCC single-root Davidson solver
-# [TODO]: (2) Add biorthogonal L and R single-root Davidson solver (non-Hermitian Hirao-Nakatsuji algorithm)
 
 def eomcc_nonlinear_diis(HR, update_r, B0, R, dR, omega, T, H, X, fock, system, options):
     from ccpy.drivers.diis import DIIS
@@ -18,7 +20,8 @@ def eomcc_nonlinear_diis(HR, update_r, B0, R, dR, omega, T, H, X, fock, system,
     # print header
     print_eomcc_iteration_header()
     # Instantiate DIIS accelerator (re-used for all roots)
-    diis_engine = DIIS(R, options["diis_size"], options["diis_out_of_core"])
+    diis_engine = DIIS(R, options["diis_size"], options["diis_out_of_core"], options["scratch_directory"],
+                       options["acceleration_condition_threshold"])
     # Initial values
     R.unflatten(B0)
     # begin iteration loop
@@ -52,7 +55,9 @@ def eomcc_nonlinear_diis(HR, update_r, B0, R, dR, omega, T, H, X, fock, system,
         diis_engine.push(R, dR, niter)
         # Do DIIS extrapolation
         if niter >= options["diis_size"]:
-            R.unflatten(diis_engine.extrapolate())
+            R_xtrap = diis_engine.extrapolate()
+            if R_xtrap is not None:
+                R.unflatten(R_xtrap)
         # print the iteration of convergence
         elapsed_time = time.perf_counter() - t1
         print_eomcc_iteration(niter, omega, residual, delta_energy, elapsed_time)
@@ -66,49 +71,67 @@ def eomcc_nonlinear_diis(HR, update_r, B0, R, dR, omega, T, H, X, fock, system,
     print(f"   Total CPU time is {time.process_time() - t_cpu_root_start} seconds")
     return R, omega, is_converged
 
-def eomcc_davidson(HR, update_r, B0, R, dR, omega, T, H, system, options, t3_excitations=None, r3_excitations=None):
+def get_single_precision_operators(H, T):
+    """Returns single-precision copies of HBar and T for the mixed-precision iterations of eomcc_davidson."""
+    from copy import deepcopy
+    T_single = deepcopy(T)
+    cast_operator(T_single, np.float32)
+    return H.astype(np.float32), T_single
+
+def eomcc_davidson(HR, update_r, B0, R, dR, omega, T, H, system, options, t3_excitations=None, r3_excitations=None,
+                   single_precision_operators=None):
     """
     Diagonalize the similarity-transformed Hamiltonian HBar using the
-    non-Hermitian Davidson algorithm.
+    non-Hermitian Davidson algorithm. When the subspace reaches its maximum size,
+    it is restarted with the options["davidson_restart_size"] Ritz vectors closest to
+    the selected root, whose sigma vectors are obtained by linear combination rather
+    than by recomputing H*R. If options["mixed_precision"] is True,
+    the sigma vectors are first built with single-precision copies of HBar and T.
+    Once the residual falls below options["mixed_precision_threshold"], the subspace
+    is restarted from the current eigenvector and the iterations continue in
+    double precision. The single-precision copies (H, T), as returned by
+    get_single_precision_operators, are made here unless given as single_precision_operators,
+    which lets the roots of one calculation share them.
     """
-    import h5py
-    from ccpy.utilities.utilities import remove_file
+    from ccpy.utilities.vector_store import VectorStore
     t_root_start = time.perf_counter()
     t_cpu_root_start = time.process_time()
 
     print_eomcc_iteration_header()
 
-    # Create new HDF5 file by first checking if one exists and if so, remove it
-    remove_file("eomcc-vectors.hdf5")
-    if options["davidson_out_of_core"]:
-        f = h5py.File("eomcc-vectors.hdf5", "w")
-
-    # Maximum subspace size
-    nrest = 1   # number of previous vectors used to restart (>1 does not work, why?)
-    noffset = 0 # flag set to 1 to include B0 in the restart subspace or 0 to exclude it (doesn't seem to help).
+    # Maximum subspace size and number of Ritz vectors kept on restart
     max_size = options["davidson_max_subspace_size"]
+    nrest = max(1, min(options["davidson_restart_size"], max_size - 1))
     selection_method = options["davidson_selection_method"]
 
+    # single-precision copies of HBar and T used during the early iterations
+    single_precision = options["mixed_precision"]
+    H_iter, T_iter = H, T
+    if single_precision:
+        if single_precision_operators is None:
+            single_precision_operators = get_single_precision_operators(H, T)
+        H_iter, T_iter = single_precision_operators
+
+    def compute_sigma(R):
+        # the subspace (B and sigma) is always stored in double precision
+        if single_precision:
+            cast_operator(R, np.float32)
+            cast_operator(dR, np.float32)
+        if t3_excitations or r3_excitations:
+            return HR(dR, R, T_iter, H_iter, options["RHF_symmetry"], system, t3_excitations, r3_excitations)
+        else:
+            return HR(dR, R, T_iter, H_iter, options["RHF_symmetry"], system)
+
     # Allocate the B (correction/subspace), sigma (HR), and G (interaction) matrices
-    if options["davidson_out_of_core"]:
-        sigma = f.create_dataset("sigma", (max_size, R.ndim), dtype=np.float64)
-        B = f.create_dataset("bmatrix", (max_size, R.ndim), dtype=np.float64)
-    else:
-        sigma = np.zeros((max_size, R.ndim))
-        B = np.zeros((max_size, R.ndim))
+    sigma = VectorStore(max_size, R.ndim, options["davidson_out_of_core"], options["scratch_directory"], prefix="eomcc-sigma")
+    B = VectorStore(max_size, R.ndim, options["davidson_out_of_core"], options["scratch_directory"], prefix="eomcc-bmatrix")
     G = np.zeros((max_size, max_size))
-    restart_block = np.zeros((R.ndim, nrest + noffset))
 
-    # Initial values
-    B[0, :] = B0
-    R.unflatten(B0)
+    # Initial values (the rows of B are kept orthonormal)
+    B[0, :] = B0 / np.linalg.norm(B0)
+    R.unflatten(B[0, :])
     dR.unflatten(dR.flatten() * 0.0)
-    if t3_excitations or r3_excitations:
-        sigma[0, :] = HR(dR, R, T, H, options["RHF_symmetry"], system, t3_excitations, r3_excitations)
-    else:
-        sigma[0, :] = HR(dR, R, T, H, options["RHF_symmetry"], system)
-    if noffset == 1:
-        restart_block[:, 0] = B0
+    sigma[0, :] = compute_sigma(R)
 
     is_converged = False
     curr_size = 1
@@ -140,13 +163,29 @@ def eomcc_davidson(HR, update_r, B0, R, dR, omega, T, H, system, options, t3_exc
         # Uncomment these lines to print R at each iteration
         #R.unflatten(r)
         #print_ee_amplitudes(R, system, R.order, 0.09)
-        restart_block[:, niter % nrest + noffset] = r
 
         # calculate residual vector: r_i = S_{iK}*alpha_{K} - omega * r_i
         R.unflatten(np.dot(sigma[:curr_size, :].T, alpha) - omega * r)
         residual = np.linalg.norm(R.flatten())
         delta_energy = omega - omega_old
 
+        if single_precision and (
+            residual < options["mixed_precision_threshold"]
+            or (residual < options["amp_convergence"] and abs(delta_energy) < options["energy_convergence"])
+        ):
+            # promote to double precision by restarting the subspace from the current eigenvector
+            single_precision = False
+            H_iter, T_iter = H, T
+            print("       **Switching to double precision**")
+            B[0, :] = r / np.linalg.norm(r)
+            R.unflatten(B[0, :])
+            dR.unflatten(dR.flatten().astype(np.float64) * 0.0)
+            sigma[0, :] = compute_sigma(R)
+            curr_size = 1
+            elapsed_time = time.perf_counter() - t1
+            print_eomcc_iteration(niter, omega, residual, delta_energy, elapsed_time)
+            continue
+
         if residual < options["amp_convergence"] and abs(delta_energy) < options["energy_convergence"]:
             is_converged = True
             # print the iteration of convergence
@@ -155,38 +194,35 @@ def eomcc_davidson(HR, update_r, B0, R, dR, omega, T, H, system, options, t3_exc
             break
 
         # update residual vector using diagonal preconditioning
+        B.prefetch(range(curr_size))
         if t3_excitations or r3_excitations:
-            R = update_r(R, omega, H, options["RHF_symmetry"], system, r3_excitations)
+            R = update_r(R, omega, H_iter, options["RHF_symmetry"], system, r3_excitations)
         else:
-            R = update_r(R, omega, H, options["RHF_symmetry"], system)
-        # orthogonalize residual against subspace vectors (would be nice to vectorize this)
-        q = R.flatten()
+            R = update_r(R, omega, H_iter, options["RHF_symmetry"], system)
+        # orthogonalize residual against subspace vectors using block Gram-Schmidt with reorthogonalization
+        # q is R's own buffer (unless it is in single precision), so it is orthogonalized in place
+        q = R.buffer().astype(np.float64, copy=False)
         q /= np.linalg.norm(q)
-        for p in range(curr_size):
-            b = B[p, :] / np.linalg.norm(B[p, :])
-            q -= np.dot(b, q) * b
+        for _ in range(2):
+            q -= np.dot(np.dot(B[:curr_size, :], q), B[:curr_size, :])
         q /= np.linalg.norm(q)
         R.unflatten(q)
 
-        # If below maximum subspace size, expand the subspace
-        if curr_size < max_size:
-            B[curr_size, :] = q
-            if t3_excitations or r3_excitations:
-                sigma[curr_size, :] = HR(dR, R, T, H, options["RHF_symmetry"], system, t3_excitations, r3_excitations)
-            else:
-                sigma[curr_size, :] = HR(dR, R, T, H, options["RHF_symmetry"], system)
-        else:
-            # Basic restart - use the last approximation to the eigenvector
+        # Thick restart - keep the Ritz vectors closest to the selected root. Since the rows
+        # of B are orthonormal, the restarted B, sigma, and G follow from B, sigma, and G.
+        if curr_size == max_size:
             print("       **Deflating subspace**")
-            restart_block, _ = np.linalg.qr(restart_block)
-            for j in range(restart_block.shape[1]):
-                R.unflatten(restart_block[:, j])
-                B[j, :] = R.flatten()
-                if t3_excitations or r3_excitations:
-                    sigma[j, :] = HR(dR, R, T, H, options["RHF_symmetry"], system, t3_excitations, r3_excitations)
-                else:
-                    sigma[j, :] = HR(dR, R, T, H, options["RHF_symmetry"], system)
-            curr_size = restart_block.shape[1] - 1
+            ikeep = np.argsort([abs(x - e[iselect]) for x in e], kind="stable")[:nrest]
+            ikeep = np.concatenate(([iselect], ikeep[ikeep != iselect]))[:nrest]
+            A, _ = np.linalg.qr(np.real(alpha_full[:, ikeep]))
+            B[:nrest, :] = np.dot(A.T, B[:curr_size, :])
+            sigma[:nrest, :] = np.dot(A.T, sigma[:curr_size, :])
+            G[:nrest, :nrest] = np.dot(A.T, np.dot(G[:curr_size, :curr_size], A))
+            curr_size = nrest
+
+        # expand the subspace
+        B[curr_size, :] = q
+        sigma[curr_size, :] = compute_sigma(R)
 
         # print the iteration of convergence
         elapsed_time = time.perf_counter() - t1
@@ -196,268 +232,613 @@ def eomcc_davidson(HR, update_r, B0, R, dR, omega, T, H, system, options, t3_exc
 
     # store the actual root you've solved for
     R.unflatten(r)
-    # remove HDF5 file
-    remove_file("eomcc-vectors.hdf5")
+    # remove the scratch files of out-of-core vectors
+    B.cleanup()
+    sigma.cleanup()
     # print the time taken for the root
     minutes, seconds = divmod(time.perf_counter() - t_root_start, 60)
     print(f"   Completed in {minutes:.1f}m {seconds:.1f}s")
     print(f"   Total CPU time is {time.process_time() - t_cpu_root_start} seconds")
     return R, omega, is_converged
 
-# Trying to get the version with restarts working...
-# def eomcc_block_davidson(HR, update_r, B0, R, dR, omega, T, H, system, state_index, options):
-#     """
-#     Diagonalize the similarity-transformed Hamiltonian HBar using the
-#     non-Hermitian block Davidson algorithm.
-#     Here, it is assumed that you have a list of R operators, [R1, R2, ..., Rn]
-#     and a single residual container dR that is re-used for each root.
-#     """
-#     print_eomcc_iteration_header()
-#
-#     # Number of roots
-#     nroot = len(state_index)
-#     ndim = R[state_index[0]].ndim
-#     max_size = nroot * options["davidson_max_subspace_size"]
-#     selection_method = options["davidson_selection_method"]
-#
-#     # Allocate the B (correction/subspace), sigma (HR), and G (interaction) matrices
-#     sigma = np.zeros((ndim, max_size))
-#     B = np.zeros((ndim, max_size))
-#     G = np.zeros((max_size, max_size))
-#
-#     # Initial values
-#     num_add = 0
-#     curr_size = 0
-#     for j, istate in enumerate(state_index):
-#         B[:, j] = B0[:, j]
-#         R[istate].unflatten(B[:, j])
-#         dR.unflatten(dR.flatten() * 0.0)
-#         sigma[:, j] = HR(dR, R[istate], T, H, options["RHF_symmetry"], system)
-#         num_add += 1
-#         curr_size += 1
-#
-#     is_converged = [False] * nroot
-#     residual = np.zeros(nroot)
-#     delta_energy = np.zeros(nroot)
-#     for niter in range(options["maximum_iterations"]):
-#         t1 = time.perf_counter()
-#         # store old energy
-#         omega_old = omega.copy()
-#
-#         # solve projection subspace eigenproblem: G_{IJ} = sum_K B_{KI} S_{KJ}
-#         for p in range(curr_size):
-#             for j in range(1, num_add + 1):
-#                 G[curr_size - j, p] = np.dot(B[:, curr_size - j].T, sigma[:, p])
-#                 G[p, curr_size - j] = np.dot(sigma[:, curr_size - j].T, B[:, p])
-#         e, alpha_full = np.linalg.eig(G[:curr_size, :curr_size])
-#
-#         # Compute the approximations
-#         n_active = sum([not x for x in is_converged])
-#         i_active = [j for j in range(nroot) if is_converged[j]]
-#         alpha = np.zeros((curr_size, nroot))
-#         for j, istate in enumerate(state_index):
-#             # Cycle if root is already converged
-#             if is_converged[j]: continue
-#             # select root
-#             if selection_method == "overlap":  # Option 1: based on overlap
-#                 idx = np.argsort(abs(alpha_full[j, :]))
-#                 iselect = idx[-1]
-#             elif selection_method == "energy": # Option 2: based on energy
-#                 idx = np.argsort(e)
-#                 iselect = idx[j]
-#
-#             # Get the expansion coefficients for the j-th root
-#             alpha[:, j] = np.real(alpha_full[:, iselect])
-#
-#             # Get the eigenpair of interest
-#             omega[istate] = np.real(e[iselect])
-#             r = np.dot(B[:, :curr_size], alpha[:, j])
-#
-#             # calculate residual vector: r_i = S_{iK}*alpha_{K} - omega * r_i
-#             R[istate].unflatten(np.dot(sigma[:, :curr_size], alpha[:, j]) - omega[istate] * r)
-#             residual[j] = np.linalg.norm(R[istate].flatten())
-#             delta_energy[j] = omega[istate] - omega_old[istate]
-#
-#             # Check convergence
-#             if residual[j] < options["amp_convergence"] and abs(delta_energy[j]) < options["energy_convergence"]:
-#                 R[istate].unflatten(r)
-#                 is_converged[j] = True
-#
-#         # Expand the subspace
-#         num_add = 0
-#         if curr_size + n_active < max_size:
-#             for j, istate in enumerate(state_index):
-#                 # Cycle if root is already converged
-#                 if is_converged[j]: continue
-#                 # update the residual vector
-#                 R[istate] = update_r(R[istate], omega[istate], H, system)
-#                 q = R[istate].flatten()
-#                 for p in range(curr_size + num_add):
-#                     b = B[:, p] / np.linalg.norm(B[:, p])
-#                     q -= np.dot(b.T, q) * b
-#                 q /= np.linalg.norm(q)
-#                 R[istate].unflatten(q)
-#                 B[:, curr_size + num_add] = q
-#                 sigma[:, curr_size + num_add] = HR(dR, R[istate], T, H, options["RHF_symmetry"], system)
-#                 num_add += 1
-#             curr_size += num_add
-#         else: # deflate the subspace
-#             print("      **Deflating subspace**")
-#             btemp = np.zeros((ndim, n_active))
-#             ct = 0
-#             for j in range(nroot):
-#                 if is_converged[j]: continue
-#                 btemp[:, ct] = np.dot(B[:, :curr_size], alpha[:, j])
-#                 ct += 1
-#             B[:, :n_active] = btemp
-#             B[:, :n_active], _ = np.linalg.qr(B[:, :n_active])
-#             ct = 0
-#             for j, istate in enumerate(state_index):
-#                 # Cycle if root is already converged
-#                 if is_converged[j]: continue
-#                 R[istate].unflatten(B[:, ct])
-#                 sigma[:, ct] = HR(dR, R[istate], T, H, options["RHF_symmetry"], system)
-#                 ct += 1
-#             curr_size = n_active
-#             num_add = n_active
-#
-#         # print the iteration
-#         elapsed_time = time.perf_counter() - t1
-#         print_block_eomcc_iteration(niter + 1, curr_size, omega, residual, delta_energy, elapsed_time, state_index)
-#
-#         # Check for all roots converged and break
-#         if all(is_converged):
-#             print("   All roots converged")
-#             break
-#
-#     return R, omega, is_converged
+def lefteomcc_davidson(LH, update_l, L, dL, omega, LR_function, T, H, system, options, t3_excitations=None, l3_excitations=None, checkpoint_label=None):
+    """
+    Solve for the left eigenvector L of HBar belonging to the right eigenvalue omega
+    using the non-Hermitian Davidson algorithm. The converged right vector R, loaded
+    into L on entry, is used as the initial guess and the Ritz pair whose eigenvalue
+    is closest to omega is selected in each iteration. The subspace is thick-restarted
+    in the same way as in eomcc_davidson. On exit, L is biorthonormalized to R, so
+    that LR_function(L, l3_excitations) = 1. Returns L, the left eigenvalue, the
+    overlap <L|R> prior to normalization, and the convergence flag.
+    If checkpoint_label is given and options["checkpoint_directory"] is set, the current
+    Ritz vector is periodically written to a checkpoint file, from which the subspace
+    is rebuilt if options["restart"] is True.
+    """
+    from ccpy.utilities.vector_store import VectorStore
+    from ccpy.drivers.restart import get_checkpoint
+    t_root_start = time.perf_counter()
+    t_cpu_root_start = time.process_time()
 
-def eomcc_block_davidson(HR, update_r, B0, R, dR, omega, T, H, system, state_index, options, t3_excitations=None, r3_excitations=None):
+    print_eomcc_iteration_header()
+
+    # Maximum subspace size and number of Ritz vectors kept on restart
+    max_size = options["davidson_max_subspace_size"]
+    nrest = max(1, min(options["davidson_restart_size"], max_size - 1))
+    # the target is the eigenvalue of the right eigenvector
+    omega_right = omega
+
+    def compute_sigma(L):
+        if t3_excitations or l3_excitations:
+            return LH(dL, L, T, H, options["RHF_symmetry"], system, t3_excitations, l3_excitations)
+        else:
+            return LH(dL, L, T, H, options["RHF_symmetry"], system)
+
+    # resume from the Ritz vector in the checkpoint file of an interrupted calculation
+    start_iteration = 0
+    checkpoint = get_checkpoint(checkpoint_label, options)
+    if checkpoint is not None and options["restart"]:
+        restart = checkpoint.read(L, None, l3_excitations)
+        if restart is not None:
+            start_iteration = restart["niter"] + 1
+            omega = restart["energy"]
+
+    # Allocate the B (correction/subspace), sigma (LH), and G (interaction) matrices
+    sigma = VectorStore(max_size, L.ndim, options["davidson_out_of_core"], options["scratch_directory"], prefix="lefteomcc-sigma")
+    B = VectorStore(max_size, L.ndim, options["davidson_out_of_core"], options["scratch_directory"], prefix="lefteomcc-bmatrix")
+    G = np.zeros((max_size, max_size))
+
+    # Initial values (the rows of B are kept orthonormal)
+    B[0, :] = L.flatten() / np.linalg.norm(L.flatten())
+    L.unflatten(B[0, :])
+    dL.unflatten(dL.flatten() * 0.0)
+    sigma[0, :] = compute_sigma(L)
+
+    is_converged = False
+    curr_size = 1
+    for niter in range(start_iteration, options["maximum_iterations"]):
+        t1 = time.perf_counter()
+        # store old energy
+        omega_old = omega
+
+        # solve projection subspace eigenproblem: G_{IJ} = sum_K B_{KI} S_{KJ}
+        G[curr_size - 1, :curr_size] = np.einsum("k,pk->p", B[curr_size - 1, :], sigma[:curr_size, :])
+        G[:curr_size, curr_size - 1] = np.einsum("k,pk->p", sigma[curr_size - 1, :], B[:curr_size, :])
+        e, alpha_full = np.linalg.eig(G[:curr_size, :curr_size])
+
+        # select the Ritz pair closest to the right eigenvalue
+        iselect = np.argmin(abs(e - omega_right))
+        alpha = np.real(alpha_full[:, iselect])
+
+        # Get the eigenpair of interest
+        omega = np.real(e[iselect])
+        l = np.dot(B[:curr_size, :].T, alpha)
+
+        # calculate residual vector: r_i = S_{iK}*alpha_{K} - omega * l_i
+        L.unflatten(np.dot(sigma[:curr_size, :].T, alpha) - omega * l)
+        residual = np.linalg.norm(L.flatten())
+        delta_energy = omega - omega_old
+
+        if residual < options["amp_convergence"] and abs(delta_energy) < options["energy_convergence"]:
+            is_converged = True
+            # print the iteration of convergence
+            elapsed_time = time.perf_counter() - t1
+            print_eomcc_iteration(niter, omega, residual, delta_energy, elapsed_time)
+            if checkpoint is not None:
+                L.unflatten(l)
+                checkpoint.write(niter, L, omega, excitations=l3_excitations, is_converged=True)
+            break
+
+        # update residual vector using diagonal preconditioning
+        B.prefetch(range(curr_size))
+        if t3_excitations or l3_excitations:
+            L = update_l(L, omega, H, options["RHF_symmetry"], system, l3_excitations)
+        else:
+            L = update_l(L, omega, H, options["RHF_symmetry"], system)
+        # orthogonalize residual against subspace vectors using block Gram-Schmidt with reorthogonalization
+        q = L.flatten() / np.linalg.norm(L.flatten())
+        for _ in range(2):
+            q -= np.dot(np.dot(B[:curr_size, :], q), B[:curr_size, :])
+        q /= np.linalg.norm(q)
+        L.unflatten(q)
+
+        # Thick restart - keep the Ritz vectors closest to the selected root
+        if curr_size == max_size:
+            print("       **Deflating subspace**")
+            ikeep = np.argsort([abs(x - e[iselect]) for x in e], kind="stable")[:nrest]
+            ikeep = np.concatenate(([iselect], ikeep[ikeep != iselect]))[:nrest]
+            A, _ = np.linalg.qr(np.real(alpha_full[:, ikeep]))
+            B[:nrest, :] = np.dot(A.T, B[:curr_size, :])
+            sigma[:nrest, :] = np.dot(A.T, sigma[:curr_size, :])
+            G[:nrest, :nrest] = np.dot(A.T, np.dot(G[:curr_size, :curr_size], A))
+            curr_size = nrest
+
+        # expand the subspace
+        B[curr_size, :] = q
+        sigma[curr_size, :] = compute_sigma(L)
+
+        # Write the current Ritz vector to the checkpoint file
+        if checkpoint is not None and checkpoint.is_due(niter):
+            L.unflatten(l)
+            checkpoint.write(niter, L, omega, excitations=l3_excitations)
+
+        elapsed_time = time.perf_counter() - t1
+        print_eomcc_iteration(niter, omega, residual, delta_energy, elapsed_time)
+
+        curr_size += 1
+    else:
+        print("Left EOMCC calculation did not converge.")
+
+    # store the actual root you've solved for and biorthonormalize it to R
+    L.unflatten(l)
+    LR = LR_function(L, l3_excitations)
+    L.unflatten(1.0 / LR * L.flatten())
+    # remove the scratch files of out-of-core vectors
+    B.cleanup()
+    sigma.cleanup()
+    # print the time taken for the root
+    minutes, seconds = divmod(time.perf_counter() - t_root_start, 60)
+    print(f"   Completed in {minutes:.1f}m {seconds:.1f}s")
+    print(f"   Total CPU time is {time.process_time() - t_cpu_root_start} seconds")
+    return L, omega, LR, is_converged
+
+def antisymmetrize_operator(X):
+    """
+    Projects the amplitude blocks of the cluster operator X onto their antisymmetric parts,
+    i.e., antisymmetrizes over the particle and hole indices of the same spin. This removes
+    the round-off noise in the redundant elements, which is amplified when small residuals
+    are normalized.
+    """
+    from itertools import permutations
+    for name in X.get_block_names():
+        n = len(name)
+        block = getattr(X, name)
+        # skip blocks stored as lists of unique excitations (e.g., P-space triples)
+        if block.ndim != 2 * n:
+            continue
+        for offset in (0, n):
+            # indices of the same spin are contiguous within the particles and holes
+            start = 0
+            while start < n:
+                end = start
+                while end < n and name[end] == name[start]:
+                    end += 1
+                if end - start > 1:
+                    axes = list(range(offset + start, offset + end))
+                    perms = list(permutations(range(end - start)))
+                    result = np.zeros_like(block)
+                    for perm in perms:
+                        sign = (-1) ** sum(perm[i] > perm[j] for i in range(len(perm)) for j in range(i + 1, len(perm)))
+                        order = list(range(block.ndim))
+                        for axis, k in zip(axes, perm):
+                            order[axis] = axes[k]
+                        result += sign * np.transpose(block, order)
+                    block = result / len(perms)
+                start = end
+        setattr(X, name, block)
+    return X
+
+def get_lr_metric(R):
+    """
+    Returns the diagonal weights d of the biorthonormality product get_LR(R, L) = sum_k d_k R_k L_k
+    in terms of the flattened operators. These account for the redundant elements of the
+    antisymmetric amplitude blocks, which are stored in full. Since every element of a block
+    is given the same weight, operators with active-space or P-space blocks, whose elements
+    are not all weighted equally, are not supported.
+    """
+    from copy import deepcopy
+    from ccpy.energy.cc_energy import get_LR
+    if getattr(R, "has_active_blocks", False) or any(
+        not isinstance(getattr(R, name), np.ndarray) or getattr(R, name).ndim != 2 * len(name)
+        for name in R.get_block_names()
+    ):
+        raise NotImplementedError("The biorthogonality metric is only implemented for operators with full amplitude blocks")
+    probe = deepcopy(R)
+    ones = deepcopy(R)
+    ones.unflatten(np.ones(R.ndim))
+    d = np.zeros(R.ndim)
+    prev = 0
+    for name in probe.get_block_names():
+        size = getattr(probe, name).size
+        x = np.zeros(R.ndim)
+        x[prev : prev + size] = 1.0
+        probe.unflatten(x)
+        d[prev : prev + size] = get_LR(probe, ones) / size
+        prev += size
+    return d
+
+def eomcc_biorthogonal_davidson(HR, update_r, LH, update_l, R, L, dR, dL, omega, T, H, system, options):
+    """
+    Solve for the right and left eigenvectors R and L of HBar belonging to the same root using
+    the biorthogonal (Hirao-Nakatsuji) non-Hermitian Davidson algorithm, in which right and left
+    subspaces V and W are grown together. In each iteration, the projected generalized
+    eigenproblem M y = omega S y, with M = <W|HBar|V> and S = <W|V>, is solved once for both the
+    right (y) and left (x) Ritz vectors, and V and W are expanded by the preconditioned right and
+    left residuals, respectively. Each iteration thus costs one HR and one LH product. On entry,
+    R holds the initial guess and L is initialized to it. On exit, R has unit norm and L is
+    biorthonormalized to R, so that get_LR(R, L) = 1. Returns R, L, omega, the overlap <L|R>
+    prior to normalization, and the convergence flag.
+    """
+    from scipy.linalg import eig
+    from ccpy.utilities.vector_store import VectorStore
+    t_root_start = time.perf_counter()
+    t_cpu_root_start = time.process_time()
+
+    print_eomcc_iteration_header()
+
+    # Maximum subspace size and number of Ritz pairs kept on restart
+    max_size = options["davidson_max_subspace_size"]
+    nrest = max(1, min(options["davidson_restart_size"], max_size - 1))
+    selection_method = options["davidson_selection_method"]
+    # weights of the <L|R> product used for the projected matrices
+    d = get_lr_metric(R)
+
+    def compute_sigma(X, dX, sigma_fun):
+        dX.unflatten(dX.flatten() * 0.0)
+        return sigma_fun(dX, X, T, H, options["RHF_symmetry"], system)
+
+    def orthogonalize(q, B, curr_size):
+        # block Gram-Schmidt with reorthogonalization (the rows of B are orthonormal)
+        q = q / np.linalg.norm(q)
+        for _ in range(2):
+            q -= np.dot(np.dot(B[:curr_size, :], q), B[:curr_size, :])
+        return q / np.linalg.norm(q)
+
+    # Allocate the right (V) and left (W) subspaces, their sigma vectors, and the projected matrices
+    V = VectorStore(max_size, R.ndim, options["davidson_out_of_core"], options["scratch_directory"], prefix="eomcc-right-bmatrix")
+    W = VectorStore(max_size, R.ndim, options["davidson_out_of_core"], options["scratch_directory"], prefix="eomcc-left-bmatrix")
+    sigma_r = VectorStore(max_size, R.ndim, options["davidson_out_of_core"], options["scratch_directory"], prefix="eomcc-right-sigma")
+    sigma_l = VectorStore(max_size, R.ndim, options["davidson_out_of_core"], options["scratch_directory"], prefix="eomcc-left-sigma")
+    M = np.zeros((max_size, max_size))
+    S = np.zeros((max_size, max_size))
+
+    # Initial values
+    V[0, :] = R.flatten() / np.linalg.norm(R.flatten())
+    W[0, :] = V[0, :]
+    R.unflatten(V[0, :])
+    L.unflatten(W[0, :])
+    sigma_r[0, :] = compute_sigma(R, dR, HR)
+    sigma_l[0, :] = compute_sigma(L, dL, LH)
+
+    is_converged = False
+    curr_size = 1
+    for niter in range(options["maximum_iterations"]):
+        t1 = time.perf_counter()
+        # store old energy
+        omega_old = omega
+
+        # update the last row and column of the projected matrices M_{IJ} = <W_I|HBar|V_J> and S_{IJ} = <W_I|V_J>
+        n = curr_size - 1
+        M[n, :curr_size] = np.dot(sigma_r[:curr_size, :], d * W[n, :])
+        M[:curr_size, n] = np.dot(W[:curr_size, :], d * sigma_r[n, :])
+        S[n, :curr_size] = np.dot(V[:curr_size, :], d * W[n, :])
+        S[:curr_size, n] = np.dot(W[:curr_size, :], d * V[n, :])
+        e, x_full, y_full = eig(M[:curr_size, :curr_size], S[:curr_size, :curr_size], left=True, right=True)
+
+        # select root
+        if selection_method == "overlap":
+            iselect = np.argmax(abs(y_full[0, :]))
+        elif selection_method == "energy":
+            iselect = np.argmin(abs(e - omega))
+        y = np.real(y_full[:, iselect])
+        x = np.real(x_full[:, iselect])
+
+        # Get the eigenpair of interest
+        omega = np.real(e[iselect])
+        r = np.dot(V[:curr_size, :].T, y)
+        l = np.dot(W[:curr_size, :].T, x)
+        r_norm = np.linalg.norm(r)
+        l_norm = np.linalg.norm(l)
+
+        # calculate the right and left residual vectors
+        R.unflatten((np.dot(sigma_r[:curr_size, :].T, y) - omega * r) / r_norm)
+        L.unflatten((np.dot(sigma_l[:curr_size, :].T, x) - omega * l) / l_norm)
+        residual = max(np.linalg.norm(R.flatten()), np.linalg.norm(L.flatten()))
+        delta_energy = omega - omega_old
+
+        if residual < options["amp_convergence"] and abs(delta_energy) < options["energy_convergence"]:
+            is_converged = True
+            # print the iteration of convergence
+            elapsed_time = time.perf_counter() - t1
+            print_eomcc_iteration(niter, omega, residual, delta_energy, elapsed_time)
+            break
+
+        # update residual vectors using diagonal preconditioning
+        R = antisymmetrize_operator(update_r(R, omega, H, options["RHF_symmetry"], system))
+        L = antisymmetrize_operator(update_l(L, omega, H, options["RHF_symmetry"], system))
+        q_r = R.flatten().copy()
+        q_l = L.flatten().copy()
+
+        # Thick restart - keep the Ritz pairs closest to the selected root
+        if curr_size == max_size:
+            print("       **Deflating subspace**")
+            ikeep = np.argsort([abs(z - e[iselect]) for z in e], kind="stable")[:nrest]
+            ikeep = np.concatenate(([iselect], ikeep[ikeep != iselect]))[:nrest]
+            A_r, _ = np.linalg.qr(np.real(y_full[:, ikeep]))
+            A_l, _ = np.linalg.qr(np.real(x_full[:, ikeep]))
+            V[:nrest, :] = np.dot(A_r.T, V[:curr_size, :])
+            W[:nrest, :] = np.dot(A_l.T, W[:curr_size, :])
+            sigma_r[:nrest, :] = np.dot(A_r.T, sigma_r[:curr_size, :])
+            sigma_l[:nrest, :] = np.dot(A_l.T, sigma_l[:curr_size, :])
+            M[:nrest, :nrest] = np.dot(A_l.T, np.dot(M[:curr_size, :curr_size], A_r))
+            S[:nrest, :nrest] = np.dot(A_l.T, np.dot(S[:curr_size, :curr_size], A_r))
+            curr_size = nrest
+
+        # expand the subspaces
+        V[curr_size, :] = orthogonalize(q_r, V, curr_size)
+        W[curr_size, :] = orthogonalize(q_l, W, curr_size)
+        R.unflatten(V[curr_size, :])
+        L.unflatten(W[curr_size, :])
+        sigma_r[curr_size, :] = compute_sigma(R, dR, HR)
+        sigma_l[curr_size, :] = compute_sigma(L, dL, LH)
+
+        elapsed_time = time.perf_counter() - t1
+        print_eomcc_iteration(niter, omega, residual, delta_energy, elapsed_time)
+
+        curr_size += 1
+    else:
+        print("Biorthogonal EOMCC calculation did not converge.")
+
+    # store the roots you've solved for and biorthonormalize L to R
+    R.unflatten(r / r_norm)
+    L.unflatten(l)
+    LR = np.dot(d * R.flatten(), L.flatten())
+    L.unflatten(1.0 / LR * L.flatten())
+    # remove the scratch files of out-of-core vectors
+    for store in (V, W, sigma_r, sigma_l):
+        store.cleanup()
+    # print the time taken for the root
+    minutes, seconds = divmod(time.perf_counter() - t_root_start, 60)
+    print(f"   Completed in {minutes:.1f}m {seconds:.1f}s")
+    print(f"   Total CPU time is {time.process_time() - t_cpu_root_start} seconds")
+    return R, L, omega, LR, is_converged
+
+# HBar, T, and the System shared with the worker processes of eomcc_davidson_concurrent
+_concurrent_shared = {}
+
+def get_blas_threads_per_worker(num_processes):
+    """Returns the number of BLAS threads given to each of num_processes worker processes,
+    so that together they use no more than the cores available to this process."""
+    if hasattr(os, "sched_getaffinity"):
+        num_cores = len(os.sched_getaffinity(0))
+    else:
+        num_cores = os.cpu_count() or 1
+    return max(1, num_cores // num_processes)
+
+def _limit_blas_threads(num_threads):
+    """Pool initializer that limits the BLAS thread pool of a worker process to num_threads,
+    using threadpoolctl when it is installed."""
+    try:
+        from threadpoolctl import threadpool_limits
+    except ImportError:
+        return
+    # keep a reference so that the limit holds for the lifetime of the worker
+    _concurrent_shared["blas_limits"] = threadpool_limits(limits=num_threads, user_api="blas")
+
+def _eomcc_davidson_worker(args):
+    HR, update_r, R, dR, omega, options = args
+    log = io.StringIO()
+    with contextlib.redirect_stdout(log):
+        R, omega, is_converged = eomcc_davidson(HR, update_r, R.flatten() / np.linalg.norm(R.flatten()), R, dR, omega,
+                                                _concurrent_shared["T"], _concurrent_shared["H"], _concurrent_shared["system"], options,
+                                                single_precision_operators=_concurrent_shared["single_precision_operators"])
+    return R, omega, is_converged, log.getvalue()
+
+def eomcc_davidson_concurrent(HR, update_r, R, dR, omega, T, H, system, options, num_workers, single_precision_operators=None):
+    """
+    Solves for several roots at once by running eomcc_davidson for each root in a pool of
+    num_workers processes. Here, R and omega are lists of the initial guesses for the roots.
+    The worker processes are forked after HBar and T are stored in module-level state, so
+    that they share the parent's copy of HBar and T (copy-on-write) rather than receiving
+    their own; the same holds for the single-precision copies used by the mixed-precision
+    solver, which should therefore be made before and passed as single_precision_operators.
+    Only the guess and converged vectors are sent between processes. Each worker limits its
+    BLAS thread pool to get_blas_threads_per_worker(num_processes) threads (with threadpoolctl,
+    if installed), so that the workers do not oversubscribe the cores. The output
+    of each root is captured and returned, so that it can be printed in order.
+    Returns a list of (R, omega, is_converged, log) tuples, one per root.
+    """
+    if options["mixed_precision"] and single_precision_operators is None:
+        single_precision_operators = get_single_precision_operators(H, T)
+    _concurrent_shared.update(T=T, H=H, system=system, single_precision_operators=single_precision_operators)
+    try:
+        num_processes = min(num_workers, len(R))
+        with multiprocessing.get_context("fork").Pool(num_processes,
+                                                      initializer=_limit_blas_threads,
+                                                      initargs=(get_blas_threads_per_worker(num_processes),)) as pool:
+            results = pool.map(_eomcc_davidson_worker,
+                               [(HR, update_r, R[j], dR, omega[j], options) for j in range(len(R))],
+                               chunksize=1)
+    finally:
+        _concurrent_shared.clear()
+    return results
+
+def eomcc_block_davidson(HR, update_r, B0, R, dR, omega, T, H, system, state_index, options, t3_excitations=None, r3_excitations=None, block_hr=False):
     """
     Diagonalize the similarity-transformed Hamiltonian HBar using the
     non-Hermitian block Davidson algorithm.
     Here, it is assumed that you have a list of R operators, [R1, R2, ..., Rn]
     and a single residual container dR that is re-used for each root.
+    The subspace holds at most options["davidson_max_subspace_size"] vectors per root.
+    When it is full, it is collapsed onto the current and previous Ritz vectors of all roots,
+    whose sigma vectors are obtained by linear combination rather than by recomputing H*R.
+    Converged roots are locked: they are kept in the subspace but no longer generate
+    correction vectors. If block_hr is True, HR accepts OperatorBlock arguments and the
+    sigma vectors of all new subspace vectors are computed together in one pass over HBar.
     """
+    from ccpy.models.operators import OperatorBlock
+    from ccpy.utilities.vector_store import VectorStore
     print_eomcc_iteration_header()
 
     # Number of roots
     nroot = len(state_index)
     ndim = R[state_index[0]].ndim
-    max_size = nroot * options["maximum_iterations"]
+    # the collapsed subspace (up to 2 * nroot vectors) must leave room for one correction vector per root
+    max_size = nroot * max(options["davidson_max_subspace_size"], 3)
     selection_method = options["davidson_selection_method"]
 
+    def compute_sigma(V, scratch):
+        # sigma vectors of the rows of V; the scratch operator is overwritten unless block_hr is True
+        if block_hr and not (t3_excitations or r3_excitations):
+            R_block = OperatorBlock(scratch, V.shape[0])
+            R_block.unflatten(V)
+            return HR(OperatorBlock(scratch, V.shape[0]), R_block, T, H, options["RHF_symmetry"], system)
+        S = np.zeros_like(V)
+        for p in range(V.shape[0]):
+            scratch.unflatten(V[p, :])
+            dR.unflatten(dR.flatten() * 0.0)
+            if t3_excitations or r3_excitations:
+                S[p, :] = HR(dR, scratch, T, H, options["RHF_symmetry"], system, t3_excitations, r3_excitations)
+            else:
+                S[p, :] = HR(dR, scratch, T, H, options["RHF_symmetry"], system)
+        return S
+
     # Allocate the B (correction/subspace), sigma (HR), and G (interaction) matrices
-    sigma = np.zeros((ndim, max_size))
-    B = np.zeros((ndim, max_size))
+    sigma = VectorStore(max_size, ndim, options["davidson_out_of_core"], options["scratch_directory"], prefix="eomcc-sigma")
+    B = VectorStore(max_size, ndim, options["davidson_out_of_core"], options["scratch_directory"], prefix="eomcc-bmatrix")
     G = np.zeros((max_size, max_size))
+    # expansion coefficients of the Ritz vector of each root in the current subspace
+    alpha = np.zeros((max_size, nroot))
+    alpha[:nroot, :nroot] = np.eye(nroot)
 
-    # Initial values
-    num_add = 0
-    curr_size = 0
+    # Initial values (the rows of B are kept orthonormal)
+    B[:nroot, :] = B0.T
+    sigma[:nroot, :] = compute_sigma(B[:nroot, :], R[state_index[0]])
     for j, istate in enumerate(state_index):
-        B[:, j] = B0[:, j]
-        R[istate].unflatten(B[:, j])
-        dR.unflatten(dR.flatten() * 0.0)
-        if t3_excitations and r3_excitations:
-            sigma[:, j] = HR(dR, R[istate], T, H, options["RHF_symmetry"], system, t3_excitations, r3_excitations)
-        else:
-            sigma[:, j] = HR(dR, R[istate], T, H, options["RHF_symmetry"], system)
-        num_add += 1
-        curr_size += 1
+        R[istate].unflatten(B[j, :])
+    curr_size = nroot
+    num_prev = 0
 
     is_converged = [False] * nroot
     residual = np.zeros(nroot)
     delta_energy = np.zeros(nroot)
     for niter in range(options["maximum_iterations"]):
         t1 = time.perf_counter()
-        # store old energy
+        # store old energy and Ritz vectors
         omega_old = omega.copy()
+        alpha_old = alpha.copy()
 
-        # solve projection subspace eigenproblem: G_{IJ} = sum_K B_{KI} S_{KJ}
-        for p in range(curr_size):
-            for j in range(1, num_add + 1):
-                G[curr_size - j, p] = np.dot(B[:, curr_size - j].T, sigma[:, p])
-                G[p, curr_size - j] = np.dot(sigma[:, curr_size - j].T, B[:, p])
+        # solve projection subspace eigenproblem: G_{IJ} = sum_K B_{IK} S_{JK}, where only the
+        # rows and columns belonging to the newly added vectors are computed
+        G[num_prev:curr_size, :curr_size] = np.dot(B[num_prev:curr_size, :], sigma[:curr_size, :].T)
+        G[:curr_size, num_prev:curr_size] = np.dot(B[:curr_size, :], sigma[num_prev:curr_size, :].T)
         e, alpha_full = np.linalg.eig(G[:curr_size, :curr_size])
 
-        num_add = 0
-        nmax_add = sum([not x for x in is_converged])
-        alpha = np.zeros((curr_size, nroot))
-        for j, istate in enumerate(state_index):
-            # Cycle if root is already converged
-            if is_converged[j]: continue
-
-            # select root
-            if selection_method == "overlap":  # Option 1: based on overlap
-                idx = np.argsort(abs(alpha_full[j, :]))
-                iselect = idx[-1]
+        # select roots, never assigning the same eigenvector to two of them (this would remove
+        # one of them from the subspace upon collapse); locked roots keep their Ritz vectors but
+        # reserve the eigenvector closest to them, so that it cannot be taken by an active root
+        active = [j for j in range(nroot) if not is_converged[j]]
+        locked = [j for j in range(nroot) if is_converged[j]]
+        available = np.ones(curr_size, dtype=bool)
+        for j in locked + active:
+            if selection_method == "overlap" or is_converged[j]:  # Option 1: based on overlap with the previous Ritz vector
+                overlap = abs(np.dot(alpha_old[:curr_size, j], alpha_full))
+                iselect = np.argmax(np.where(available, overlap, -1.0))
             elif selection_method == "energy": # Option 2: based on energy
                 idx = np.argsort(e)
                 iselect = idx[j]
-
-            # Get the expansion coefficients for the j-th root
-            alpha[:, j] = np.real(alpha_full[:, iselect])
-
-            # Get the eigenpair of interest
-            omega[istate] = np.real(e[iselect])
-            r = np.dot(B[:, :curr_size], alpha[:, j])
-
-            # calculate residual vector: r_i = S_{iK}*alpha_{K} - omega * r_i
-            R[istate].unflatten(np.dot(sigma[:, :curr_size], alpha[:, j]) - omega[istate] * r)
-            residual[j] = np.linalg.norm(R[istate].flatten())
+            available[iselect] = False
+            if is_converged[j]: continue
+            # Get the expansion coefficients and the eigenvalue for the j-th root. Within a set
+            # of degenerate eigenvalues, eig returns an arbitrary basis (possibly a complex conjugate
+            # pair), so the Ritz vector is taken as the projection of the previous one onto the real
+            # degenerate eigenspace, spanned by the real and imaginary parts of the eigenvectors.
+            degenerate = np.flatnonzero(abs(e - e[iselect]) < 1.0e-08)
+            if selection_method == "overlap" and len(degenerate) > 1:
+                U = np.hstack((np.real(alpha_full[:, degenerate]), np.imag(alpha_full[:, degenerate])))
+                coeff, _, _, _ = np.linalg.lstsq(U, alpha_old[:curr_size, j], rcond=None)
+                x = np.dot(U, coeff)
+                x /= np.linalg.norm(x)
+            else:
+                x = np.real(alpha_full[:, iselect])
+            alpha[:, j] = 0.0
+            alpha[:curr_size, j] = x
+            omega[state_index[j]] = np.real(e[iselect])
+
+        # Ritz vectors and residuals of the active roots: r_i = S_{iK}*alpha_{K} - omega * r_i
+        B.prefetch(range(curr_size))
+        omega_active = np.array([omega[state_index[j]] for j in active])
+        ritz = np.dot(alpha[:curr_size, active].T, B[:curr_size, :])
+        residual_vectors = np.dot(alpha[:curr_size, active].T, sigma[:curr_size, :]) - omega_active[:, np.newaxis] * ritz
+
+        correction = []
+        for k, j in enumerate(active):
+            istate = state_index[j]
+            residual[j] = np.linalg.norm(residual_vectors[k, :])
             delta_energy[j] = omega[istate] - omega_old[istate]
-
-            # Check convergence
+            # Check convergence and lock the root
             if residual[j] < options["amp_convergence"] and abs(delta_energy[j]) < options["energy_convergence"]:
                 is_converged[j] = True
             else:
-                # update the residual vector
-                if t3_excitations and r3_excitations:
+                # update the residual vector using diagonal preconditioning
+                R[istate].unflatten(residual_vectors[k, :])
+                if t3_excitations or r3_excitations:
                     R[istate] = update_r(R[istate], omega[istate], H, options["RHF_symmetry"], system, r3_excitations)
                 else:
                     R[istate] = update_r(R[istate], omega[istate], H, options["RHF_symmetry"], system)
                 q = R[istate].flatten()
-                for p in range(curr_size + num_add):
-                    b = B[:, p] / np.linalg.norm(B[:, p])
-                    q -= np.dot(b.T, q) * b
-                q /= np.linalg.norm(q)
-                R[istate].unflatten(q)
-                B[:, curr_size + num_add] = q
-                if t3_excitations and r3_excitations:
-                    sigma[:, curr_size + num_add] = HR(dR, R[istate], T, H, options["RHF_symmetry"], system, t3_excitations, r3_excitations)
-                else:
-                    sigma[:, curr_size + num_add] = HR(dR, R[istate], T, H, options["RHF_symmetry"], system)
-                num_add += 1
-
+                correction.append(q / np.linalg.norm(q))
             # Store the root you've solved for
-            R[istate].unflatten(r)
+            R[istate].unflatten(ritz[k, :])
+
+        # print the iteration
+        elapsed_time = time.perf_counter() - t1
+        print_block_eomcc_iteration(niter + 1, curr_size, omega, residual, delta_energy, elapsed_time, state_index)
 
         # Check for all roots converged and break
         if all(is_converged):
             print("   All roots converged")
             break
 
-        # print the iteration
-        elapsed_time = time.perf_counter() - t1
-        print_block_eomcc_iteration(niter + 1, curr_size, omega, residual, delta_energy, elapsed_time, state_index)
+        # orthogonalize the correction vectors against the subspace using block Gram-Schmidt
+        # with reorthogonalization, then against each other, discarding linearly dependent ones
+        Q = np.asarray(correction)
+        for _ in range(2):
+            Q -= np.dot(np.dot(Q, B[:curr_size, :].T), B[:curr_size, :])
+        Q, upper = np.linalg.qr(Q.T)
+        Q = Q[:, abs(np.diag(upper)) > 1.0e-08].T
+        num_add = Q.shape[0]
+
+        # Collapse the subspace onto the current Ritz vectors of all roots (locked ones included)
+        # and those of the previous iteration, which carry the most recent search directions.
+        # Since the rows of B are orthonormal, the collapsed B, sigma, and G follow from B, sigma, and G.
+        if curr_size + num_add > max_size:
+            print("      **Deflating subspace**")
+            A, _ = np.linalg.qr(alpha[:curr_size, :])
+            P = alpha_old[:curr_size, :]
+            for _ in range(2):
+                P = P - np.dot(A, np.dot(A.T, P))
+            P, upper = np.linalg.qr(P)
+            A = np.hstack((A, P[:, abs(np.diag(upper)) > 1.0e-08]))
+            nkeep = A.shape[1]
+            B[:nkeep, :] = np.dot(A.T, B[:curr_size, :])
+            sigma[:nkeep, :] = np.dot(A.T, sigma[:curr_size, :])
+            G[:nkeep, :nkeep] = np.dot(A.T, np.dot(G[:curr_size, :curr_size], A))
+            alpha[:nkeep, :] = np.dot(A.T, alpha[:curr_size, :])
+            alpha[nkeep:, :] = 0.0
+            curr_size = nkeep
+
+        # expand the subspace, using the operator of the first active root as scratch space
+        scratch = R[state_index[active[0]]]
+        num_prev = curr_size
+        B[curr_size : curr_size + num_add, :] = Q
+        sigma[curr_size : curr_size + num_add, :] = compute_sigma(Q, scratch)
+        scratch.unflatten(ritz[0, :])
         curr_size += num_add
 
+    # remove the scratch files of out-of-core vectors
+    B.cleanup()
+    sigma.cleanup()
     return R, omega, is_converged
 
-def eccc_jacobi(update_t, T, dT, H, X, T_ext, VT_ext, system, options):
+def eccc_jacobi(update_t, T, dT, H, X, T_ext, VT_ext, system, options, checkpoint_label=None):
 
     from ccpy.energy.cc_energy import get_cc_energy
-    from ccpy.drivers.diis import DIIS
+    from ccpy.drivers.accelerators import get_accelerator
+    from ccpy.drivers.restart import get_checkpoint
 
-    # check whether DIIS is being used
-    do_diis = True
-    if options["diis_size"] == -1:
-        do_diis = False
-
-    # instantiate the DIIS accelerator object
-    if do_diis:
-        diis_engine = DIIS(T, options["diis_size"], options["diis_out_of_core"])
+    # instantiate the convergence accelerator selected by options["acceleration"] (None for plain Jacobi iterations)
+    diis_engine = get_accelerator(T, options)
+    do_diis = diis_engine is not None
 
     # Jacobi/DIIS iterations
     num_throw_away = 0
@@ -465,13 +846,22 @@ def eccc_jacobi(update_t, T, dT, H, X, T_ext, VT_ext, system, options):
     energy = 0.0
     energy_old = get_cc_energy(T, H)
     is_converged = False
+    start_iteration = 0
+
+    # resume from the checkpoint file of an interrupted calculation
+    checkpoint = get_checkpoint(checkpoint_label, options)
+    if checkpoint is not None and options["restart"]:
+        restart = checkpoint.read(T, diis_engine)
+        if restart is not None:
+            start_iteration = restart["niter"] + 1
+            energy_old = restart["energy"]
 
     print("   Energy of initial guess = {:>20.10f}".format(energy_old))
 
     t_start = time.perf_counter()
     t_cpu_start = time.process_time()
     print_cc_iteration_header()
-    for niter in range(options["maximum_iterations"]):
+    for niter in range(start_iteration, options["maximum_iterations"]):
         # get iteration start time
         t1 = time.perf_counter()
 
@@ -499,6 +889,8 @@ def eccc_jacobi(update_t, T, dT, H, X, T_ext, VT_ext, system, options):
             print("   ec-CC calculation successfully converged! ({:0.2f}m  {:0.2f}s)".format(minutes, seconds))
             print(f"   Total CPU time is {time.process_time() - t_cpu_start} seconds")
             is_converged = True
+            if checkpoint is not None:
+                checkpoint.write(niter, T, energy, diis_engine, is_converged=True)
             break
 
         # Save T and dT vectors to disk for DIIS
@@ -508,7 +900,13 @@ def eccc_jacobi(update_t, T, dT, H, X, T_ext, VT_ext, system, options):
         # Do DIIS extrapolation
         if niter >= options["diis_size"] + num_throw_away and do_diis:
             ndiis_cycle += 1
-            T.unflatten(diis_engine.extrapolate())
+            x_xtrap = diis_engine.extrapolate()
+            if x_xtrap is not None:
+                T.unflatten(x_xtrap)
+
+        # Write T and the DIIS history to the checkpoint file
+        if checkpoint is not None and checkpoint.is_due(niter):
+            checkpoint.write(niter, T, energy, diis_engine)
 
         # Update old energy
         energy_old = energy
@@ -524,51 +922,98 @@ def eccc_jacobi(update_t, T, dT, H, X, T_ext, VT_ext, system, options):
 
     return T, energy, is_converged
 
-def cc_jacobi(update_t, T, dT, H, X, system, options, t3_excitations=None):
+def cast_operator(T, data_type):
+    """Casts all amplitudes of the operator T to data_type in place."""
+    T.unflatten(T.flatten().astype(data_type))
 
+def cc_jacobi(update_t, T, dT, H, X, system, options, t3_excitations=None, checkpoint_label=None):
+    """
+    Solve the CC amplitude equations using Jacobi iterations accelerated by DIIS.
+    If options["mixed_precision"] is True, the iterations start with single-precision
+    amplitudes, residuals, and integrals and are promoted to double precision once
+    the residuum falls below options["mixed_precision_threshold"]. Convergence is
+    only ever declared in double precision. The driver turns mixed precision off for the
+    methods in ccpy.cc.DOUBLE_PRECISION_MODULES, whose Fortran kernels take double-precision
+    T3 amplitudes or integrals.
+    If checkpoint_label is given and options["checkpoint_directory"] is set, T, the
+    accelerator history, and the P-space excitations are periodically written to a
+    checkpoint file, from which the iterations are resumed if options["restart"] is True.
+    """
     from ccpy.energy.cc_energy import get_cc_energy
-    from ccpy.drivers.diis import DIIS
+    from ccpy.drivers.accelerators import get_accelerator
+    from ccpy.drivers.restart import get_checkpoint
 
-    # check whether DIIS is being used
-    do_diis = True
-    if options["diis_size"] == -1:
-        do_diis = False
+    # instantiate the convergence accelerator selected by options["acceleration"] (None for plain Jacobi iterations)
+    diis_engine = get_accelerator(T, options)
+    do_diis = diis_engine is not None
 
-    # instantiate the DIIS accelerator object
-    if do_diis:
-        diis_engine = DIIS(T, options["diis_size"], options["diis_out_of_core"])
+    # single-precision copy of the Hamiltonian used during the early iterations
+    single_precision = options["mixed_precision"]
+    H_iter = H
+    if single_precision:
+        H_iter = H.astype(np.float32)
+        cast_operator(T, np.float32)
+        cast_operator(dT, np.float32)
 
     # Jacobi/DIIS iterations
     num_throw_away = 0
     ndiis_cycle = 0
     energy = 0.0
-    energy_old = get_cc_energy(T, H)
+    energy_old = get_cc_energy(T, H_iter)
     is_converged = False
+    start_iteration = 0
+
+    # resume from the checkpoint file of an interrupted calculation
+    checkpoint = get_checkpoint(checkpoint_label, options)
+    if checkpoint is not None and options["restart"]:
+        restart = checkpoint.read(T, diis_engine, t3_excitations)
+        if restart is not None:
+            start_iteration = restart["niter"] + 1
+            energy_old = restart["energy"]
+            if single_precision and not restart["single_precision"]:
+                single_precision = False
+                H_iter = H
+                cast_operator(T, np.float64)
+                cast_operator(dT, np.float64)
 
     print("   Energy of initial guess = {:>20.10f}".format(energy_old))
 
     t_start = time.perf_counter()
     t_cpu_start = time.process_time()
     print_cc_iteration_header()
-    for niter in range(options["maximum_iterations"]):
+    for niter in range(start_iteration, options["maximum_iterations"]):
         # get iteration start time
         t1 = time.perf_counter()
 
         # Update the T vector
         if t3_excitations: # CC(P) update
-            T, dT = update_t(T, dT, H, X, options["energy_shift"], options["RHF_symmetry"], system, t3_excitations)
+            T, dT = update_t(T, dT, H_iter, X, options["energy_shift"], options["RHF_symmetry"], system, t3_excitations)
         else: # regular update
-            T, dT = update_t(T, dT, H, X, options["energy_shift"], options["RHF_symmetry"], system)
+            T, dT = update_t(T, dT, H_iter, X, options["energy_shift"], options["RHF_symmetry"], system)
+        # the Fortran updates always return double-precision amplitudes
+        if single_precision:
+            cast_operator(T, np.float32)
+            cast_operator(dT, np.float32)
 
         # CC correlation energy
-        energy = get_cc_energy(T, H)
+        energy = float(get_cc_energy(T, H_iter))
 
         # change in energy
         delta_energy = energy - energy_old
 
         # check for exit condition
-        residuum = np.linalg.norm(dT.flatten())
-        if (
+        residuum = float(np.linalg.norm(dT.flatten()))
+        if single_precision and (
+            residuum < options["mixed_precision_threshold"]
+            or (residuum < options["amp_convergence"] and abs(delta_energy) < options["energy_convergence"])
+        ):
+            # promote to double precision; DIIS vectors are already stored in double precision
+            single_precision = False
+            H_iter = H
+            cast_operator(T, np.float64)
+            cast_operator(dT, np.float64)
+            print("   Switching to double precision")
+        elif (
             residuum < options["amp_convergence"]
             and abs(delta_energy) < options["energy_convergence"]
         ):
@@ -585,6 +1030,8 @@ def cc_jacobi(update_t, T, dT, H, X, system, options, t3_excitations=None):
             )
             print(f"   Total CPU time is {time.process_time() - t_cpu_start} seconds")
             is_converged = True
+            if checkpoint is not None:
+                checkpoint.write(niter, T, energy, diis_engine, t3_excitations, single_precision, is_converged=True)
             break
 
         # Save T and dT vectors to disk for DIIS
@@ -594,7 +1041,15 @@ def cc_jacobi(update_t, T, dT, H, X, system, options, t3_excitations=None):
         # Do DIIS extrapolation
         if niter >= options["diis_size"] + num_throw_away and do_diis:
             ndiis_cycle += 1
-            T.unflatten(diis_engine.extrapolate())
+            x_xtrap = diis_engine.extrapolate()
+            if x_xtrap is not None:
+                T.unflatten(x_xtrap)
+                if single_precision:
+                    cast_operator(T, np.float32)
+
+        # Write T and the DIIS history to the checkpoint file
+        if checkpoint is not None and checkpoint.is_due(niter):
+            checkpoint.write(niter, T, energy, diis_engine, t3_excitations, single_precision)
 
         # Update old energy
         energy_old = energy
@@ -603,6 +1058,8 @@ def cc_jacobi(update_t, T, dT, H, X, system, options, t3_excitations=None):
         print_cc_iteration(niter, residuum, delta_energy, energy, elapsed_time)
     else:
         print("CC calculation did not converge.")
+        if single_precision:
+            cast_operator(T, np.float64)
 
     # Remove the t.npy and dt.npy files if out-of-core DIIS was used
     if do_diis:
@@ -611,18 +1068,15 @@ def cc_jacobi(update_t, T, dT, H, X, system, options, t3_excitations=None):
     return T, energy, is_converged
 
 
-def left_cc_jacobi(update_l, L, LH, T, H, LR_function, omega, ground_state, system, options, t3_excitations=None, l3_excitations=None):
+def left_cc_jacobi(update_l, L, LH, T, H, LR_function, omega, ground_state, system, options, t3_excitations=None, l3_excitations=None, checkpoint_label=None):
 
     from ccpy.energy.cc_energy import get_lcc_energy
-    from ccpy.drivers.diis import DIIS
+    from ccpy.drivers.accelerators import get_accelerator
+    from ccpy.drivers.restart import get_checkpoint
 
-    do_diis = True
-    if options["diis_size"] == -1:
-        do_diis = False
-
-    # instantiate the DIIS accelerator object
-    if do_diis:
-        diis_engine = DIIS(L, options["diis_size"], options["diis_out_of_core"])
+    # instantiate the convergence accelerator selected by options["acceleration"] (None for plain Jacobi iterations)
+    diis_engine = get_accelerator(L, options)
+    do_diis = diis_engine is not None
 
     # Jacobi/DIIS iterations
     num_throw_away = 0 # keep this at 0 for now...
@@ -631,13 +1085,22 @@ def left_cc_jacobi(update_l, L, LH, T, H, LR_function, omega, ground_state, syst
     energy_old = get_lcc_energy(L, LH) + omega
     is_converged = False
     LR = 0.0
+    start_iteration = 0
+
+    # resume from the checkpoint file of an interrupted calculation
+    checkpoint = get_checkpoint(checkpoint_label, options)
+    if checkpoint is not None and options["restart"]:
+        restart = checkpoint.read(L, diis_engine, l3_excitations)
+        if restart is not None:
+            start_iteration = restart["niter"] + 1
+            energy_old = restart["energy"]
 
     print("   Energy of initial guess = {:>20.10f}".format(energy_old))
 
     t_start = time.perf_counter()
     t_cpu_start = time.process_time()
     print_eomcc_iteration_header()
-    for niter in range(options["maximum_iterations"]):
+    for niter in range(start_iteration, options["maximum_iterations"]):
         # get iteration start time
         t1 = time.perf_counter()
 
@@ -690,6 +1153,8 @@ def left_cc_jacobi(update_l, L, LH, T, H, LR_function, omega, ground_state, syst
             )
             print(f"   Total CPU time is {time.process_time() - t_cpu_start} seconds")
             is_converged = True
+            if checkpoint is not None:
+                checkpoint.write(niter, L, energy, diis_engine, l3_excitations, is_converged=True)
             break
 
         # Save T and dT vectors to disk for DIIS
@@ -700,7 +1165,9 @@ def left_cc_jacobi(update_l, L, LH, T, H, LR_function, omega, ground_state, syst
         #if (niter + 1) % options["diis_size"] == 0 and do_diis: # this criterion works better I've found...
         if niter >= options["diis_size"] + num_throw_away and do_diis:
             ndiis_cycle += 1
-            L.unflatten(diis_engine.extrapolate())
+            x_xtrap = diis_engine.extrapolate()
+            if x_xtrap is not None:
+                L.unflatten(x_xtrap)
 
         # Update old energy
         energy_old = energy
@@ -710,6 +1177,10 @@ def left_cc_jacobi(update_l, L, LH, T, H, LR_function, omega, ground_state, syst
             LR = LR_function(L, l3_excitations)
             L.unflatten(1.0 / LR * L.flatten())
 
+        # Write L and the DIIS history to the checkpoint file
+        if checkpoint is not None and checkpoint.is_due(niter):
+            checkpoint.write(niter, L, energy, diis_engine, l3_excitations)
+
         elapsed_time = time.perf_counter() - t1
         print_eomcc_iteration(niter, energy, residuum, delta_energy, elapsed_time)
     else:
@@ -100,6 +100,35 @@ def calc_hf_frozen_core_energy(e1int, e2int, system):
 
     return hf_energy
 
+def calc_hf_energy_cholesky(e1int, R_chol, system, frozen_only=False):
+    """Calculate the HF energy from the onebody MO integrals and the Cholesky vectors
+    R(x|pq) without forming the twobody integrals. If frozen_only=True, only the frozen
+    core orbitals are included (cf. calc_hf_frozen_core_energy)."""
+
+    if frozen_only:
+        if system.nfrozen == 0:
+            return 0.0
+        occ_a = slice(0, system.nfrozen)
+        occ_b = slice(0, system.nfrozen)
+    else:
+        occ_a = slice(0, system.noccupied_alpha + system.nfrozen)
+        occ_b = slice(0, system.noccupied_beta + system.nfrozen)
+
+    e1a = np.einsum("ii->", e1int[occ_a, occ_a])
+    e1b = np.einsum("ii->", e1int[occ_b, occ_b])
+    # Coulomb and exchange parts of sum_ij <ij|ij> and sum_ij <ij|ji>
+    J_a = np.einsum("xii->x", R_chol[:, occ_a, occ_a])
+    J_b = np.einsum("xii->x", R_chol[:, occ_b, occ_b])
+    K_a = np.einsum("xij,xij->", R_chol[:, occ_a, occ_a], R_chol[:, occ_a, occ_a])
+    K_b = np.einsum("xij,xij->", R_chol[:, occ_b, occ_b], R_chol[:, occ_b, occ_b])
+    e2a = 0.5 * (np.dot(J_a, J_a) - K_a)
+    e2b = np.dot(J_a, J_b)
+    e2c = 0.5 * (np.dot(J_b, J_b) - K_b)
+
+    hf_energy = e1a + e1b + e2a + e2b + e2c
+
+    return hf_energy
+
 def calc_khf_energy(e1int, e2int, system):
     # Note that any V must have a factor of 1/Nkpts!
     e1a = 0.0
@@ -3,3 +3,7 @@ __all__ = ["eomcc2", "eomccsd", "eomcc3", "eomccsdt", "eomccsdt1", "eomccsdt_p",
            "sfeomccsd", "sfeomcc23", "deaeom2", "deaeom3", "deaeom4", "dipeom3", "dipeom4"]
 
 MODULES = [module for module in __all__]
+
+# modules whose HR contracts over any leading index of the R and dR amplitudes, so that it
+# computes the sigma vectors of all trial vectors held in an OperatorBlock in one call
+BLOCK_HR_MODULES = ["eomccsd", "ipeom2", "eaeom2"]
@@ -4,10 +4,9 @@ from ccpy.models.integrals import Integral
 def build_hbar_cc2(T, H0, RHF_symmetry, system, *args):
     """Calculate the one- and two-body components of the CC2 similarity-transformed
      Hamiltonian."""
-    from copy import deepcopy
 
-    # Copy the Bare Hamiltonian object for T1/T2-similarity transformed HBar
-    H = deepcopy(H0)
+    # Copy-on-write copy of the bare Hamiltonian for T1/T2-similarity transformed HBar
+    H = H0.copy_on_write()
 
     H.a.ov += (
             np.einsum("imae,em->ia", H0.aa.oovv, T.a, optimize=True)
@@ -213,7 +212,6 @@ def build_hbar_cc2(T, H0, RHF_symmetry, system, *args):
         H.bb.oooo = H.aa.oooo.copy()
         H.bb.ooov = H.aa.ooov.copy()
         H.bb.vooo = H.aa.vooo.copy()
-        H.bb.oovv = H.aa.oovv.copy()
         H.bb.voov = H.aa.voov.copy()
         H.bb.vovv = H.aa.vovv.copy()
         H.bb.vvov = H.aa.vvov.copy()
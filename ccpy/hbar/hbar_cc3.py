@@ -6,10 +6,9 @@ def build_hbar_cc3(T, H0, RHF_symmetry, system, *args):
     """Calculate the one- and two-body components of the CC3 similarity-transformed
      Hamiltonian (H_N e^(T1+T2+T3))_C, where T3 = <ijkabc|(V_N*T2)_C|0>/-D_MP, where
      D_MP = e_a+e_b+e_c-e_i-e_j-e_k."""
-    from copy import deepcopy
 
-    # Copy the Bare Hamiltonian object for T1/T2-similarity transformed HBar
-    H = deepcopy(H0)
+    # Copy-on-write copy of the bare Hamiltonian for T1/T2-similarity transformed HBar
+    H = H0.copy_on_write()
 
     H.a.ov += (
             np.einsum("imae,em->ia", H0.aa.oovv, T.a, optimize=True)
@@ -393,7 +392,6 @@ def build_hbar_cc3(T, H0, RHF_symmetry, system, *args):
         H.bb.oooo = H.aa.oooo.copy()
         H.bb.ooov = H.aa.ooov.copy()
         H.bb.vooo = H.aa.vooo.copy()
-        H.bb.oovv = H.aa.oovv.copy()
         H.bb.voov = H.aa.voov.copy()
         H.bb.vovv = H.aa.vovv.copy()
         H.bb.vvov = H.aa.vvov.copy()
@@ -153,10 +153,9 @@ def get_ccs_intermediates_slow(T, H0):
     Calculate the CCS-like similarity-transformed HBar intermediates (H_N e^T1)_C.
     Copied as-is from original CCpy.
     """
-    from copy import deepcopy
 
-    # Copy the Bare Hamiltonian object for T1-transforemd HBar
-    H = deepcopy(H0)
+    # Copy-on-write copy of the bare Hamiltonian for T1-transforemd HBar
+    H = H0.copy_on_write()
 
     # 1-body components
     H.a.ov += (
@@ -1,14 +1,14 @@
 import time
 import numpy as np
+from ccpy.models.integrals import CholeskyVVVV, contract_vvvv_t1
 
 def build_hbar_ccsd(T, H0, RHF_symmetry, *args):
     """Calculate the CCSD similarity-transformed Hamiltonian (H_N e^(T1+T2))_C.
     Copied as-is from original CCpy implementation."""
-    from copy import deepcopy
     #from ccpy.models.integrals import Integral
 
-    # Copy the Bare Hamiltonian object for T1/T2-similarity transformed HBar
-    H = deepcopy(H0)
+    # Copy-on-write copy of the bare Hamiltonian for T1/T2-similarity transformed HBar
+    H = H0.copy_on_write()
     #H = Integral.from_empty(system, 2, use_none=True)
     
     H.a.ov += (
@@ -85,19 +85,25 @@ def build_hbar_ccsd(T, H0, RHF_symmetry, *args):
     I2C_ooov = H0.bb.ooov + 0.5 * Q1
     H.bb.ooov = I2C_ooov + 0.5 * Q1
 
-    Q1 = -np.einsum("bmfe,am->abef", I2A_vovv, T.a, optimize=True)
-    Q1 -= np.transpose(Q1, (1, 0, 2, 3))
-    H.aa.vvvv += 0.5 * np.einsum("mnef,abmn->abef", H0.aa.oovv, T.aa, optimize=True) + Q1
-
-    H.ab.vvvv += (
-                - np.einsum("mbef,am->abef", I2B_ovvv, T.a, optimize=True)
-                - np.einsum("amef,bm->abef", I2B_vovv, T.b, optimize=True)
-                + np.einsum("mnef,abmn->abef", H0.ab.oovv, T.ab, optimize=True)
-    )
+    if isinstance(H0.aa.vvvv, CholeskyVVVV):
+        # Keep the vvvv parts of HBar in terms of T1-dressed Cholesky vectors
+        H.aa.vvvv = H0.aa.vvvv.dress(T.a, T.a, H0.aa.oovv, T.aa, 0.5)
+        H.ab.vvvv = H0.ab.vvvv.dress(T.a, T.b, H0.ab.oovv, T.ab, 1.0)
+        H.bb.vvvv = H0.bb.vvvv.dress(T.b, T.b, H0.bb.oovv, T.bb, 0.5)
+    else:
+        Q1 = -np.einsum("bmfe,am->abef", I2A_vovv, T.a, optimize=True)
+        Q1 -= np.transpose(Q1, (1, 0, 2, 3))
+        H.aa.vvvv += 0.5 * np.einsum("mnef,abmn->abef", H0.aa.oovv, T.aa, optimize=True) + Q1
+
+        H.ab.vvvv += (
+                    - np.einsum("mbef,am->abef", I2B_ovvv, T.a, optimize=True)
+                    - np.einsum("amef,bm->abef", I2B_vovv, T.b, optimize=True)
+                    + np.einsum("mnef,abmn->abef", H0.ab.oovv, T.ab, optimize=True)
+        )
 
-    Q1 = -np.einsum("bmfe,am->abef", I2C_vovv, T.b, optimize=True)
-    Q1 -= np.transpose(Q1, (1, 0, 2, 3))
-    H.bb.vvvv += 0.5 * np.einsum("mnef,abmn->abef", H0.bb.oovv, T.bb, optimize=True) + Q1
+        Q1 = -np.einsum("bmfe,am->abef", I2C_vovv, T.b, optimize=True)
+        Q1 -= np.transpose(Q1, (1, 0, 2, 3))
+        H.bb.vvvv += 0.5 * np.einsum("mnef,abmn->abef", H0.bb.oovv, T.bb, optimize=True) + Q1
 
     Q1 = +np.einsum("nmje,ei->mnij", I2A_ooov, T.a, optimize=True)
     Q1 -= np.transpose(Q1, (0, 1, 3, 2))
@@ -215,7 +221,7 @@ def build_hbar_ccsd(T, H0, RHF_symmetry, *args):
     Q1 -= np.transpose(Q1, (1, 0, 2, 3))
     H.aa.vvov += Q1 + (
                 - np.einsum("me,abim->abie", H.a.ov, T.aa, optimize=True)
-                + np.einsum("abfe,fi->abie", H.aa.vvvv, T.a, optimize=True)
+                + contract_vvvv_t1(H.aa.vvvv, T.a, 2)
                 + 0.5 * np.einsum("mnie,abmn->abie", H0.aa.ooov, T.aa, optimize=True)
     )
 
@@ -223,7 +229,7 @@ def build_hbar_ccsd(T, H0, RHF_symmetry, *args):
     Q1 = -np.einsum("mbie,am->abie", Q1, T.a, optimize=True)
     H.ab.vvov += Q1 + (
                 - np.einsum("me,abim->abie", H.b.ov, T.ab, optimize=True)
-                + np.einsum("abfe,fi->abie", H.ab.vvvv, T.a, optimize=True)
+                + contract_vvvv_t1(H.ab.vvvv, T.a, 2)
                 + np.einsum("nbfe,afin->abie", H.ab.ovvv, T.aa, optimize=True)
                 + np.einsum("bnef,afin->abie", H.bb.vovv, T.ab, optimize=True)
                 - np.einsum("amfe,fbim->abie", H.ab.vovv, T.ab, optimize=True)
@@ -235,7 +241,7 @@ def build_hbar_ccsd(T, H0, RHF_symmetry, *args):
     Q1 = -np.einsum("bmei,am->baei", Q1, T.b, optimize=True)
     H.ab.vvvo += Q1 + (
                 - np.einsum("me,bami->baei", H.a.ov, T.ab, optimize=True)
-                + np.einsum("baef,fi->baei", H.ab.vvvv, T.b, optimize=True)
+                + contract_vvvv_t1(H.ab.vvvv, T.b, 3)
                 + np.einsum("bnef,fani->baei", H.aa.vovv, T.ab, optimize=True)
                 + np.einsum("bnef,fani->baei", H.ab.vovv, T.bb, optimize=True)
                 - np.einsum("maef,bfmi->baei", H.ab.ovvv, T.ab, optimize=True)
@@ -253,7 +259,7 @@ def build_hbar_ccsd(T, H0, RHF_symmetry, *args):
     Q1 -= np.transpose(Q1, (1, 0, 2, 3))
     H.bb.vvov += Q1 + (
                 - np.einsum("me,abim->abie", H.b.ov, T.bb, optimize=True)
-                + np.einsum("abfe,fi->abie", H.bb.vvvv, T.b, optimize=True)
+                + contract_vvvv_t1(H.bb.vvvv, T.b, 2)
                 + 0.5 * np.einsum("mnie,abmn->abie", H0.bb.ooov, T.bb, optimize=True)
     )
 
@@ -265,7 +271,6 @@ def build_hbar_ccsd(T, H0, RHF_symmetry, *args):
         H.bb.oooo = H.aa.oooo.copy()
         H.bb.ooov = H.aa.ooov.copy()
         H.bb.vooo = H.aa.vooo.copy()
-        H.bb.oovv = H.aa.oovv.copy()
         H.bb.voov = H.aa.voov.copy()
         H.bb.vovv = H.aa.vovv.copy()
         H.bb.vvov = H.aa.vvov.copy()
@@ -3,10 +3,9 @@ import numpy as np
 def build_hbar_ccsdt(T, H0, RHF_symmetry, *args):
     """Calculate the CCSDT similarity-transformed Hamiltonian (H_N e^(T1+T2))_C.
     Copied as-is from original CCpy implementation."""
-    from copy import deepcopy
 
-    # Copy the Bare Hamiltonian object for T1/T2-similarity transformed HBar
-    H = deepcopy(H0)
+    # Copy-on-write copy of the bare Hamiltonian for T1/T2-similarity transformed HBar
+    H = H0.copy_on_write()
 
     H.a.ov += (
             np.einsum("imae,em->ia", H0.aa.oovv, T.a, optimize=True)
@@ -278,7 +277,6 @@ def build_hbar_ccsdt(T, H0, RHF_symmetry, *args):
         H.bb.oooo = H.aa.oooo.copy()
         H.bb.ooov = H.aa.ooov.copy()
         H.bb.vooo = H.aa.vooo.copy()
-        H.bb.oovv = H.aa.oovv.copy()
         H.bb.voov = H.aa.voov.copy()
         H.bb.vovv = H.aa.vovv.copy()
         H.bb.vvov = H.aa.vvov.copy()
@@ -2,13 +2,12 @@ import numpy as np
 
 def build_hbar_ccsdt1(T, H0, RHF_symmetry, system, *args):
     """Calculate the CCSDt similarity-transformed Hamiltonian (H_N e^(T1+T2))_C."""
-    from copy import deepcopy
     from ccpy.utilities.active_space import get_active_slices
 
     oa, Oa, va, Va, ob, Ob, vb, Vb = get_active_slices(system)
 
-    # Copy the Bare Hamiltonian object for T1/T2-similarity transformed HBar
-    H = deepcopy(H0)
+    # Copy-on-write copy of the bare Hamiltonian for T1/T2-similarity transformed HBar
+    H = H0.copy_on_write()
 
     H.a.ov += (
             np.einsum("imae,em->ia", H0.aa.oovv, T.a, optimize=True)
@@ -1155,7 +1154,6 @@ def build_hbar_ccsdt1(T, H0, RHF_symmetry, system, *args):
         H.bb.oooo = H.aa.oooo.copy()
         H.bb.ooov = H.aa.ooov.copy()
         H.bb.vooo = H.aa.vooo.copy()
-        H.bb.oovv = H.aa.oovv.copy()
         H.bb.voov = H.aa.voov.copy()
         H.bb.vovv = H.aa.vovv.copy()
         H.bb.vvov = H.aa.vvov.copy()
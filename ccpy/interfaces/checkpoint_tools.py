@@ -0,0 +1,155 @@
+"""Binary checkpoint of the System and Hamiltonian. A checkpoint is a directory
+containing the file metadata.json, which holds the System parameters and the layout
+of the Hamiltonian, and one .npy file per sorted integral block (or per sorted block
+of the Cholesky vectors for Cholesky-decomposed Hamiltonians). The .npy files can be
+memory-mapped on loading, so that several calculations on the same molecule can share
+one set of integrals on disk instead of each repeating the AO-to-MO transformation."""
+import json
+import os
+
+import numpy as np
+
+from ccpy.models.integrals import Integral, SortedIntegral, CholeskySortedIntegral, SortedIntegralAlias
+from ccpy.models.system import System
+
+CHECKPOINT_VERSION = 1
+
+def get_system_params(system):
+    """Returns the arguments needed to rebuild the System object."""
+    params = {
+        "nelectrons": system.nelectrons + 2 * system.nfrozen,
+        "norbitals": system.norbitals + system.nfrozen + system.ndelete,
+        "multiplicity": system.multiplicity,
+        "nfrozen": system.nfrozen,
+        "ndelete": system.ndelete,
+        "point_group": system.point_group,
+        "orbital_symmetries": list(system.orbital_symmetries_all),
+        "charge": system.charge,
+        "nkpts": system.nkpts,
+        "reference_energy": float(system.reference_energy),
+        "frozen_energy": float(system.frozen_energy),
+        "nuclear_repulsion": float(system.nuclear_repulsion),
+        "nact_occupied": system.num_act_occupied_beta,
+        "nact_unoccupied": system.num_act_unoccupied_alpha,
+    }
+    return params
+
+def dump_checkpoint(path, system, hamiltonian):
+    """Writes the System and Hamiltonian (Integral object) to the checkpoint directory `path`.
+    Lazily sorted spin cases are materialized first; blocks that can no longer be built
+    because their parent matrix was released raise a ValueError."""
+    os.makedirs(path, exist_ok=True)
+
+    arrays = {}
+    for name in ["mo_energies", "mo_occupation"]:
+        if getattr(system, name) is not None:
+            arrays["system." + name] = np.asarray(getattr(system, name))
+
+    layout = {}
+    cholesky_vectors = {}
+    for name in hamiltonian.get_spin_cases():
+        spin_case = getattr(hamiltonian, name)
+        if isinstance(spin_case, SortedIntegralAlias):
+            target = [x for x in hamiltonian.get_spin_cases() if getattr(hamiltonian, x) is spin_case._parent]
+            layout[name] = {"type": "alias", "target": target[0]}
+        elif isinstance(spin_case, CholeskySortedIntegral):
+            if spin_case.vvvv.t2 is not None:
+                raise ValueError("Only the bare Cholesky-decomposed Hamiltonian can be checkpointed")
+            layout[name] = {"type": "cholesky", "left": name[0], "right": name[1]}
+            cholesky_vectors[name[0]] = spin_case.left
+            cholesky_vectors[name[1]] = spin_case.right
+        elif isinstance(spin_case, SortedIntegral):
+            spin_case.materialize()
+            for block in spin_case.slices:
+                if not isinstance(spin_case.__dict__.get(block), np.ndarray):
+                    raise ValueError("Integral block {}.{} is not available for checkpointing".format(name, block))
+                arrays[name + "." + block] = spin_case.__dict__[block]
+            layout[name] = {"type": "sorted"}
+        else:
+            arrays[name] = np.asarray(spin_case)
+            layout[name] = {"type": "matrix"}
+
+    shared_cholesky = False
+    if cholesky_vectors:
+        shared_cholesky = cholesky_vectors["a"] is cholesky_vectors["b"]
+        for spin, vectors in cholesky_vectors.items():
+            if spin == "b" and shared_cholesky:
+                continue
+            for block, array in vectors.items():
+                arrays["cholesky." + spin + "." + block] = array
+
+    for key, array in arrays.items():
+        np.save(os.path.join(path, key + ".npy"), array)
+
+    metadata = {
+        "version": CHECKPOINT_VERSION,
+        "system": get_system_params(system),
+        "hamiltonian": {
+            "order": hamiltonian.order,
+            "spin_cases": layout,
+            "shared_cholesky": shared_cholesky,
+        },
+        "arrays": sorted(arrays.keys()),
+    }
+    # metadata is written last so that an interrupted dump is never mistaken for a checkpoint
+    with open(os.path.join(path, "metadata.json"), "w") as f:
+        json.dump(metadata, f, indent=1)
+
+def load_checkpoint(path, mmap=True):
+    """Reads the System and Hamiltonian from the checkpoint directory `path`. If mmap=True,
+    the integral blocks are memory-mapped (copy-on-write) rather than read into memory.
+
+    Returns
+    -------
+    system : System object
+    hamiltonian : Integral object
+    """
+    with open(os.path.join(path, "metadata.json"), "r") as f:
+        metadata = json.load(f)
+    if metadata["version"] != CHECKPOINT_VERSION:
+        raise ValueError(
+            "Checkpoint {} has version {}; expected version {}".format(path, metadata["version"], CHECKPOINT_VERSION)
+        )
+    mmap_mode = "c" if mmap else None
+    arrays = {key: np.load(os.path.join(path, key + ".npy"), mmap_mode=mmap_mode) for key in metadata["arrays"]}
+
+    params = metadata["system"]
+    reference_energy = params.pop("reference_energy")
+    frozen_energy = params.pop("frozen_energy")
+    system = System(
+        **params,
+        mo_energies=arrays.get("system.mo_energies"),
+        mo_occupation=arrays.get("system.mo_occupation"),
+    )
+    system.reference_energy = reference_energy
+    system.frozen_energy = frozen_energy
+
+    cholesky_vectors = {}
+    for key, array in arrays.items():
+        if key.startswith("cholesky."):
+            _, spin, block = key.split(".")
+            cholesky_vectors.setdefault(spin, {})[block] = array
+    if metadata["hamiltonian"]["shared_cholesky"]:
+        cholesky_vectors["b"] = cholesky_vectors["a"]
+
+    hamiltonian = Integral.__new__(Integral)
+    hamiltonian.order = metadata["hamiltonian"]["order"]
+    layout = metadata["hamiltonian"]["spin_cases"]
+    # aliases are resolved after the spin cases that they refer to
+    for name in sorted(layout.keys(), key=lambda x: layout[x]["type"] == "alias"):
+        spin_case = layout[name]
+        if spin_case["type"] == "alias":
+            setattr(hamiltonian, name, SortedIntegralAlias(getattr(hamiltonian, spin_case["target"])))
+        elif spin_case["type"] == "cholesky":
+            setattr(hamiltonian, name, CholeskySortedIntegral(name,
+                                                             cholesky_vectors[spin_case["left"]],
+                                                             cholesky_vectors[spin_case["right"]]))
+        elif spin_case["type"] == "sorted":
+            sorted_integral = SortedIntegral(system, name, None, use_none=True)
+            for block in sorted_integral.slices:
+                setattr(sorted_integral, block, arrays[name + "." + block])
+            setattr(hamiltonian, name, sorted_integral)
+        else:
+            setattr(hamiltonian, name, arrays[name])
+
+    return system, hamiltonian
@@ -1,27 +1,53 @@
+import os
+import re
 import numpy as np
 
+# Number of bytes of a text integral file parsed at a time
+FCIDUMP_CHUNK_SIZE = 64 * 1024**2
+
+def read_fcidump_header(f):
+    """Reads the namelist header of an open FCIDUMP file (everything up to and including
+    the &END or / terminator) and returns it as a single string. The file is left
+    positioned at the first line of integrals."""
+    header = []
+    for line in f:
+        header.append(line.strip())
+        if line.strip().upper() in ["&END", "/"] or line.strip().upper().endswith("&END"):
+            break
+    return " ".join(header)
+
+def read_numeric_chunks(f, ncols, chunk_size=FCIDUMP_CHUNK_SIZE):
+    """Generator that parses the remaining lines of an open text file of integrals, each
+    containing ncols numbers, in chunks of roughly chunk_size bytes. Each chunk is yielded
+    as an ndarray(dtype=float, shape=(nlines, ncols))."""
+    while True:
+        lines = f.readlines(chunk_size)
+        if not lines:
+            break
+        # GAMESS uses old-school D instead of E for scientific notation
+        chunk = "".join(lines).replace("D", "E").replace("d", "e")
+        yield np.array(chunk.split(), dtype=np.float64).reshape(-1, ncols)
+
 def load_system_params_from_fcidump(fcidump):
-    """This function parses and returns the values printed in the top line of
+    """This function parses and returns the values printed in the header of
     the FCIDUMP file, which lists the number of orbitals (NORB), the number of
     electrons (NELEC), and 2*S_z (MS2) for the system."""
     with open(fcidump, "r") as f:
-        # Holds ['NORB=#', 'NELEC=#', 'MS2=#']
-        firstline = f.readline().strip("\n").split(',')
-        for entry in firstline:
-            if "NORB" in entry:
-                # Get norbitals
-                norbitals = int(entry.split("=")[1])
-            if "NELEC" in entry:
-                # Get nelectrons
-                nelectrons = int(entry.split("=")[1])
-            if "MS2" in entry:
-                # Get MS2 (note: this is not going to be correct for open shells in GAMESS)
-                ms2 = int(entry.split("=")[1])
+        header = read_fcidump_header(f).upper()
+    # Get norbitals
+    norbitals = int(re.search(r"NORB\s*=\s*(\d+)", header).group(1))
+    # Get nelectrons
+    nelectrons = int(re.search(r"NELEC\s*=\s*(\d+)", header).group(1))
+    # Get MS2 (note: this is not going to be correct for open shells in GAMESS)
+    ms2 = re.search(r"MS2\s*=\s*(-?\d+)", header)
+    ms2 = int(ms2.group(1)) if ms2 else 0
     return norbitals, nelectrons, ms2
 
-def load_integrals_from_fcidump(fcidump, system):
+def load_integrals_from_fcidump(fcidump, system, cache=False):
     """This function reads the FCIDUMP file to obtain the onebody and twobody
-    integrals as well as nuclear repulsion energy.
+    integrals as well as nuclear repulsion energy. The integral section is parsed
+    in chunks, and the 8-fold permutational symmetry of the twobody integrals is
+    applied using array indexing.
 
     Parameters
     ----------
@@ -29,6 +55,10 @@ def load_integrals_from_fcidump(fcidump, system):
         Path to FCIDUMP file
     system : System object
         System object
+    cache : bool
+        If True, the parsed integrals are stored in the sidecar file <fcidump>.npz,
+        which is read instead of the FCIDUMP on subsequent calls as long as the
+        size and modification time of the FCIDUMP file have not changed.
 
     Returns
     -------
@@ -39,32 +69,112 @@ def load_integrals_from_fcidump(fcidump, system):
     e_nn : float
         Nuclear repulsion energy (in hartree)
     """
-    norb = system.norbitals + system.nfrozen - system.ndelete
+    if cache:
+        cached = load_fcidump_cache(fcidump)
+        if cached is not None:
+            return cached
+
+    norb, _, _ = load_system_params_from_fcidump(fcidump)
     e1int = np.zeros((norb, norb), order="F")
     e2int = np.zeros((norb, norb, norb, norb), order="F")
+    e_nn = 0.0
 
     with open(fcidump) as f:
-        for ct, line in enumerate(f.readlines()):
-            if ct < 4: continue
-            L = line.split()
-            Cf = float(L[0].replace("D", "E")) # GAMESS FCIDUMP uses old-school D instead of E for scientific notation
-            p = int(L[1]) - 1
-            q = int(L[3]) - 1
-            r = int(L[2]) - 1
-            s = int(L[4]) - 1
-            if q != -1 and s != -1: # twobody term
-                e2int[p, q, r, s] = Cf
-                e2int[r, q, p, s] = Cf
-                e2int[p, s, r, q] = Cf
-                e2int[r, s, p, q] = Cf
-                e2int[q, p, s, r] = Cf
-                e2int[q, r, s, p] = Cf
-                e2int[s, p, q, r] = Cf
-                e2int[s, r, q, p] = Cf
-            elif q == -1 and s == -1 and p != -1: # onebody term
-                e1int[p, r] = Cf
-                e1int[r, p] = Cf
-            else: # nuclear repulsion
-                e_nn = Cf
+        read_fcidump_header(f)
+        for data in read_numeric_chunks(f, 5):
+            Cf = data[:, 0]
+            # (ij|kl) in chemist notation is stored as e2int[i, k, j, l] = <ik|jl>
+            p = data[:, 1].astype(np.int64) - 1
+            q = data[:, 3].astype(np.int64) - 1
+            r = data[:, 2].astype(np.int64) - 1
+            s = data[:, 4].astype(np.int64) - 1
+
+            twobody = (q != -1) & (s != -1)
+            onebody = (q == -1) & (s == -1) & (p != -1) & (r != -1)
+            nuclear = (p == -1) & (q == -1) & (r == -1) & (s == -1)
+
+            Cf2, p2, q2, r2, s2 = Cf[twobody], p[twobody], q[twobody], r[twobody], s[twobody]
+            e2int[p2, q2, r2, s2] = Cf2
+            e2int[r2, q2, p2, s2] = Cf2
+            e2int[p2, s2, r2, q2] = Cf2
+            e2int[r2, s2, p2, q2] = Cf2
+            e2int[q2, p2, s2, r2] = Cf2
+            e2int[q2, r2, s2, p2] = Cf2
+            e2int[s2, p2, q2, r2] = Cf2
+            e2int[s2, r2, q2, p2] = Cf2
+
+            e1int[p[onebody], r[onebody]] = Cf[onebody]
+            e1int[r[onebody], p[onebody]] = Cf[onebody]
+
+            if np.any(nuclear):
+                e_nn = Cf[nuclear][-1]
+
+    if cache:
+        save_fcidump_cache(fcidump, e1int, e2int, e_nn)
 
     return e1int, e2int, e_nn
+
+def get_fcidump_cache_file(fcidump):
+    return fcidump + ".npz"
+
+def load_fcidump_cache(fcidump):
+    """Returns (e1int, e2int, e_nn) from the sidecar cache of the FCIDUMP file, or None
+    if the cache does not exist or was written for a different version of the file."""
+    cache_file = get_fcidump_cache_file(fcidump)
+    if not os.path.exists(cache_file):
+        return None
+    stat = os.stat(fcidump)
+    with np.load(cache_file) as data:
+        if data["size"] != stat.st_size or data["mtime"] != stat.st_mtime_ns:
+            return None
+        print("   Reading FCIDUMP integrals from cache", cache_file)
+        return np.asfortranarray(data["e1int"]), np.asfortranarray(data["e2int"]), float(data["e_nn"])
+
+def save_fcidump_cache(fcidump, e1int, e2int, e_nn):
+    """Stores the integrals parsed from the FCIDUMP file in its sidecar cache, tagged with
+    the size and modification time of the FCIDUMP file."""
+    stat = os.stat(fcidump)
+    try:
+        with open(get_fcidump_cache_file(fcidump), "wb") as f:
+            np.savez(f, e1int=e1int, e2int=e2int, e_nn=e_nn, size=stat.st_size, mtime=stat.st_mtime_ns)
+    except OSError:
+        print("   WARNING: could not write FCIDUMP cache", get_fcidump_cache_file(fcidump))
+
+def write_fcidump(fcidump, e1int, e2int, e_nn, nelectrons, ms2=0, orbsym=None, isym=1, tol=1.0e-12):
+    """Writes the onebody integrals e1int, twobody integrals e2int (in physics notation,
+    as returned by load_integrals_from_fcidump), and nuclear repulsion energy e_nn to an
+    FCIDUMP file. Only the symmetry-unique twobody integrals (ij|kl), with i>=j, k>=l,
+    and ij>=kl, whose magnitude exceeds tol are written."""
+    norb = e1int.shape[0]
+    if orbsym is None:
+        orbsym = [1] * norb
+    DATA_FMT = ["%23.16E", "%4d", "%4d", "%4d", "%4d"]
+
+    with open(fcidump, "w") as f:
+        f.write(" &FCI NORB={},NELEC={},MS2={},\n".format(norb, nelectrons, ms2))
+        f.write("  ORBSYM={},\n".format(",".join(str(x) for x in orbsym)))
+        f.write("  ISYM={},\n".format(isym))
+        f.write(" &END\n")
+
+        # unique pairs ij with i>=j (1-based indices)
+        ii, jj = np.tril_indices(norb)
+        npair = len(ii)
+        # loop over blocks of the first pair index to keep the index arrays small
+        batch = max(1, int(2**24 / npair))
+        for a0 in range(0, npair, batch):
+            # all pair-of-pairs (a, b) with b <= a for a in [a0, a0 + batch)
+            arange_a = np.arange(a0, min(a0 + batch, npair))
+            a = np.repeat(arange_a, arange_a + 1)
+            offsets = np.cumsum(arange_a + 1) - (arange_a + 1)
+            b = np.arange(len(a)) - np.repeat(offsets, arange_a + 1)
+            i, j, k, l = ii[a], jj[a], ii[b], jj[b]
+            vals = e2int[i, k, j, l]
+            mask = np.abs(vals) > tol
+            np.savetxt(f, np.column_stack((vals[mask], i[mask] + 1, j[mask] + 1, k[mask] + 1, l[mask] + 1)), fmt=DATA_FMT)
+
+        vals = e1int[ii, jj]
+        mask = np.abs(vals) > tol
+        zeros = np.zeros(np.count_nonzero(mask))
+        np.savetxt(f, np.column_stack((vals[mask], ii[mask] + 1, jj[mask] + 1, zeros, zeros)), fmt=DATA_FMT)
+
+        np.savetxt(f, [[e_nn, 0, 0, 0, 0]], fmt=DATA_FMT)
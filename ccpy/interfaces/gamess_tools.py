@@ -1,5 +1,7 @@
+import glob
+import os
 import numpy as np
-from ccpy.interfaces.fcidump_tools import load_integrals_from_fcidump, load_system_params_from_fcidump
+from ccpy.interfaces.fcidump_tools import load_integrals_from_fcidump, load_system_params_from_fcidump, read_numeric_chunks
 
 def load_gamess_integrals(
     gamess_logfile,
@@ -12,6 +14,9 @@ def load_gamess_integrals(
     normal_ordered=True,
     sorted=True,
     data_type=np.float64,
+    lazy=False,
+    restricted=False,
+    cache_integrals=False,
 ):
     from cclib.io import ccread
 
@@ -52,11 +57,11 @@ def load_gamess_integrals(
 
     # Load using onebody and twobody direct integral files
     if fcidump_file is None and onebody_file is not None and twobody_file is not None:
-        e1int = load_onebody_integrals(onebody_file, system, data_type)
-        nuclear_repulsion, e2int = load_twobody_integrals(twobody_file, system, data_type)
+        e1int = load_onebody_integrals(onebody_file, system, data_type, cache=cache_integrals)
+        nuclear_repulsion, e2int = load_twobody_integrals(twobody_file, system, data_type, cache=cache_integrals)
     # Load from FCIDUMP file
     elif fcidump_file is not None:
-        e1int, e2int, nuclear_repulsion = load_integrals_from_fcidump(fcidump_file, system)
+        e1int, e2int, nuclear_repulsion = load_integrals_from_fcidump(fcidump_file, system, cache=cache_integrals)
 
     #assert np.allclose(
     #    nuclear_repulsion, system.nuclear_repulsion, atol=1.0e-06, rtol=0.0
@@ -72,7 +77,7 @@ def load_gamess_integrals(
     system.reference_energy = hf_energy
     system.frozen_energy = calc_hf_frozen_core_energy(e1int, e2int, system)
 
-    return system, getHamiltonian(e1int, e2int, system, normal_ordered, sorted)
+    return system, getHamiltonian(e1int, e2int, system, normal_ordered, sorted, lazy=lazy, restricted=restricted)
 
 def get_reference_energy(gamess_logfile):
 
@@ -126,7 +131,34 @@ def get_point_group(gamess_logfile):
         point_group = 'C1'
     return point_group
 
-def load_onebody_integrals(onebody_file, system, data_type):
+def get_integral_cache_file(integral_file, tag):
+    """Returns the name of the binary cache of an integral file. The cache is keyed on
+    the size and modification time of the integral file, so that a cache written for a
+    different version of the file is never picked up."""
+    stat = os.stat(integral_file)
+    return "{}.{}.{}-{}.npy".format(integral_file, tag, stat.st_size, stat.st_mtime_ns)
+
+def load_cached_integrals(integral_file, tag):
+    """Memory-maps the cached array of an integral file (copy-on-write), or returns None
+    if there is no valid cache."""
+    cache_file = get_integral_cache_file(integral_file, tag)
+    if not os.path.exists(cache_file):
+        return None
+    print("   Reading integrals from cache", cache_file)
+    return np.load(cache_file, mmap_mode="c")
+
+def save_cached_integrals(integral_file, tag, array):
+    """Stores the array parsed from an integral file in its binary cache, removing any
+    stale caches left from previous versions of the file."""
+    cache_file = get_integral_cache_file(integral_file, tag)
+    for stale_file in glob.glob(glob.escape(integral_file) + "." + tag + ".*.npy"):
+        os.remove(stale_file)
+    try:
+        np.save(cache_file, array)
+    except OSError:
+        print("   WARNING: could not write integral cache", cache_file)
+
+def load_onebody_integrals(onebody_file, system, data_type, cache=False):
     """This function reads the onebody.inp file from GAMESS
     and returns a numpy matrix.
 
@@ -136,30 +168,35 @@ def load_onebody_integrals(onebody_file, system, data_type):
         Path to onebody integral file
     sys : dict
         System information dict
+    data_type : numpy dtype
+        Data type of the returned integrals
+    cache : bool
+        If True, use (and create, if needed) a binary cache of the integrals
 
     Returns
     -------
     e1int : ndarray(dtype=float, shape=(norb,norb))
         Onebody part of the bare Hamiltonian in the MO basis (Z)
     """
-    norb = system.norbitals + system.nfrozen - system.ndelete
+    norb = system.norbitals + system.nfrozen + system.ndelete
+    if cache:
+        e1int = load_cached_integrals(onebody_file, "e1int")
+        if e1int is not None:
+            return e1int.astype(data_type, copy=False)
+
     e1int = np.zeros((norb, norb), dtype=data_type, order="F")
-    try:
-        with open(onebody_file) as f_in:
-            lines = f_in.readlines()
-            ct = 0
-            for i in range(norb):
-                for j in range(i + 1):
-                    val = float(lines[ct].split()[0])
-                    e1int[i, j] = val
-                    e1int[j, i] = val
-                    ct += 1
-    except IOError:
-        print("Error: {} does not appear to exist.".format(onebody_file))
+    # the lower triangle of e1int is listed row by row, one value per line
+    idx = np.tril_indices(norb)
+    vals = np.loadtxt(onebody_file, usecols=0, max_rows=len(idx[0]), ndmin=1)
+    e1int[idx] = vals
+    e1int[idx[1], idx[0]] = vals
+
+    if cache:
+        save_cached_integrals(onebody_file, "e1int", e1int)
     return e1int
 
 
-def load_twobody_integrals(twobody_file, system, data_type):
+def load_twobody_integrals(twobody_file, system, data_type, cache=False):
     """This function reads the twobody.inp file from GAMESS
     and returns a numpy matrix.
 
@@ -169,6 +206,10 @@ def load_twobody_integrals(twobody_file, system, data_type):
         Path to twobody integral file
     sys : dict
         System information dict
+    data_type : numpy dtype
+        Data type of the returned integrals
+    cache : bool
+        If True, use (and create, if needed) a binary cache of the integrals
 
     Returns
     -------
@@ -177,29 +218,31 @@ def load_twobody_integrals(twobody_file, system, data_type):
     e2int : ndarray(dtype=float, shape=(norb,norb,norb,norb))
         Twobody part of the bare Hamiltonian in the MO basis (V)
     """
-    try:
-        norb = system.norbitals + system.nfrozen - system.ndelete
-        # initialize numpy array
-        e2int = np.zeros((norb, norb, norb, norb), dtype=data_type, order="F")
-        # open file
-        with open(twobody_file) as f_in:
-            # loop over lines
-            for line in f_in:
-                # split fields and parse
-                fields = line.split()
-                indices = tuple(map(int, fields[:4]))
-                val = float(fields[4])
-                # check whether value is nuclear repulsion
-                # fill matrix otherwise
-                if sum(indices) == 0:
-                    e_nn = val
-                else:
-                    indices = tuple(i - 1 for i in indices)
-                    e2int[indices] = val
-        # convert e2int from chemist notation (ia|jb) to
-        # physicist notation <ij|ab>
-        e2int = np.einsum("iajb->ijab", e2int)
-    except IOError:
-        print("Error: {} does not appear to exist.".format(twobody_file))
+    norb = system.norbitals + system.nfrozen + system.ndelete
+    if cache:
+        e2int = load_cached_integrals(twobody_file, "e2int")
+        e_nn = load_cached_integrals(twobody_file, "e_nn")
+        if e2int is not None and e_nn is not None:
+            return float(e_nn), e2int.astype(data_type, copy=False)
+
+    e_nn = 0.0
+    # initialize numpy array
+    e2int = np.zeros((norb, norb, norb, norb), dtype=data_type, order="F")
+    with open(twobody_file) as f_in:
+        for data in read_numeric_chunks(f_in, 5):
+            indices = data[:, :4].astype(np.int64)
+            vals = data[:, 4]
+            # the record with all indices equal to zero is the nuclear repulsion
+            nuclear = ~indices.any(axis=1)
+            if np.any(nuclear):
+                e_nn = vals[nuclear][-1]
+            indices = indices[~nuclear] - 1
+            e2int[indices[:, 0], indices[:, 1], indices[:, 2], indices[:, 3]] = vals[~nuclear]
+    # convert e2int from chemist notation (ia|jb) to
+    # physicist notation <ij|ab>
+    e2int = np.asfortranarray(e2int.transpose(0, 2, 1, 3))
+
+    if cache:
+        save_cached_integrals(twobody_file, "e2int", e2int)
+        save_cached_integrals(twobody_file, "e_nn", np.array(e_nn))
     return e_nn, e2int
-
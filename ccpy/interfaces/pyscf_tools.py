@@ -1,12 +1,13 @@
 import numpy as np
 from pyscf import ao2mo, symm
 
-from ccpy.models.integrals import getHamiltonian
+from ccpy.models.integrals import Integral, KBlockIntegral, getHamiltonian, getCholeskyHamiltonian
 from ccpy.models.system import System
 from ccpy.utilities.dumping import dumpIntegralstoPGFiles
+from ccpy.interfaces.checkpoint_tools import dump_checkpoint
 
 from ccpy.cholesky.cholesky import cholesky_eri_from_pyscf
-from ccpy.energy.hf_energy import calc_hf_frozen_core_energy
+from ccpy.energy.hf_energy import calc_hf_frozen_core_energy, calc_hf_energy_cholesky
 
 
 def load_pyscf_integrals(
@@ -14,7 +15,8 @@ def load_pyscf_integrals(
         num_act_holes_alpha=0, num_act_particles_alpha=0,
         num_act_holes_beta=0, num_act_particles_beta=0,
         use_cholesky=False, cholesky_tol=1.0e-09,
-        normal_ordered=True, dump_integrals=False, sorted=True
+        normal_ordered=True, dump_integrals=False, sorted=True, lazy=False, restricted=False,
+        checkpoint=None, fragmented_ao2mo=False, required_blocks=None,
 ):
     """Builds the System and Integral objects using the information contained within a PySCF
     mean-field object for a molecular system.
@@ -23,6 +25,13 @@ def load_pyscf_integrals(
     ----------
     meanFieldObj : Object -> PySCF SCF/mean-field object
     nfrozen : int -> number of frozen electrons
+    checkpoint : str -> if given, the System and Hamiltonian are also written to this
+                        binary checkpoint directory (see Driver.from_checkpoint)
+    fragmented_ao2mo : bool -> if True, the AO-to-MO transformation produces only the
+                               sorted o/v blocks of the twobody integrals, and the full
+                               norb^4 array is never formed (see get_sorted_mo_integrals)
+    required_blocks : dict -> with fragmented_ao2mo=True, only the listed blocks
+                              {spin case: [blocks]} of the twobody integrals are built
     Returns:
     ----------
     system: System object
@@ -77,13 +86,54 @@ def load_pyscf_integrals(
         R_chol = cholesky_eri_from_pyscf(molecule, tol=cholesky_tol)
         # Transform to MO frame
         R_chol = np.einsum("xpq,pi,qj->xij", R_chol, mo_coeff, mo_coeff, optimize=True)
-        # Stupid, but for now, just make the integrals out of Cholesky to test approximation
-        e2int = np.einsum("xpr,xqs->pqrs", R_chol, R_chol, optimize=True)
-    else:
-        e2int = np.transpose(
-            np.reshape(ao2mo.kernel(molecule, mo_coeff, compact=False), 4 * (norbitals,)),
-            (0, 2, 1, 3)
-        )
+
+        # Check that the HF energy calculated using the Cholesky vectors matches the PySCF result
+        hf_energy = calc_hf_energy_cholesky(e1int, R_chol, system)
+        hf_energy += nuclear_repulsion
+
+        if not np.allclose(hf_energy, meanfield.energy_tot(), atol=1.0e-06, rtol=0.0):
+            raise RuntimeError("Cholesky vectors don't match mean field energy")
+
+        system.reference_energy = hf_energy
+        system.frozen_energy = calc_hf_energy_cholesky(e1int, R_chol, system, frozen_only=True)
+
+        if dump_integrals:
+            e2int = np.asfortranarray(np.einsum("xpr,xqs->pqrs", R_chol, R_chol, optimize=True))
+            dumpIntegralstoPGFiles(e1int, e2int, system)
+
+        hamiltonian = getCholeskyHamiltonian(e1int, R_chol, system, normal_ordered, restricted=restricted)
+        if checkpoint is not None:
+            dump_checkpoint(checkpoint, system, hamiltonian)
+        return system, hamiltonian
+
+    if fragmented_ao2mo:
+        if dump_integrals or not sorted:
+            raise ValueError("The fragmented AO-to-MO transformation only produces sorted integral blocks")
+        # Build the Fock matrices and check the HF energy using AO Coulomb and exchange matrices
+        f_a, f_b, hf_energy, frozen_energy = get_fock_from_jk(meanfield, mo_coeff, e1int, system)
+        hf_energy += nuclear_repulsion
+
+        if not np.allclose(hf_energy, meanfield.energy_tot(), atol=1.0e-06, rtol=0.0):
+            raise RuntimeError("Integrals don't match mean field energy")
+
+        system.reference_energy = hf_energy
+        system.frozen_energy = frozen_energy
+
+        corr_slice = slice(system.nfrozen, system.nfrozen + system.norbitals)
+        if not normal_ordered:
+            f_a = f_b = e1int
+        blocks = get_sorted_mo_integrals(meanfield, mo_coeff, system, required_blocks, restricted)
+        blocks["a"] = f_a[corr_slice, corr_slice]
+        blocks["b"] = f_b[corr_slice, corr_slice]
+        hamiltonian = Integral.from_blocks(system, 2, blocks, restricted=restricted)
+        if checkpoint is not None:
+            dump_checkpoint(checkpoint, system, hamiltonian)
+        return system, hamiltonian
+
+    e2int = np.transpose(
+        np.reshape(ao2mo.kernel(molecule, mo_coeff, compact=False), 4 * (norbitals,)),
+        (0, 2, 1, 3)
+    )
     e2int = np.asfortranarray(e2int)
     #e2int = np.einsum(
     #     "pi,qj,rk,sl,pqrs->ijkl", mo_coeff, mo_coeff, mo_coeff, mo_coeff, eri_aoints, optimize=True
@@ -102,33 +152,127 @@ def load_pyscf_integrals(
     if dump_integrals:
         dumpIntegralstoPGFiles(e1int, e2int, system)
 
-    return system, getHamiltonian(e1int, e2int, system, normal_ordered, sorted)
+    hamiltonian = getHamiltonian(e1int, e2int, system, normal_ordered, sorted, lazy=lazy, restricted=restricted)
+    if checkpoint is not None:
+        dump_checkpoint(checkpoint, system, hamiltonian)
+    return system, hamiltonian
+
+
+def get_fock_from_jk(meanfield, mo_coeff, e1int, system):
+    """Builds the alpha and beta Fock matrices in the MO basis, the electronic HF energy, and
+    the frozen-core energy from the AO Coulomb and exchange matrices of the occupied alpha,
+    occupied beta, and frozen-core densities, so that no MO twobody integrals are needed."""
+    Nocc_a = system.noccupied_alpha + system.nfrozen
+    Nocc_b = system.noccupied_beta + system.nfrozen
+    dm = np.array([
+        mo_coeff[:, :Nocc_a] @ mo_coeff[:, :Nocc_a].T,
+        mo_coeff[:, :Nocc_b] @ mo_coeff[:, :Nocc_b].T,
+        mo_coeff[:, :system.nfrozen] @ mo_coeff[:, :system.nfrozen].T,
+    ])
+    vj, vk = meanfield.get_jk(meanfield.mol, dm, hermi=1)
+    # <p|f|q> = <p|z|q> + <pi|v|qi> + <pi~|v|qi~> in terms of J and K
+    g_a = mo_coeff.T @ (vj[0] + vj[1] - vk[0]) @ mo_coeff
+    g_b = mo_coeff.T @ (vj[0] + vj[1] - vk[1]) @ mo_coeff
+    f_a = np.asfortranarray(e1int + g_a)
+    f_b = np.asfortranarray(e1int + g_b)
+
+    hf_energy = (
+        np.einsum("ii->", e1int[:Nocc_a, :Nocc_a] + 0.5 * g_a[:Nocc_a, :Nocc_a])
+        + np.einsum("ii->", e1int[:Nocc_b, :Nocc_b] + 0.5 * g_b[:Nocc_b, :Nocc_b])
+    )
+    if system.nfrozen == 0:
+        frozen_energy = 0.0
+    else:
+        g_c = mo_coeff[:, :system.nfrozen].T @ (2.0 * vj[2] - vk[2]) @ mo_coeff[:, :system.nfrozen]
+        frozen_energy = np.einsum("ii->", 2.0 * e1int[:system.nfrozen, :system.nfrozen] + g_c)
+    return f_a, f_b, hf_energy, frozen_energy
+
+
+def get_sorted_mo_integrals(meanfield, mo_coeff, system, required_blocks=None, restricted=False):
+    """Performs the AO-to-MO transformation of the twobody integrals directly into the sorted
+    o/v blocks of the aa, ab, and bb spin cases used by SortedIntegral (antisymmetrized for
+    aa and bb), without forming the full norb^4 array.
+
+    Every physics-notation block <pq|rs> is a transpose of a chemist-notation block (pr|qs)
+    over the correlated occupied/unoccupied orbital ranges, and each distinct (pr|qs) block,
+    up to the 8-fold permutational symmetry of real orbitals, is transformed only once. The
+    transformation of each block is done by pyscf.ao2mo, which uses the stored AO integrals
+    of the mean-field object if available and otherwise streams over batches of AO shells.
 
+    Arguments:
+    ----------
+    required_blocks : dict -> blocks {spin case: [blocks]} to build (all blocks if None)
+    restricted : bool -> if True, the bb spin case is not built
+    Returns:
+    ----------
+    blocks : dict -> {spin case: {block: ndarray}}
+    """
+    eri = meanfield._eri if getattr(meanfield, "_eri", None) is not None else meanfield.mol
+    nf = system.nfrozen
+    orbital_range = {
+        "a": {"o": (nf, nf + system.noccupied_alpha), "v": (nf + system.noccupied_alpha, nf + system.norbitals)},
+        "b": {"o": (nf, nf + system.noccupied_beta), "v": (nf + system.noccupied_beta, nf + system.norbitals)},
+    }
+    # index permutations relating equivalent chemist-notation integrals (pr|qs)
+    symmetry_perms = [(0, 1, 2, 3), (1, 0, 2, 3), (0, 1, 3, 2), (1, 0, 3, 2),
+                      (2, 3, 0, 1), (3, 2, 0, 1), (2, 3, 1, 0), (3, 2, 1, 0)]
+    chemist_blocks = {}
+
+    def get_chemist_block(ranges):
+        for perm in symmetry_perms:
+            key = tuple(ranges[k] for k in perm)
+            if key in chemist_blocks:
+                return chemist_blocks[key].transpose([perm.index(k) for k in range(4)])
+        coeffs = tuple(mo_coeff[:, start:stop] for start, stop in ranges)
+        shape = tuple(stop - start for start, stop in ranges)
+        chemist_blocks[ranges] = ao2mo.general(eri, coeffs, compact=False).reshape(shape)
+        return chemist_blocks[ranges]
+
+    def get_physics_block(spins, block):
+        p, q, r, s = (orbital_range[spin][x] for spin, x in zip(spins, block))
+        return get_chemist_block((p, r, q, s)).transpose(0, 2, 1, 3)
+
+    blocks = {}
+    for name in ["aa", "ab", "bb"]:
+        if name == "bb" and restricted:
+            continue
+        spins = name * 2
+        if required_blocks is None:
+            block_names = [a + b + c + d for a in "ov" for b in "ov" for c in "ov" for d in "ov"]
+        else:
+            block_names = required_blocks.get(name, [])
+        blocks[name] = {}
+        for block in block_names:
+            v = get_physics_block(spins, block)
+            if name != "ab":
+                # <pq|rs> - <pq|sr>
+                v = v - get_physics_block(spins, block[:2] + block[3] + block[2]).transpose(0, 1, 3, 2)
+            blocks[name][block] = np.asfortranarray(v)
+    return blocks
 
 
 def get_kconserv1(a, kpts, thresh=1.0e-07):
+    """Returns kconserv[p] = q, where kp - kq is a reciprocal lattice vector."""
     nkpts = len(kpts)
-    kconserv = np.zeros(nkpts, dtype=np.int32)
-    for p, kp in enumerate(kpts):
-        for q, kq in enumerate(kpts):
-            dk = kp - kq
-            svec = np.einsum("i,xi->x", dk, a / (2.0 * np.pi))
-            if np.linalg.norm(svec - np.rint(svec)) < thresh:
-                kconserv[p] = q
-    return kconserv
+    # fractional coordinates of k-points in units of the reciprocal lattice vectors
+    frac = np.einsum("ki,xi->kx", kpts, a / (2.0 * np.pi))
+    dk = frac[:, None, :] - frac[None, :, :]
+    conserved = np.linalg.norm(dk - np.rint(dk), axis=-1) < thresh
+    # keep the last matching q, as in the original loop
+    return (nkpts - 1 - np.argmax(conserved[:, ::-1], axis=1)).astype(np.int32)
 
 
 def get_kconserv2(a, kpts, thresh=1.0e-07):
+    """Returns kconserv[p, q, r] = s, where kp + kq - kr - ks is a reciprocal lattice vector.
+    The table is built from the fractional k-point coordinates in one vectorized pass over
+    (p, q, r) per candidate s."""
     nkpts = len(kpts)
     kconserv = np.zeros((nkpts, nkpts, nkpts), dtype=np.int32)
-    for p, kp in enumerate(kpts):
-        for q, kq in enumerate(kpts):
-            for r, kr in enumerate(kpts):
-                for s, ks in enumerate(kpts):
-                    dk = kp + kq - kr - ks
-                    svec = np.einsum("i,xi->x", dk, a / (2.0 * np.pi))
-                    if np.linalg.norm(svec - np.rint(svec)) < thresh:
-                        kconserv[p, q, r] = s
+    frac = np.einsum("ki,xi->kx", kpts, a / (2.0 * np.pi))
+    dk_pqr = frac[:, None, None, :] + frac[None, :, None, :] - frac[None, None, :, :]
+    for s in range(nkpts):
+        dk = dk_pqr - frac[s]
+        kconserv[np.linalg.norm(dk - np.rint(dk), axis=-1) < thresh] = s
     return kconserv
 
 
@@ -171,39 +315,32 @@ def get_pbc_mo_integrals(cell, kmf, kpts, notation="chemist"):
         # 1-electron integrals do not scale with Nkpt
         Z[kp, kq, :, :] = z0
 
-    V = np.zeros((nkpts, nkpts, nkpts, nkpts, nmo, nmo, nmo, nmo), dtype=np.complex128)
-    for kp in range(nkpts):
-        for kq in range(nkpts):
-            for kr in range(nkpts):
-
-                if notation == "chemist":  # chemist notation
-                    ks = kconserv2[kp, kq, kr]
-                    # Get the ERI integrals from kmf object and convert to MO basis
-                    eri_kpt = kmf.with_df.ao2mo(
-                        [kmf.mo_coeff[i] for i in (kp, kq, kr, ks)],
-                        [kpts[i] for i in (kp, kq, kr, ks)],
-                        compact=False,
-                    )
-                    # Store the integrals. Don't forget the 1/Nkpt scaling of 2-body ints!
-                    V[kp, kq, kr, ks, :, :, :, :] = (
-                            1.0 / nkpts * np.reshape(eri_kpt, (nmo, nmo, nmo, nmo))
-                    )
-                else:  # physics notation
-                    ks = kconserv2[kp, kr, kq]
-                    # Get the ERI integrals from kmf object and convert to MO basis
+    # (kp kq|kr ks) is nonzero only for ks = kconserv2[kp, kr, kq]
+    kconserv_chemist = np.ascontiguousarray(kconserv2.transpose(0, 2, 1))
+    mo_coeff_kpts = [kmf.mo_coeff[k] for k in range(nkpts)]
+    if hasattr(kmf.with_df, "ao2mo_7d"):
+        # all momentum-conserving blocks are transformed in a single batched call
+        V = kmf.with_df.ao2mo_7d(np.asarray(mo_coeff_kpts), kpts)
+    else:
+        V = np.zeros((nkpts, nkpts, nkpts, nmo, nmo, nmo, nmo), dtype=np.complex128)
+        for kp in range(nkpts):
+            for kq in range(nkpts):
+                for kr in range(nkpts):
+                    ks = kconserv_chemist[kp, kq, kr]
                     eri_kpt = kmf.with_df.ao2mo(
-                        [kmf.mo_coeff[i] for i in (kp, kq, kr, ks)],
+                        [mo_coeff_kpts[i] for i in (kp, kq, kr, ks)],
                         [kpts[i] for i in (kp, kq, kr, ks)],
                         compact=False,
                     )
-                    # Store the integrals. Don't forget the 1/Nkpt scaling of 2-body ints!
-                    V[kp, kr, kq, ks, :, :, :, :] = (
-                            1.0
-                            / nkpts
-                            * np.transpose(
-                        np.reshape(eri_kpt, (nmo, nmo, nmo, nmo)), (0, 2, 1, 3)
-                    )
-                    )
+                    V[kp, kq, kr] = np.reshape(eri_kpt, (nmo, nmo, nmo, nmo))
+    # Don't forget the 1/Nkpt scaling of 2-body ints!
+    V /= nkpts
+
+    if notation == "chemist":
+        V = KBlockIntegral(kconserv_chemist, V, notation)
+    else:  # physics notation
+        # <kp kq|kr ks> = (kp kr|kq ks), which is nonzero for ks = kconserv2[kp, kq, kr]
+        V = KBlockIntegral(kconserv2, np.ascontiguousarray(V.transpose(0, 2, 1, 3, 5, 4, 6)), notation)
 
     # Calculate reference energy using extracted MO integrals
     e_hf = calc_khf_energy(Z, V, cell.nelectron, nkpts, notation)
@@ -224,6 +361,7 @@ def get_pbc_mo_integrals(cell, kmf, kpts, notation="chemist"):
 
 def calc_khf_energy(e1int, e2int, Nelec, Nkpts, notation):
     # Note that any V must have a factor of 1/Nkpts!
+    # e2int is a KBlockIntegral, so only the Coulomb and exchange k-point blocks are accessed
     e1a = 0.0
     e1b = 0.0
     e2a = 0.0
@@ -241,30 +379,34 @@ def calc_khf_energy(e1int, e2int, Nelec, Nkpts, notation):
     oa = slice(0, Nocc_a)
     ob = slice(0, Nocc_b)
 
-    if notation == "chemist":
-        e1a = np.einsum("uuii->", e1int[:, :, oa, oa])
-        e1b = np.einsum("uuii->", e1int[:, :, ob, ob])
-        e2a = 0.5 * (
-                np.einsum("uuvviijj->", e2int[:, :, :, :, oa, oa, oa, oa])
-                - np.einsum("uvvuijji->", e2int[:, :, :, :, oa, oa, oa, oa])
-        )
-        e2b = 1.0 * (np.einsum("uuvviijj->", e2int[:, :, :, :, oa, ob, oa, ob]))
-        e2c = 0.5 * (
-                np.einsum("uuvviijj->", e2int[:, :, :, :, ob, ob, ob, ob])
-                - np.einsum("uvvuijji->", e2int[:, :, :, :, ob, ob, ob, ob])
-        )
-    else:  # physicist notation
-        e1a = np.einsum("uuii->", e1int[:, :, oa, oa])
-        e1b = np.einsum("uuii->", e1int[:, :, ob, ob])
-        e2a = 0.5 * (
-                np.einsum("uvuvijij->", e2int[:, :, :, :, oa, oa, oa, oa])
-                - np.einsum("uvvuijji->", e2int[:, :, :, :, oa, oa, oa, oa])
-        )
-        e2b = 1.0 * (np.einsum("uvuvijij->", e2int[:, :, :, :, oa, ob, oa, ob]))
-        e2c = 0.5 * (
-                np.einsum("uvuvijij->", e2int[:, :, :, :, ob, ob, ob, ob])
-                - np.einsum("uvvuijji->", e2int[:, :, :, :, ob, ob, ob, ob])
-        )
+    e1a = np.einsum("uuii->", e1int[:, :, oa, oa])
+    e1b = np.einsum("uuii->", e1int[:, :, ob, ob])
+    for u in range(Nkpts):
+        for v in range(Nkpts):
+            if notation == "chemist":
+                coulomb = e2int[u, u, v, v]
+                exchange = e2int[u, v, v, u]
+                e2a += 0.5 * (
+                        np.einsum("iijj->", coulomb[oa, oa, oa, oa])
+                        - np.einsum("ijji->", exchange[oa, oa, oa, oa])
+                )
+                e2b += 1.0 * np.einsum("iijj->", coulomb[oa, oa, ob, ob])
+                e2c += 0.5 * (
+                        np.einsum("iijj->", coulomb[ob, ob, ob, ob])
+                        - np.einsum("ijji->", exchange[ob, ob, ob, ob])
+                )
+            else:  # physicist notation
+                coulomb = e2int[u, v, u, v]
+                exchange = e2int[u, v, v, u]
+                e2a += 0.5 * (
+                        np.einsum("ijij->", coulomb[oa, oa, oa, oa])
+                        - np.einsum("ijji->", exchange[oa, oa, oa, oa])
+                )
+                e2b += 1.0 * np.einsum("ijij->", coulomb[oa, ob, oa, ob])
+                e2c += 0.5 * (
+                        np.einsum("ijij->", coulomb[ob, ob, ob, ob])
+                        - np.einsum("ijji->", exchange[ob, ob, ob, ob])
+                )
 
     Escf = e1a + e1b + e2a + e2b + e2c
 
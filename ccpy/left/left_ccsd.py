@@ -1,4 +1,5 @@
 import numpy as np
+from ccpy.models.integrals import contract_vvvv
 from ccpy.utilities.updates import cc_loops2
 #from ccpy.left.left_cc_intermediates import build_left_ccsd_intermediates
 
@@ -263,7 +264,7 @@ def build_LH_2A(L, LH, T, H):
     LH.aa += np.einsum("ieam,bejm->abij", H.ab.ovvo, L.ab, optimize=True)
 
     LH.aa += 0.125 * np.einsum("ijmn,abmn->abij", H.aa.oooo, L.aa, optimize=True)
-    LH.aa += 0.125 * np.einsum("efab,efij->abij", H.aa.vvvv, L.aa, optimize=True)
+    LH.aa += 0.125 * contract_vvvv(H.aa.vvvv, L.aa, bra=True)
 
     LH.aa += 0.5 * np.einsum("ejab,ei->abij", H.aa.vovv, L.a, optimize=True)
     LH.aa -= 0.5 * np.einsum("ijmb,am->abij", H.aa.ooov, L.a, optimize=True)
@@ -282,7 +283,7 @@ def build_LH_2B(L, LH, T, H):
     LH.ab += np.einsum("ieab,ej->abij", H.ab.ovvv, L.b, optimize=True)
 
     LH.ab += np.einsum("ijmn,abmn->abij", H.ab.oooo, L.ab, optimize=True)
-    LH.ab += np.einsum("efab,efij->abij", H.ab.vvvv, L.ab, optimize=True)
+    LH.ab += contract_vvvv(H.ab.vvvv, L.ab, bra=True)
 
     LH.ab += np.einsum("ejmb,aeim->abij", H.ab.voov, L.aa, optimize=True)
     LH.ab += np.einsum("eima,ebmj->abij", H.aa.voov, L.ab, optimize=True)
@@ -417,7 +418,7 @@ def build_LH_2C(L, LH, T, H):
     LH.bb += np.einsum("eima,ebmj->abij", H.ab.voov, L.ab, optimize=True)
 
     LH.bb += 0.125 * np.einsum("ijmn,abmn->abij", H.bb.oooo, L.bb, optimize=True)
-    LH.bb += 0.125 * np.einsum("efab,efij->abij", H.bb.vvvv, L.bb, optimize=True)
+    LH.bb += 0.125 * contract_vvvv(H.bb.vvvv, L.bb, bra=True)
 
     LH.bb += 0.5 * np.einsum("ejab,ei->abij", H.bb.vovv, L.b, optimize=True)
     LH.bb -= 0.5 * np.einsum("ijmb,am->abij", H.bb.ooov, L.b, optimize=True)
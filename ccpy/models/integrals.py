@@ -1,3 +1,5 @@
+import warnings
+from copy import deepcopy
 from itertools import combinations
 
 import numpy as np
@@ -44,7 +46,13 @@ from ccpy.models.operators import get_operator_name
 
 
 class SortedIntegral:
-    def __init__(self, system, name, matrix, use_none=False):
+    """Container for the occupied/unoccupied (o/v) blocks of a given spin case of
+    a one- or two-body operator. By default, every block is sliced out of the parent
+    matrix and stored as a Fortran-contiguous copy. With lazy=True, the parent matrix
+    is retained and each block is only materialized the first time it is accessed.
+    Once every block listed in `required` (all blocks by default) has been built, the
+    reference to the parent matrix is dropped so that its memory can be reclaimed."""
+    def __init__(self, system, name, matrix, use_none=False, lazy=False, required=None):
 
         order = len(name)
         double_spin_string = list(name) * 2
@@ -60,6 +68,9 @@ class SortedIntegral:
         }
 
         self.slices = []
+        self._slicing = {}
+        self._matrix = None
+        self._pending = set()
         for i in range(2 * order + 1):
             for combs in combinations(range(2 * order), i):
                 attr = ["o"] * (2 * order)
@@ -70,19 +81,509 @@ class SortedIntegral:
                     slicearr[k] = slice_table[double_spin_string[k]][attr[k]]
                 if use_none:
                     self.__dict__["".join(attr)] = None
+                elif lazy:
+                    # defer slicing until the block is first requested
+                    self._slicing["".join(attr)] = tuple(slicearr)
                 else:
                     # make array F_CONTIGUOUS
                     self.__dict__["".join(attr)] = np.asfortranarray(matrix[tuple(slicearr)])
                 self.slices.append(''.join(attr))
 
+        if lazy and not use_none:
+            self._matrix = matrix
+            if required is None:
+                self._pending = set(self.slices)
+            else:
+                self._pending = set(required)
+            # nothing is required, so the parent can be dropped right away
+            if not self._pending:
+                self.release()
+
+    def __getattr__(self, block):
+        # This is only reached when `block` is not yet in the instance dictionary,
+        # which, for o/v block names, means that a lazy block has not been built.
+        slicing = self.__dict__.get("_slicing", {})
+        if block not in slicing:
+            raise AttributeError("'{}' object has no attribute '{}'".format(type(self).__name__, block))
+        if self.__dict__.get("_matrix") is None:
+            raise AttributeError(
+                "Integral block {} was never built and its parent matrix has been released".format(block)
+            )
+        return self.build(block)
+
+    def __setattr__(self, name, value):
+        super().__setattr__(name, value)
+        # an explicitly assigned block no longer needs to be sliced out of the parent
+        pending = self.__dict__.get("_pending")
+        if pending and name in pending:
+            pending.discard(name)
+            if not pending:
+                self.release()
+
+    def build(self, block):
+        """Slice the block out of the parent matrix and store it as a Fortran-contiguous array."""
+        if block in self.__dict__:
+            return self.__dict__[block]
+        self.__dict__[block] = np.asfortranarray(self._matrix[self._slicing[block]])
+        self._pending.discard(block)
+        if not self._pending:
+            self.release()
+        return self.__dict__[block]
+
+    def materialize(self, blocks=None):
+        """Build the listed blocks (all blocks if None) that have not yet been built."""
+        if blocks is None:
+            blocks = self.slices
+        for block in blocks:
+            if block not in self.__dict__ and self._matrix is not None:
+                self.build(block)
+
+    def release(self):
+        """Drop the reference to the parent matrix. Blocks that have not been
+        built by this point can no longer be accessed."""
+        self.__dict__["_matrix"] = None
+        self.__dict__["_pending"] = set()
+
+    def is_built(self, block):
+        return block in self.__dict__
+
+    def memory_usage(self):
+        """Returns a dictionary of the number of bytes held by each built block."""
+        return {
+            block: self.__dict__[block].nbytes
+            for block in self.slices
+            if isinstance(self.__dict__.get(block), np.ndarray)
+        }
+
+    def astype(self, data_type):
+        """Returns a copy in which every stored array (including a retained parent matrix
+        or Cholesky vectors) is cast to data_type."""
+        obj = self.__class__.__new__(self.__class__)
+        memo = {}
+        for key, value in self.__dict__.items():
+            obj.__dict__[key] = cast_arrays(value, data_type, memo)
+        return obj
+
+class DenseVVVVWarning(RuntimeWarning):
+    """Issued when the full nu^4 array of a CholeskyVVVV block is built implicitly."""
+
+
+class CholeskyVVVV:
+    """Implicit representation of the vvvv block of a two-body operator in terms of
+    (possibly T1-dressed) Cholesky vectors,
+
+        V(abef) = sum_x L(x|ae) R(x|bf) [- L(x|af) R(x|be)] + c * sum_mn W(mnef) X(abmn),
+
+    where the exchange term is present for the same-spin (antisymmetrized) cases and
+    the optional W*X term carries the T2 contribution of the CCSD HBar. Contractions
+    are performed in batches of the two leading virtual indices so that the full
+    nu^4 array is never stored."""
+    def __init__(self, left_vv, right_vv, left_ov, right_ov, antisymmetric,
+                 oovv=None, t2=None, coefficient=1.0, max_batch_memory=256):
+        self.left_vv = left_vv
+        self.right_vv = right_vv
+        self.left_ov = left_ov
+        self.right_ov = right_ov
+        self.antisymmetric = antisymmetric
+        self.oovv = oovv
+        self.t2 = t2
+        self.coefficient = coefficient
+        # maximum memory (in MB) used by a single batch of the vvvv block
+        self.max_batch_memory = max_batch_memory
+
+    @property
+    def shape(self):
+        return (self.left_vv.shape[1], self.right_vv.shape[1], self.left_vv.shape[2], self.right_vv.shape[2])
+
+    @property
+    def dtype(self):
+        return self.left_vv.dtype
+
+    @property
+    def nbytes(self):
+        nbytes = self.left_vv.nbytes + self.left_ov.nbytes
+        if self.right_vv is not self.left_vv:
+            nbytes += self.right_vv.nbytes + self.right_ov.nbytes
+        return nbytes
+
+    def _batch_size(self):
+        nbytes = self.left_vv.shape[2] * self.right_vv.shape[2] * self.left_vv.itemsize
+        return max(1, int(np.sqrt(self.max_batch_memory * 1024**2 / nbytes)))
+
+    def dress(self, t1_left, t1_right, oovv, t2, coefficient):
+        """Return the vvvv block of the CCSD HBar, obtained by dressing the bra index of
+        the Cholesky vectors with T1, B~(x|ae) = B(x|ae) - t(am) B(x|me), and adding the
+        c * <mn|ef> t(abmn) term."""
+        left_vv = self.left_vv - np.einsum("am,xme->xae", t1_left, self.left_ov, optimize=True)
+        if self.right_vv is self.left_vv and t1_right is t1_left:
+            right_vv = left_vv
+        else:
+            right_vv = self.right_vv - np.einsum("am,xme->xae", t1_right, self.right_ov, optimize=True)
+        return CholeskyVVVV(left_vv, right_vv, self.left_ov, self.right_ov, self.antisymmetric,
+                            oovv=oovv, t2=t2, coefficient=coefficient, max_batch_memory=self.max_batch_memory)
+
+    def contract(self, x, bra=False):
+        """Computes sum_ef V(abef) x(ef...) or, if bra=True, sum_ef V(efab) x(ef...)."""
+        rest = x.shape[2:]
+        x0 = x
+        x = np.reshape(x, x.shape[:2] + (-1,))
+        if self.antisymmetric:
+            # the exchange term is absorbed by antisymmetrizing x in ef
+            x = x - np.transpose(x, (1, 0, 2))
+        if bra:
+            n1, n2 = self.left_vv.shape[2], self.right_vv.shape[2]
+        else:
+            n1, n2 = self.left_vv.shape[1], self.right_vv.shape[1]
+        out = np.zeros((n1, n2, x.shape[2]), dtype=np.result_type(self.dtype, x.dtype))
+        batch = self._batch_size()
+        for a0 in range(0, n1, batch):
+            A = slice(a0, min(a0 + batch, n1))
+            for b0 in range(0, n2, batch):
+                B = slice(b0, min(b0 + batch, n2))
+                if bra:
+                    # V(eAfB) = sum_x L(x|eA) R(x|fB)
+                    v = np.tensordot(self.left_vv[:, :, A], self.right_vv[:, :, B], axes=(0, 0))
+                    out[A, B, :] = np.transpose(np.tensordot(x, v, axes=([0, 1], [0, 2])), (1, 2, 0))
+                else:
+                    # V(AeBf) = sum_x L(x|Ae) R(x|Bf)
+                    v = np.tensordot(self.left_vv[:, A, :], self.right_vv[:, B, :], axes=(0, 0))
+                    out[A, B, :] = np.tensordot(v, x, axes=([1, 3], [0, 1]))
+        out = np.reshape(out, (n1, n2) + rest)
+        if self.t2 is not None:
+            if bra:
+                y = np.einsum("efmn,ef...->mn...", self.t2, x0, optimize=True)
+                out += self.coefficient * np.einsum("mnab,mn...->ab...", self.oovv, y, optimize=True)
+            else:
+                y = np.einsum("mnef,ef...->mn...", self.oovv, x0, optimize=True)
+                out += self.coefficient * np.einsum("abmn,mn...->ab...", self.t2, y, optimize=True)
+        return out
+
+    def contract_t1(self, t1, position):
+        """Computes sum_f V(abfe) t(fi) -> (abie) for position=2 or
+        sum_f V(abef) t(fi) -> (abei) for position=3."""
+        if position == 2:
+            out = np.einsum("xaf,fi,xbe->abie", self.left_vv, t1, self.right_vv, optimize=True)
+            if self.antisymmetric:
+                out -= np.einsum("xae,xbf,fi->abie", self.left_vv, self.right_vv, t1, optimize=True)
+            if self.t2 is not None:
+                out += self.coefficient * np.einsum("abmn,mnfe,fi->abie", self.t2, self.oovv, t1, optimize=True)
+        elif position == 3:
+            out = np.einsum("xae,xbf,fi->abei", self.left_vv, self.right_vv, t1, optimize=True)
+            if self.antisymmetric:
+                out -= np.einsum("xaf,fi,xbe->abei", self.left_vv, t1, self.right_vv, optimize=True)
+            if self.t2 is not None:
+                out += self.coefficient * np.einsum("abmn,mnef,fi->abei", self.t2, self.oovv, t1, optimize=True)
+        else:
+            raise ValueError("T1 can only be contracted with the third or fourth vvvv index")
+        return out
+
+    def dense(self):
+        """Build the full nu^4 array. Only used as a fallback for methods that
+        have not been written in terms of the batched contractions."""
+        v = np.einsum("xae,xbf->abef", self.left_vv, self.right_vv, optimize=True)
+        if self.antisymmetric:
+            v -= np.transpose(v, (0, 1, 3, 2))
+        if self.t2 is not None:
+            v += self.coefficient * np.einsum("mnef,abmn->abef", self.oovv, self.t2, optimize=True)
+        return np.asfortranarray(v)
+
+    def copy(self):
+        return CholeskyVVVV(self.left_vv, self.right_vv, self.left_ov, self.right_ov, self.antisymmetric,
+                            oovv=self.oovv, t2=self.t2, coefficient=self.coefficient,
+                            max_batch_memory=self.max_batch_memory)
+
+    def _dense_fallback(self):
+        """Build the full nu^4 array for an implicit conversion or arithmetic, warning that
+        the caller should use contract_vvvv (or the CholeskyVVVV methods) instead."""
+        warnings.warn("building the full {} vvvv array from the Cholesky vectors; "
+                      "use contract_vvvv to avoid it".format("x".join(str(n) for n in self.shape)),
+                      DenseVVVVWarning, stacklevel=3)
+        return self.dense()
+
+    def __array__(self, dtype=None, copy=None):
+        v = self._dense_fallback()
+        return v if dtype is None else v.astype(dtype)
+
+    # Arithmetic falls back to the dense array. Note that x += y, for either operand
+    # a CholeskyVVVV, binds x to the dense result rather than updating a CholeskyVVVV.
+    def __add__(self, other):
+        return self._dense_fallback() + other
+
+    __radd__ = __add__
+    __iadd__ = __add__
+
+    def __sub__(self, other):
+        return self._dense_fallback() - other
+
+    def __rsub__(self, other):
+        return other - self._dense_fallback()
+
+    def __mul__(self, other):
+        return self._dense_fallback() * other
+
+    __rmul__ = __mul__
+
+    def __neg__(self):
+        return -self._dense_fallback()
+
+
+class CholeskySortedIntegral(SortedIntegral):
+    """Two-body spin case represented by the sorted o/v blocks of the Cholesky vectors
+    of each spin, with <pq|rs> = sum_x B(x|pr) B(x|qs). Every block except vvvv is
+    reconstructed from the Cholesky vectors the first time it is accessed and kept
+    afterwards. The vvvv block is held in the implicit CholeskyVVVV form."""
+    def __init__(self, name, left, right):
+        self.__dict__["_pending"] = set()
+        self.__dict__["_matrix"] = None
+        self.antisymmetric = name[0] == name[1]
+        self.left = left
+        self.right = right
+        self.slices = []
+        for i in range(5):
+            for combs in combinations(range(4), i):
+                attr = ["o"] * 4
+                for k in combs:
+                    attr[k] = "v"
+                self.slices.append("".join(attr))
+        self._slicing = {block: None for block in self.slices if block != "vvvv"}
+        self.vvvv = CholeskyVVVV(left["vv"], right["vv"], left["ov"], right["ov"], self.antisymmetric)
+
+    def __getattr__(self, block):
+        if block not in self.__dict__.get("_slicing", {}):
+            raise AttributeError("'{}' object has no attribute '{}'".format(type(self).__name__, block))
+        return self.build(block)
+
+    def build(self, block):
+        """Reconstruct the block <pq|rs> (antisymmetrized for same-spin cases) from the Cholesky vectors."""
+        if block in self.__dict__:
+            return self.__dict__[block]
+        p, q, r, s = block
+        v = np.einsum("xpr,xqs->pqrs", self.left[p + r], self.right[q + s], optimize=True)
+        if self.antisymmetric:
+            v -= np.einsum("xps,xqr->pqrs", self.left[p + s], self.right[q + r], optimize=True)
+        self.__dict__[block] = np.asfortranarray(v)
+        return self.__dict__[block]
+
+    def materialize(self, blocks=None):
+        """Build the listed blocks (all blocks other than vvvv if None)."""
+        if blocks is None:
+            blocks = self._slicing.keys()
+        for block in blocks:
+            self.build(block)
+
+    def release(self):
+        pass
+
+    def memory_usage(self):
+        usage = super().memory_usage()
+        if isinstance(self.__dict__.get("vvvv"), CholeskyVVVV):
+            usage["vvvv"] = self.vvvv.nbytes
+        return usage
+
+class SortedIntegralAlias:
+    """Read-only alias of the sorted blocks of another spin case. In a restricted
+    (closed-shell) Hamiltonian, the beta spin cases b and bb are aliases of a and aa,
+    so that the identical alpha and beta blocks are only stored once. Blocks are
+    returned as read-only views; assigning a block to the alias stores it separately
+    without touching the parent. A deep copy (e.g., the HBar copy of the bare
+    Hamiltonian) yields an independent, writable SortedIntegral."""
+    def __init__(self, parent):
+        self.__dict__["_parent"] = parent
+
+    def __getattr__(self, block):
+        parent = self.__dict__.get("_parent")
+        if parent is None:
+            raise AttributeError("'{}' object has no attribute '{}'".format(type(self).__name__, block))
+        value = getattr(parent, block)
+        if isinstance(value, np.ndarray):
+            value = value.view()
+            value.flags.writeable = False
+        return value
+
+    def __deepcopy__(self, memo):
+        # Copy the parent outside of memo so that the copy does not alias the copied parent
+        obj = deepcopy(self._parent)
+        for name, value in self.__dict__.items():
+            if name != "_parent":
+                obj.__dict__[name] = deepcopy(value, memo)
+        return obj
+
+    def memory_usage(self):
+        """Blocks owned by the parent are not counted again."""
+        return {
+            block: value.nbytes
+            for block, value in self.__dict__.items()
+            if isinstance(value, np.ndarray)
+        }
+
+
+class SharedBlock(np.ndarray):
+    """Read-only view of an integral block that is shared with another Integral object.
+    In-place arithmetic (e.g., H.a.ov += X) returns a new array instead of modifying the
+    shared block, so that the attribute assignment that follows stores the result in the
+    copy. Item assignment into a shared block raises a ValueError. The results of all
+    other operations are plain arrays."""
+    @classmethod
+    def wrap(cls, array):
+        view = array.view(cls)
+        view.flags.writeable = False
+        return view
+
+    def __array_wrap__(self, obj, context=None, return_scalar=False):
+        if return_scalar:
+            return obj[()]
+        return obj.view(np.ndarray)
+
+    def _copy(self):
+        return np.array(self, order="K")
+
+    def copy(self, order="C"):
+        return np.array(self, order=order)
+
+    def __iadd__(self, other):
+        result = self._copy()
+        result += other
+        return result
+
+    def __isub__(self, other):
+        result = self._copy()
+        result -= other
+        return result
+
+    def __imul__(self, other):
+        result = self._copy()
+        result *= other
+        return result
+
+    def __itruediv__(self, other):
+        result = self._copy()
+        result /= other
+        return result
+
+
+class CopyOnWriteSortedIntegral:
+    """Copy of a spin case of another Integral object that shares all of its blocks
+    until they are replaced. Blocks that have not been assigned are served from the
+    parent spin case as read-only SharedBlock views, while assigned blocks (including
+    the results of in-place arithmetic on shared blocks) are stored in the copy and
+    never touch the parent. This is used for HBar, which only transforms some blocks
+    of the bare Hamiltonian. Once the copy is complete, detach() replaces the reference
+    to the parent by references to the blocks that are still shared, so that the
+    replaced blocks of the parent are not kept alive by the copy."""
+    def __init__(self, parent):
+        self.__dict__["_parent"] = parent
+        self.__dict__["_shared"] = None
+
+    def __getattr__(self, block):
+        shared = self.__dict__.get("_shared")
+        if shared is not None and block in shared:
+            value = shared[block]
+        else:
+            parent = self.__dict__.get("_parent")
+            if parent is None:
+                raise AttributeError("'{}' object has no attribute '{}'".format(type(self).__name__, block))
+            value = getattr(parent, block)
+        if isinstance(value, np.ndarray):
+            return SharedBlock.wrap(value)
+        return value
+
+    def __deepcopy__(self, memo):
+        # Copy the parent outside of memo so that the copy does not alias a copied parent
+        obj = CopyOnWriteSortedIntegral(deepcopy(self._parent))
+        for name, value in self.__dict__.items():
+            if name != "_parent":
+                obj.__dict__[name] = deepcopy(value, memo)
+        return obj
+
+    def is_shared(self, block):
+        """Checks whether the block is still served by the parent."""
+        return block not in self.__dict__
+
+    def detach(self):
+        """Keep references to the shared blocks instead of the parent. Parents that may still
+        build blocks on first access (lazily sorted or Cholesky-represented) are kept."""
+        if self._parent is None:
+            return
+        blocks = get_built_blocks(self._parent)
+        if blocks is None:
+            return
+        self.__dict__["_shared"] = {block: value for block, value in blocks.items() if self.is_shared(block)}
+        self.__dict__["_shared"]["slices"] = list(blocks.keys())
+        self.__dict__["_parent"] = None
+
+    def get_built_blocks(self):
+        """Returns the dictionary of all blocks of the spin case, or None if the parent is still needed."""
+        if self._parent is not None:
+            return None
+        blocks = {block: value for block, value in self._shared.items() if block != "slices"}
+        for block in self._shared["slices"]:
+            if not self.is_shared(block):
+                blocks[block] = self.__dict__[block]
+        return blocks
+
+    def astype(self, data_type):
+        """Returns a copy-on-write spin case of the parent cast to data_type, with the
+        blocks stored in this copy cast to data_type."""
+        memo = {}
+        parent = self._parent
+        if parent is None:
+            cast_parent = None
+        elif isinstance(parent, SortedIntegralAlias):
+            cast_parent = SortedIntegralAlias(parent._parent.astype(data_type))
+            for key, value in parent.__dict__.items():
+                if key != "_parent":
+                    cast_parent.__dict__[key] = cast_arrays(value, data_type, {})
+        else:
+            cast_parent = parent.astype(data_type)
+        obj = CopyOnWriteSortedIntegral(cast_parent)
+        for key, value in self.__dict__.items():
+            if key != "_parent":
+                obj.__dict__[key] = cast_arrays(value, data_type, memo)
+        return obj
+
+    def memory_usage(self):
+        """Blocks shared with the parent are not counted again."""
+        usage = {}
+        for block, value in self.__dict__.items():
+            if isinstance(value, (np.ndarray, CholeskyVVVV)):
+                usage[block] = value.nbytes
+        return usage
+
+
+def get_built_blocks(spin_case):
+    """Returns the dictionary of the blocks of a sorted spin case, or None if the spin case
+    may still build blocks on first access."""
+    if isinstance(spin_case, CopyOnWriteSortedIntegral):
+        return spin_case.get_built_blocks()
+    if isinstance(spin_case, SortedIntegralAlias):
+        blocks = get_built_blocks(spin_case._parent)
+        if blocks is None:
+            return None
+        blocks = {block: getattr(spin_case, block) for block in blocks}
+        blocks.update({block: value for block, value in spin_case.__dict__.items() if block != "_parent"})
+        return blocks
+    if isinstance(spin_case, CholeskySortedIntegral) or spin_case.__dict__.get("_matrix") is not None:
+        return None
+    return {block: spin_case.__dict__[block] for block in spin_case.slices if block in spin_case.__dict__}
+
+
 class Integral:
-    def __init__(self, system, order, matrices, sorted=True, use_none=False):
+    def __init__(self, system, order, matrices, sorted=True, use_none=False, lazy=False, required=None, restricted=False):
+        if restricted and system.noccupied_alpha != system.noccupied_beta:
+            raise ValueError("Restricted integrals require a closed-shell reference")
         self.order = order
         for i in range(1, order + 1):  # Loop over many-body ranks
             for j in range(i + 1):  # Loop over distinct spin cases per rank
                 name = get_operator_name(i, j)
-                if sorted:
-                    sorted_integral = SortedIntegral(system, name, matrices[name], use_none)
+                if restricted and sorted and j == i:
+                    # all-beta spin cases alias the all-alpha ones
+                    self.__dict__[name] = SortedIntegralAlias(self.__dict__[get_operator_name(i, 0)])
+                elif sorted:
+                    if required is not None:
+                        required_blocks = required.get(name, [])
+                    else:
+                        required_blocks = None
+                    sorted_integral = SortedIntegral(system, name, matrices[name], use_none, lazy, required_blocks)
                     self.__dict__[name] = sorted_integral
                 else:
                     self.__dict__[name] = matrices[name]
@@ -114,33 +615,339 @@ class Integral:
     def from_none(cls, system, order):
         return cls(system, order, matrix=None, sorted=True, use_none=True)
 
+    @classmethod
+    def from_cholesky(cls, system, onebody, cholesky_vectors, restricted=False):
+        """Build the Hamiltonian from the onebody matrices and the sorted Cholesky vectors
+        {"a": {...}, "b": {...}} without ever forming the twobody matrices."""
+        if restricted and system.noccupied_alpha != system.noccupied_beta:
+            raise ValueError("Restricted integrals require a closed-shell reference")
+        obj = cls.__new__(cls)
+        obj.order = 2
+        obj.a = SortedIntegral(system, "a", onebody["a"])
+        obj.aa = CholeskySortedIntegral("aa", cholesky_vectors["a"], cholesky_vectors["a"])
+        obj.ab = CholeskySortedIntegral("ab", cholesky_vectors["a"], cholesky_vectors["b"])
+        if restricted:
+            obj.b = SortedIntegralAlias(obj.a)
+            obj.bb = SortedIntegralAlias(obj.aa)
+        else:
+            obj.b = SortedIntegral(system, "b", onebody["b"])
+            obj.bb = CholeskySortedIntegral("bb", cholesky_vectors["b"], cholesky_vectors["b"])
+        return obj
+
+    @classmethod
+    def from_blocks(cls, system, order, blocks, restricted=False):
+        """Build the sorted Integral object directly from its o/v blocks, given as a dictionary
+        {spin case: {block: array}}, where the entry of a spin case may also be its full
+        matrix, which is then sorted. Blocks that are not provided are left as None. If
+        restricted=True, the all-beta spin cases are aliases of the all-alpha ones and only
+        the latter need to be provided."""
+        if restricted and system.noccupied_alpha != system.noccupied_beta:
+            raise ValueError("Restricted integrals require a closed-shell reference")
+        obj = cls.__new__(cls)
+        obj.order = order
+        for i in range(1, order + 1):  # Loop over many-body ranks
+            for j in range(i + 1):  # Loop over distinct spin cases per rank
+                name = get_operator_name(i, j)
+                if restricted and j == i:
+                    obj.__dict__[name] = SortedIntegralAlias(obj.__dict__[get_operator_name(i, 0)])
+                    continue
+                if isinstance(blocks.get(name), np.ndarray):
+                    obj.__dict__[name] = SortedIntegral(system, name, blocks[name])
+                    continue
+                sorted_integral = SortedIntegral(system, name, None, use_none=True)
+                for block, array in blocks.get(name, {}).items():
+                    setattr(sorted_integral, block, array)
+                obj.__dict__[name] = sorted_integral
+        return obj
+
+    def get_spin_cases(self):
+        return [get_operator_name(i, j) for i in range(1, self.order + 1) for j in range(i + 1)]
+
+    def copy_on_write(self):
+        """Returns a copy of the Integral object whose blocks are shared with this one until
+        they are assigned, so that only the modified blocks are allocated. Unsorted
+        spin-case matrices are copied."""
+        obj = Integral.__new__(Integral)
+        obj.order = self.order
+        for name in self.get_spin_cases():
+            spin_case = self.__dict__[name]
+            if isinstance(spin_case, (SortedIntegral, SortedIntegralAlias, CopyOnWriteSortedIntegral)):
+                obj.__dict__[name] = CopyOnWriteSortedIntegral(spin_case)
+            else:
+                obj.__dict__[name] = deepcopy(spin_case)
+        return obj
+
+    def detach(self):
+        """Drop the references of copy-on-write spin cases to their parents, keeping only the
+        blocks that are still shared (see CopyOnWriteSortedIntegral.detach)."""
+        for name in self.get_spin_cases():
+            if isinstance(self.__dict__[name], CopyOnWriteSortedIntegral):
+                self.__dict__[name].detach()
+
+    def astype(self, data_type):
+        """Returns a copy of the Integral object with all blocks cast to data_type (e.g., a
+        single-precision copy of the Hamiltonian). Restricted aliases and Cholesky-vector
+        representations are preserved."""
+        obj = Integral.__new__(Integral)
+        obj.order = self.order
+        for name in self.get_spin_cases():
+            spin_case = self.__dict__[name]
+            if isinstance(spin_case, SortedIntegralAlias):
+                parent = [x for x in self.get_spin_cases() if self.__dict__[x] is spin_case._parent][0]
+                alias = SortedIntegralAlias(obj.__dict__[parent])
+                for key, value in spin_case.__dict__.items():
+                    if key != "_parent":
+                        alias.__dict__[key] = cast_arrays(value, data_type, {})
+                obj.__dict__[name] = alias
+            elif isinstance(spin_case, (SortedIntegral, CopyOnWriteSortedIntegral)):
+                obj.__dict__[name] = spin_case.astype(data_type)
+            else:
+                obj.__dict__[name] = cast_arrays(spin_case, data_type, {})
+        return obj
+
+    def materialize(self):
+        """Build every block of the lazily sorted spin cases that has not been built yet,
+        which releases their parent matrices."""
+        for name in self.get_spin_cases():
+            if isinstance(self.__dict__[name], SortedIntegral):
+                self.__dict__[name].materialize()
+
+    def release(self):
+        """Drop the parent matrices of all lazily sorted spin cases."""
+        for name in self.get_spin_cases():
+            if isinstance(self.__dict__[name], SortedIntegral):
+                self.__dict__[name].release()
+
+    def is_restricted(self):
+        return any(isinstance(self.__dict__[name], SortedIntegralAlias) for name in self.get_spin_cases())
+
+    def memory_usage(self):
+        """Returns a dictionary {spin case: {block: bytes}} for all built blocks."""
+        usage = {}
+        for name in self.get_spin_cases():
+            if isinstance(self.__dict__[name], (SortedIntegral, SortedIntegralAlias, CopyOnWriteSortedIntegral)):
+                usage[name] = self.__dict__[name].memory_usage()
+        return usage
+
+    def print_memory_usage(self):
+        """Print the memory (in MB) held by each built integral block."""
+        DATA_FMT = "{:>10} {:>10} {:>16.2f}"
+        usage = self.memory_usage()
+        print("   Integral memory usage")
+        print("   ----------------------------------------")
+        print("{:>10} {:>10} {:>16}".format("Spin", "Block", "Memory (MB)"))
+        total = 0
+        for name, blocks in usage.items():
+            for block, nbytes in blocks.items():
+                print(DATA_FMT.format(name, block, nbytes / 1024**2))
+                total += nbytes
+        print("   ----------------------------------------")
+        print("   Total = {:.2f} MB\n".format(total / 1024**2))
+
+
+class KBlockIntegral:
+    """Twobody integrals of a periodic system stored as k-point blocks. Of the nk^4 blocks
+    V(kp,kq,kr,ks) of the dense array, only the nk^3 blocks that conserve crystal momentum
+    are nonzero, so the blocks are stored as a single array of shape (nk,nk,nk,n,n,n,n)
+    indexed by (kp,kq,kr), where ks = kconserv[kp,kq,kr] is fixed by the conservation law
+    of the chosen notation. Indexing with a full (kp,kq,kr,ks) tuple returns the stored
+    block, or zeros if the block violates momentum conservation."""
+    def __init__(self, kconserv, blocks, notation="chemist"):
+        self.kconserv = kconserv
+        self.blocks = blocks
+        self.notation = notation
 
-def getHamiltonian(e1int, e2int, system, normal_ordered, sorted=True):
+    @property
+    def nkpts(self):
+        return self.blocks.shape[0]
+
+    @property
+    def shape(self):
+        return (self.nkpts,) * 4 + self.blocks.shape[3:]
+
+    @property
+    def dtype(self):
+        return self.blocks.dtype
+
+    @property
+    def nbytes(self):
+        return self.blocks.nbytes
+
+    def __getitem__(self, kpoints):
+        kp, kq, kr, ks = kpoints
+        if self.kconserv[kp, kq, kr] == ks:
+            return self.blocks[kp, kq, kr]
+        return np.zeros(self.blocks.shape[3:], dtype=self.blocks.dtype)
+
+    def to_dense(self):
+        """Returns the dense (nk,nk,nk,nk,n,n,n,n) array of all k-point blocks."""
+        dense = np.zeros(self.shape, dtype=self.dtype)
+        kp, kq, kr = np.indices((self.nkpts,) * 3).reshape(3, -1)
+        dense[kp, kq, kr, self.kconserv[kp, kq, kr]] = self.blocks[kp, kq, kr]
+        return dense
+
+
+def cast_arrays(value, data_type, memo):
+    """Cast the floating-point arrays contained in value (an array, a dictionary of arrays,
+    or a CholeskyVVVV) to data_type. Objects that are shared within value remain shared
+    in the result; memo maps the id of each original object to its cast copy."""
+    if id(value) in memo:
+        return memo[id(value)]
+    if isinstance(value, np.ndarray) and np.issubdtype(value.dtype, np.floating):
+        result = value.astype(data_type, copy=False)
+    elif isinstance(value, dict):
+        result = {key: cast_arrays(x, data_type, memo) for key, x in value.items()}
+    elif isinstance(value, set):
+        result = set(value)
+    elif isinstance(value, AntisymmetrizedTwobody):
+        result = AntisymmetrizedTwobody(cast_arrays(value.e2int, data_type, memo))
+    elif isinstance(value, CholeskyVVVV):
+        result = CholeskyVVVV.__new__(CholeskyVVVV)
+        for key, x in value.__dict__.items():
+            result.__dict__[key] = cast_arrays(x, data_type, memo)
+    else:
+        result = value
+    memo[id(value)] = result
+    return result
+
+
+def getHamiltonian(e1int, e2int, system, normal_ordered, sorted=True, lazy=False, required_blocks=None, restricted=False):
+    """Build the (normal-ordered) Hamiltonian Integral object from the onebody and
+    twobody MO integral arrays. If lazy=True, the sorted o/v blocks are built on first
+    access, and the antisymmetrized parent arrays are released once every block listed
+    in required_blocks (a dictionary {spin case: [blocks]}; all blocks if None) is built.
+    If restricted=True (closed shells only), the beta spin cases b and bb are read-only
+    aliases of a and aa."""
 
     corr_slice = slice(system.nfrozen, system.nfrozen + system.norbitals)
 
-    twobody = build_v(e2int)
+    # lazily sorted blocks are antisymmetrized as they are sliced out of e2int
+    lazy = lazy and sorted
+    twobody = build_v(e2int, restricted=restricted, lazy=lazy)
     if normal_ordered:
-        onebody = build_f(e1int, twobody, system)
+        onebody = build_f(e1int, twobody, system, restricted=restricted)
     else:
         onebody = {"a": e1int, "b": e1int}
     # Keep only correlated spatial orbitals in the one- and two-body matrices
     onebody["a"] = onebody["a"][corr_slice, corr_slice]
     onebody["b"] = onebody["b"][corr_slice, corr_slice]
-    twobody["aa"] = twobody["aa"][corr_slice, corr_slice, corr_slice, corr_slice]
-    twobody["ab"] = twobody["ab"][corr_slice, corr_slice, corr_slice, corr_slice]
-    twobody["bb"] = twobody["bb"][corr_slice, corr_slice, corr_slice, corr_slice]
+    if lazy:
+        twobody = build_v(e2int[corr_slice, corr_slice, corr_slice, corr_slice], restricted=restricted, lazy=True)
+    else:
+        twobody["aa"] = twobody["aa"][corr_slice, corr_slice, corr_slice, corr_slice]
+        twobody["ab"] = twobody["ab"][corr_slice, corr_slice, corr_slice, corr_slice]
+        twobody["bb"] = twobody["bb"][corr_slice, corr_slice, corr_slice, corr_slice]
+
+    return Integral(system, 2, {**onebody, **twobody}, sorted=sorted, lazy=lazy, required=required_blocks,
+                    restricted=restricted and sorted)
+
+
+def getCholeskyHamiltonian(e1int, R_chol, system, normal_ordered, restricted=False):
+    """Build the (normal-ordered) Hamiltonian Integral object from the onebody MO integrals
+    and the MO Cholesky vectors R(x|pq), where <pq|rs> = sum_x R(x|pr) R(x|qs). The twobody
+    blocks are served from the Cholesky vectors and the full twobody array is never formed."""
+
+    corr_slice = slice(system.nfrozen, system.nfrozen + system.norbitals)
+
+    if normal_ordered:
+        onebody = build_f_cholesky(e1int, R_chol, system)
+    else:
+        onebody = {"a": e1int, "b": e1int}
+    # Keep only correlated spatial orbitals in the one-body matrices and Cholesky vectors
+    onebody["a"] = onebody["a"][corr_slice, corr_slice]
+    onebody["b"] = onebody["b"][corr_slice, corr_slice]
+    R_chol = R_chol[:, corr_slice, corr_slice]
+
+    return Integral.from_cholesky(system, onebody, sort_cholesky_vectors(R_chol, system), restricted=restricted)
+
+
+def sort_cholesky_vectors(R_chol, system):
+    """Split the Cholesky vectors R(x|pq) into their o/v blocks for each spin. For closed
+    shells, the alpha and beta blocks are shared."""
+    slice_table = {
+        "a": {
+            "o": slice(0, system.noccupied_alpha),
+            "v": slice(system.noccupied_alpha, system.norbitals),
+        },
+        "b": {
+            "o": slice(0, system.noccupied_beta),
+            "v": slice(system.noccupied_beta, system.norbitals),
+        },
+    }
+    sorted_vectors = {}
+    for spin in ["a", "b"]:
+        if spin == "b" and system.noccupied_alpha == system.noccupied_beta:
+            sorted_vectors["b"] = sorted_vectors["a"]
+            continue
+        sorted_vectors[spin] = {
+            p + q: np.ascontiguousarray(R_chol[:, slice_table[spin][p], slice_table[spin][q]])
+            for p in "ov" for q in "ov"
+        }
+    return sorted_vectors
+
+
+def contract_vvvv(vvvv, x, bra=False):
+    """Computes sum_ef V(abef) x(ef...) or, if bra=True, sum_ef V(efab) x(ef...),
+    for either a dense vvvv array or a Cholesky-represented block."""
+    if isinstance(vvvv, CholeskyVVVV):
+        return vvvv.contract(x, bra=bra)
+    if bra:
+        return np.einsum("efab,ef...->ab...", vvvv, x, optimize=True)
+    return np.einsum("abef,ef...->ab...", vvvv, x, optimize=True)
+
+
+def contract_vvvv_r2(vvvv, r2, rank=4):
+    """Computes sum_ef V(abef) r(ef...) for an r2 block of the given rank (4 for r(efij),
+    3 for the 2p-1h r(efj) of EA-EOMCC) that may carry a leading index running over the
+    trial vectors of an OperatorBlock, which is moved behind the occupied indices since
+    contract_vvvv sums over the two leading indices."""
+    if r2.ndim == rank:
+        return contract_vvvv(vvvv, r2)
+    return np.moveaxis(contract_vvvv(vvvv, np.moveaxis(r2, 0, -1)), -1, 0)
+
+
+def contract_vvvv_t1(vvvv, t1, position):
+    """Computes sum_f V(abfe) t(fi) -> (abie) for position=2 or
+    sum_f V(abef) t(fi) -> (abei) for position=3."""
+    if isinstance(vvvv, CholeskyVVVV):
+        return vvvv.contract_t1(t1, position)
+    if position == 2:
+        return np.einsum("abfe,fi->abie", vvvv, t1, optimize=True)
+    return np.einsum("abef,fi->abei", vvvv, t1, optimize=True)
+
+
+class AntisymmetrizedTwobody:
+    """Antisymmetrized twobody matrix <pq||rs> = <pq|rs> - <pq|sr> that is never stored.
+    Indexing it with a tuple of four slices returns the antisymmetrized slice of e2int,
+    so that lazily sorted blocks can be built without the full same-spin matrices."""
+    def __init__(self, e2int):
+        self.e2int = e2int
 
-    return Integral(system, 2, {**onebody, **twobody}, sorted=sorted)
+    @property
+    def shape(self):
+        return self.e2int.shape
 
+    @property
+    def dtype(self):
+        return self.e2int.dtype
 
-def build_v(e2int):
+    def __getitem__(self, key):
+        p, q, r, s = key
+        return self.e2int[p, q, r, s] - self.e2int[p, q, s, r].transpose(0, 1, 3, 2)
+
+
+def build_v(e2int, restricted=False, lazy=False):
     """Generate the antisymmetrized version of the twobody matrix.
 
     Parameters
     ----------
     e2int : ndarray(dtype=float, shape=(norb,norb,norb,norb))
         Twobody MO integral array
+    restricted : bool
+        If True, v['bb'] is the same array as v['aa']
+    lazy : bool
+        If True, v['aa'] and v['bb'] are AntisymmetrizedTwobody views of e2int
+        that only form the slices they are indexed with
 
     Returns
     -------
@@ -148,15 +955,21 @@ def build_v(e2int):
         Dictionary with v['A'], v['B'], and v['C'] containing the
         antisymmetrized twobody MO integrals.
     """
+    if lazy:
+        v_same_spin = AntisymmetrizedTwobody(e2int)
+        return {"aa": v_same_spin, "ab": e2int, "bb": v_same_spin}
     v = {
         "aa": e2int - np.einsum("pqrs->pqsr", e2int),
         "ab": e2int,
-        "bb": e2int - np.einsum("pqrs->pqsr", e2int),
     }
+    if restricted:
+        v["bb"] = v["aa"]
+    else:
+        v["bb"] = e2int - np.einsum("pqrs->pqsr", e2int)
     return v
 
 
-def build_f(e1int, v, system):
+def build_f(e1int, v, system, restricted=False):
     """This function generates the Fock matrix using the formula
     F = Z + G where G is \sum_{i} <pi|v|qi>_A split for different
     spin cases.
@@ -169,6 +982,8 @@ def build_f(e1int, v, system):
         Twobody integral dictionary
     sys : dict
         System information dictionary
+    restricted : bool
+        If True, f['b'] is the same array as f['a']
 
     Returns
     -------
@@ -186,13 +1001,37 @@ def build_f(e1int, v, system):
     )
 
     # <p~|f|q~> = <p~|z|q~> + <p~i~|v|q~i~> + <ip~|v|iq~>
-    f_b = (
-        e1int
-        + np.einsum("piqi->pq", v["bb"][:, :Nocc_b, :, :Nocc_b])
-        + np.einsum("ipiq->pq", v["ab"][:Nocc_a, :, :Nocc_a, :])
-    )
+    if restricted:
+        f_b = f_a
+    else:
+        f_b = (
+            e1int
+            + np.einsum("piqi->pq", v["bb"][:, :Nocc_b, :, :Nocc_b])
+            + np.einsum("ipiq->pq", v["ab"][:Nocc_a, :, :Nocc_a, :])
+        )
 
     f = {"a": f_a, "b": f_b}
 
     return f
 
+
+
+def build_f_cholesky(e1int, R_chol, system):
+    """Generate the Fock matrices F = Z + G directly from the Cholesky vectors, where
+    <pi|v|qi> = sum_x R(x|pq) R(x|ii) and <pi|v|iq> = sum_x R(x|pi) R(x|iq)."""
+    Nocc_a = system.noccupied_alpha + system.nfrozen
+    Nocc_b = system.noccupied_beta + system.nfrozen
+
+    # total Coulomb potential of the occupied alpha and beta orbitals
+    J = (
+        np.einsum("xii->x", R_chol[:, :Nocc_a, :Nocc_a])
+        + np.einsum("xii->x", R_chol[:, :Nocc_b, :Nocc_b])
+    )
+    f_coulomb = e1int + np.einsum("x,xpq->pq", J, R_chol, optimize=True)
+
+    f_a = f_coulomb - np.einsum("xpi,xiq->pq", R_chol[:, :, :Nocc_a], R_chol[:, :Nocc_a, :], optimize=True)
+    f_b = f_coulomb - np.einsum("xpi,xiq->pq", R_chol[:, :, :Nocc_b], R_chol[:, :Nocc_b, :], optimize=True)
+
+    f = {"a": f_a, "b": f_b}
+
+    return f
@@ -1,7 +1,5 @@
 import numpy as np
 
-# [TODO]: Allow Cluster Operators to load in the values from another Cluster Operator of lower rank (or different P space)
-
 class PspaceOperator:
 
     def __init__(self, n_amps, data_type=np.float64):
@@ -14,7 +12,109 @@ class PspaceOperator:
     def flatten(self):
         return self.amplitudes
 
-class ActiveOperator:
+class ContiguousOperator:
+    """Base class for operators whose amplitude blocks are views into a single contiguous
+    buffer, laid out in the same order as the vector returned by flatten(). Each block is
+    a Fortran-ordered view of its segment of the buffer, so that the flattened vector is the
+    concatenation of the Fortran-order (column-major) flattened blocks, and the blocks are
+    passed to and returned from the Fortran update kernels without copies.
+
+    flatten() returns a read-only view of the buffer (no copy), which changes whenever the
+    amplitudes change; copy it to keep the current amplitudes. buffer() returns the writable
+    buffer itself for callers that intend to update the amplitudes through the flattened
+    vector. unflatten() copies into the buffer in place; vectors whose blocks are flattened in
+    C order (e.g., the CI guess vectors) are unflattened with layout="C". Assigning an array of
+    the same shape to a block copies it into the block's view, unless it is the view itself, as
+    returned by the Fortran kernels that update their arguments in place. Blocks replaced by arrays of a
+    different shape (e.g., an extended P space) are gathered into a new buffer on the
+    next call to flatten() or buffer()."""
+
+    def get_block_names(self):
+        return self.spin_cases
+
+    def allocate_buffer(self, data_type=None):
+        """Gathers all blocks into a new contiguous buffer and makes the blocks views into it."""
+        names = self.get_block_names()
+        blocks = [self.__dict__[name] for name in names]
+        if data_type is None:
+            data_type = np.result_type(*blocks)
+        buffer = np.empty(sum(block.size for block in blocks), dtype=data_type)
+        views = {}
+        prev = 0
+        for name, block in zip(names, blocks):
+            view = buffer[prev : prev + block.size].reshape(block.shape, order="F")
+            view[...] = block
+            views[name] = view
+            self.__dict__[name] = view
+            prev += block.size
+        flat = buffer.view()
+        flat.flags.writeable = False
+        self.__dict__["_buffer"] = buffer
+        self.__dict__["_flat"] = flat
+        self.__dict__["_views"] = views
+
+    def is_contiguous(self):
+        buffer = self.__dict__.get("_buffer")
+        if buffer is None:
+            return False
+        views = self.__dict__["_views"]
+        # the views are no longer backed by the buffer after, e.g., a deepcopy
+        return all(self.__dict__[name] is views[name] and views[name].base is buffer
+                   for name in self.get_block_names())
+
+    def __setattr__(self, name, value):
+        views = self.__dict__.get("_views")
+        if views is not None and name in views and isinstance(value, np.ndarray):
+            view = views[name]
+            if value is view:
+                return
+            if value.shape == view.shape and self.__dict__[name] is view:
+                view[...] = value
+                return
+        self.__dict__[name] = value
+
+    def flatten(self):
+        """Returns a read-only view of the amplitude buffer."""
+        if not self.is_contiguous():
+            self.allocate_buffer()
+        return self._flat
+
+    def buffer(self):
+        """Returns the writable amplitude buffer; writing into it updates the blocks."""
+        if not self.is_contiguous():
+            self.allocate_buffer()
+        return self._buffer
+
+    def unflatten(self, T_flat, order=0, layout="F"):
+        # allows unflattening of up to a specified order which may be less than
+        # the order of the operator.
+        if order == 0: order = self.order
+
+        names = [name for name in self.get_block_names() if len(name) <= order]
+        sizes = [int(np.prod(dims)) for dims, name in zip(self.dimensions, self.get_block_names()) if len(name) <= order]
+        if not self.is_contiguous():
+            self.allocate_buffer()
+        if layout == "C":
+            # each block is copied into its view by __setattr__
+            prev = 0
+            for name, size, dims in zip(names, sizes, self.dimensions):
+                setattr(self, name, np.reshape(T_flat[prev : prev + size], dims))
+                prev += size
+            return
+        if any(size != self._views[name].size for name, size in zip(names, sizes)):
+            # block shapes no longer match the operator dimensions (e.g., empty P spaces)
+            prev = 0
+            for name, size, dims in zip(names, sizes, self.dimensions):
+                self.__dict__[name] = np.reshape(T_flat[prev : prev + size], dims, order="F")
+                prev += size
+            return
+        if T_flat.dtype != self._buffer.dtype:
+            self.allocate_buffer(T_flat.dtype)
+        n = sum(sizes)
+        if T_flat is not self._buffer and T_flat is not self._flat:
+            self._buffer[:n] = T_flat[:n]
+
+class ActiveOperator(ContiguousOperator):
 
     def __init__(self, system, order, spincase, num_active, matrix=None, data_type=np.float64):
         self.order = order
@@ -57,7 +157,10 @@ class ActiveOperator:
                             self.dimensions.append(dimensions)
                             self.ndim += np.prod(dimensions)
                             setattr(self, temp, np.zeros(dimensions, dtype=data_type, order="F"))
+        self.allocate_buffer()
 
+    def get_block_names(self):
+        return self.slices
 
     def get_hole_combinations(self, n):
         combs = []
@@ -77,19 +180,11 @@ class ActiveOperator:
             combs.append(temp)
         return combs
 
-    def flatten(self):
-        return np.hstack(
-            [getattr(self, key).flatten() for key in self.slices]
-        )
-
-    def unflatten(self, T_flat):
-        prev = 0
-        for dims, name in zip(self.dimensions, self.slices):
-            ndim = np.prod(dims)
-            setattr(self, name, np.reshape(T_flat[prev : ndim + prev], dims))
-            prev += ndim
+    def unflatten(self, T_flat, layout="F"):
+        # block names carry one index label per particle and hole
+        super().unflatten(T_flat, order=2 * self.order, layout=layout)
 
-class ClusterOperator:
+class ClusterOperator(ContiguousOperator):
     def __init__(self, system, order, p_orders=[None], pspace_sizes=[None], active_orders=[None], num_active=[None], data_type=np.float64):
         self.order = order
         self.spin_cases = []
@@ -139,6 +234,10 @@ class ClusterOperator:
                 self.spin_cases.append(name)
 
         self.ndim = ndim
+        # operators with active-space blocks keep the blocks in their own ActiveOperator buffers
+        self.has_active_blocks = any(isinstance(getattr(self, name), ActiveOperator) for name in self.spin_cases)
+        if not self.has_active_blocks:
+            self.allocate_buffer()
 
     def extend_pspace_t3_operator(self, excitation_count_spincase):
         assert len(excitation_count_spincase) == 4
@@ -150,12 +249,46 @@ class ClusterOperator:
                 self.dimensions[i + 5] = (num_old + num_extend,)
                 self.ndim += num_extend
 
+    def load_from(self, other, excitations=None, other_excitations=None):
+        """Initializes the amplitudes from another cluster operator, e.g., the solution of a
+        calculation of lower rank or in a different P space. Blocks of the same spin case and
+        shape are copied, and if the P-space excitations of both operators are given, the P-space
+        amplitudes are mapped by excitation. All other amplitudes are left unchanged."""
+        for name in self.spin_cases:
+            if name not in other.spin_cases:
+                continue
+            block = getattr(self, name)
+            other_block = getattr(other, name)
+            if not isinstance(block, np.ndarray) or not isinstance(other_block, np.ndarray):
+                continue
+            if (excitations is not None and other_excitations is not None and name in excitations
+                    and block.ndim == 1 and other_block.ndim == 1):
+                idx, other_idx = get_excitation_map(excitations[name][:block.shape[0]],
+                                                    other_excitations[name][:other_block.shape[0]])
+                block[idx] = other_block[other_idx]
+            elif block.shape == other_block.shape:
+                block[...] = other_block
+
     def flatten(self):
+        if not self.has_active_blocks:
+            return super().flatten()
         return np.hstack(
-            [getattr(self, key).flatten() for key in self.spin_cases]
+            [getattr(self, key).flatten() if isinstance(getattr(self, key), ActiveOperator)
+             else getattr(self, key).flatten(order="F") for key in self.spin_cases]
         )
 
-    def unflatten(self, T_flat, order=0):
+    def buffer(self):
+        # operators with active-space blocks have no single buffer, so a writable copy is
+        # returned whose changes must be written back with unflatten()
+        if not self.has_active_blocks:
+            return super().buffer()
+        return self.flatten()
+
+    def unflatten(self, T_flat, order=0, layout="F"):
+        if not self.has_active_blocks:
+            super().unflatten(T_flat, order, layout)
+            return
+
         prev = 0
 
         # allows unflattening of up to a specified order which may be less than
@@ -167,19 +300,14 @@ class ClusterOperator:
             if len(name) > order: continue
 
             if isinstance(getattr(self, name), ActiveOperator):
-                getattr(self, name).unflatten(T_flat[prev : prev + getattr(self, name).ndim])
+                getattr(self, name).unflatten(T_flat[prev : prev + getattr(self, name).ndim], layout=layout)
                 prev += getattr(self, name).ndim
-            # Developing for the PspaceOperator
-            #elif isinstance(getattr(self, name), ActiveOperator):
-            #    ndim = np.prod(dims)
-            #    setattr(getattr(self, name), "amplitudes", np.reshape(T_flat[prev: ndim + prev], dims))
-            #    prev += ndim
             else:
                 ndim = np.prod(dims)
-                setattr(self, name, np.reshape(T_flat[prev: ndim + prev], dims))
+                setattr(self, name, np.reshape(T_flat[prev: ndim + prev], dims, order=layout))
                 prev += ndim
 
-class FockOperator:
+class FockOperator(ContiguousOperator):
     """Builds generalized particle-nonconserving operators of the EA/IP-type and
     higher-order extensions, such as DEA/DIP, etc.
     Naming convention goes as follows:
@@ -257,28 +385,9 @@ class FockOperator:
                     ndim += np.prod(dimensions)
 
         self.ndim = ndim
+        self.allocate_buffer()
 
-    def flatten(self):
-        return np.hstack(
-            [getattr(self, key).flatten() for key in self.spin_cases]
-        )
-
-    def unflatten(self, T_flat, order=0):
-        prev = 0
-
-        # allows unflattening of up to a specified order which may be less than
-        # the order of the cluster operator.
-        if order == 0: order = self.order
-
-        for dims, name in zip(self.dimensions, self.spin_cases):
-
-            if len(name) > order: continue
-
-            ndim = np.prod(dims)
-            setattr(self, name, np.reshape(T_flat[prev: ndim + prev], dims))
-            prev += ndim
-
-class SpinFlipOperator:
+class SpinFlipOperator(ContiguousOperator):
     """Builds generalized alpha-to-beta spin-flipping operators"""
     def __init__(self, system, order, Ms, data_type=np.float64):
         self.Ms = Ms
@@ -321,26 +430,45 @@ class SpinFlipOperator:
             self.ndim = 0
             for dim in self.dimensions:
                 self.ndim += np.prod(dim)
+            self.allocate_buffer()
+
+class OperatorBlock:
+    """Block of nvec operators with the same amplitude blocks as a given operator, where
+    each block carries a leading index running over the operators, e.g., R.aa[k, a, b, i, j]
+    is the aa block of the k-th operator. It is used to apply HBar to several trial vectors
+    at once (see ccpy.eomcc.BLOCK_HR_MODULES). The flattened form is a 2D array
+    whose rows are the flattened operators, with the blocks in Fortran order as in
+    ContiguousOperator."""
+    def __init__(self, operator, nvec):
+        self.order = operator.order
+        self.nvec = nvec
+        self.ndim = operator.ndim
+        self.spin_cases = list(operator.get_block_names())
+        self.dimensions = [getattr(operator, name).shape for name in self.spin_cases]
+        for name, dims in zip(self.spin_cases, self.dimensions):
+            setattr(self, name, np.zeros((nvec,) + dims, dtype=getattr(operator, name).dtype))
+
+    def get_block_names(self):
+        return self.spin_cases
 
     def flatten(self):
-        return np.hstack(
-            [getattr(self, key).flatten() for key in self.spin_cases]
-        )
+        return np.hstack([np.reshape(getattr(self, name), (self.nvec, -1), order="F") for name in self.spin_cases])
 
-    def unflatten(self, T_flat, order=0):
+    def unflatten(self, T_flat):
         prev = 0
-
-        # allows unflattening of up to a specified order which may be less than
-        # the order of the cluster operator.
-        if order == 0: order = self.order
-
-        for dims, name in zip(self.dimensions, self.spin_cases):
-
-            if len(name) > order: continue
-
-            ndim = np.prod(dims)
-            setattr(self, name, np.reshape(T_flat[prev: ndim + prev], dims))
-            prev += ndim
+        for name, dims in zip(self.spin_cases, self.dimensions):
+            size = int(np.prod(dims))
+            setattr(self, name, np.reshape(T_flat[:, prev : prev + size], (self.nvec,) + dims, order="F"))
+            prev += size
+
+def get_excitation_map(excitations, other_excitations):
+    """Returns the positions of the excitations (rows) common to both arrays in excitations
+    and in other_excitations."""
+    def as_rows(x):
+        x = np.ascontiguousarray(x, dtype=np.int64)
+        return x.view(np.dtype((np.void, x.dtype.itemsize * x.shape[1]))).ravel()
+    _, idx, other_idx = np.intersect1d(as_rows(excitations), as_rows(other_excitations), return_indices=True)
+    return idx, other_idx
 
 def get_operator_name(i, j):
     return "a" * (i - j) + "b" * j
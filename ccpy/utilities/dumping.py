@@ -1,22 +1,20 @@
-def dumpIntegralstoPGFiles(e1int, e2int, system):
+import numpy as np
 
+def dumpIntegralstoPGFiles(e1int, e2int, system):
+    """Writes the onebody.inp and twobody.inp text files. Each file is written with
+    one formatted call per block of rows rather than one per integral. For a reusable
+    binary copy of the integrals, see ccpy.interfaces.checkpoint_tools.dump_checkpoint."""
     norbitals = e1int.shape[0]
+    idx = np.tril_indices(norbitals)
     with open("onebody.inp", "w") as f:
-        ct = 1
-        for i in range(norbitals):
-            for j in range(i + 1):
-                f.write("   {:>.11f}    {}\n".format(e1int[i, j], ct))
-                ct += 1
+        np.savetxt(f, np.column_stack((e1int[idx], np.arange(1, len(idx[0]) + 1))), fmt="   %.11f    %d")
     with open("twobody.inp", "w") as f:
+        # rows run over i, k, j, l (slowest to fastest) and list i, j, k, l, e2int[i, j, k, l]
+        jkl = np.indices((norbitals,) * 3).transpose(0, 2, 1, 3).reshape(3, -1).T + 1
         for i in range(norbitals):
-            for k in range(norbitals):
-                for j in range(norbitals):
-                    for l in range(norbitals):
-                        f.write(
-                            "    {}    {}    {}    {}       {:.11f}\n".format(
-                                i + 1, j + 1, k + 1, l + 1, e2int[i, j, k, l]
-                            )
-                        )
+            vals = e2int[i, :, :, :].transpose(1, 0, 2).reshape(-1)
+            rows = np.column_stack((np.full(len(vals), i + 1), jkl, vals))
+            np.savetxt(f, rows, fmt="    %d    %d    %d    %d       %.11f")
         f.write(
             "    {}    {}    {}    {}        {:.11f}\n".format(
                 0, 0, 0, 0, system.nuclear_repulsion
@@ -27,6 +25,9 @@ def dumpIntegralstoPGFiles(e1int, e2int, system):
 
 def dumpPBCIntegralstoPGFiles(e1int, e2int, system):
 
+    if hasattr(e2int, "to_dense"):
+        # k-point blocked integrals (KBlockIntegral)
+        e2int = e2int.to_dense()
     nkpts = e1int.shape[0]
     norbitals = e1int.shape[2]
     with open("onebody.inp", "w") as f:
@@ -0,0 +1,72 @@
+"""Storage for the stacks of vectors kept by the iterative solvers (DIIS and Davidson)."""
+import mmap
+import os
+import tempfile
+import weakref
+
+import numpy as np
+
+from ccpy.utilities.utilities import remove_file
+
+
+class VectorStore:
+    """Fixed number of rows of length ndim held either in memory or, if out_of_core=True,
+    in a memory-mapped scratch file. Each store gets its own scratch file, created with a
+    unique name in scratch_directory (the current working directory by default), so that
+    concurrent calculations in the same directory do not overwrite each other's vectors.
+    The file is removed by cleanup() or, at the latest, when the store is garbage collected.
+    Rows are accessed with the usual ndarray indexing, e.g., store[i, :] or store[:n, :]."""
+    def __init__(self, nrows, ndim, out_of_core=False, scratch_directory=None, prefix="ccpy-vectors", data_type=np.float64):
+        self.out_of_core = out_of_core
+        self.filename = None
+        if self.out_of_core:
+            if scratch_directory is None:
+                scratch_directory = os.getcwd()
+            fd, self.filename = tempfile.mkstemp(prefix=prefix + "-", suffix=".dat", dir=scratch_directory)
+            # the file is mapped with mmap directly so that the mapping can be passed to madvise
+            nbytes = nrows * ndim * np.dtype(data_type).itemsize
+            os.ftruncate(fd, max(nbytes, 1))
+            self._mmap = mmap.mmap(fd, max(nbytes, 1))
+            os.close(fd)
+            self.data = np.ndarray((nrows, ndim), dtype=data_type, buffer=self._mmap)
+            self._finalizer = weakref.finalize(self, remove_file, self.filename)
+        else:
+            self.data = np.zeros((nrows, ndim), dtype=data_type)
+
+    @property
+    def shape(self):
+        return self.data.shape
+
+    def __getitem__(self, key):
+        return self.data[key]
+
+    def __setitem__(self, key, value):
+        self.data[key] = value
+
+    def prefetch(self, rows):
+        """Advises the operating system with madvise(MADV_WILLNEED) that the given rows of an
+        out-of-core store will be needed soon. The call is synchronous and only a hint: it
+        returns once the advice is given, and whether the pages are read ahead of their first
+        access is up to the kernel. This is a no-op for in-core stores and on platforms
+        without madvise."""
+        if not self.out_of_core or not hasattr(mmap, "MADV_WILLNEED"):
+            return
+        row_bytes = self.data.shape[1] * self.data.itemsize
+        for row in np.atleast_1d(rows):
+            if row >= self.data.shape[0]:
+                continue
+            start = int(row) * row_bytes
+            # madvise requires a page-aligned start address
+            aligned_start = start - start % mmap.PAGESIZE
+            self._mmap.madvise(mmap.MADV_WILLNEED, aligned_start, start + row_bytes - aligned_start)
+
+    def cleanup(self):
+        if self.out_of_core:
+            self._mmap.flush()
+            self.data = None
+            try:
+                self._mmap.close()
+            except BufferError:
+                # rows are still viewed elsewhere; the mapping is closed when they are released
+                pass
+            self._finalizer()
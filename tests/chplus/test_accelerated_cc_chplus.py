@@ -0,0 +1,47 @@
+"""CCSD and CCSDT computations for the CH+ molecule at R = Re, where
+Re = 2.13713 bohr described using the Olsen basis set, using the KAIN
+and damped Anderson convergence accelerators instead of DIIS."""
+
+from pathlib import Path
+import numpy as np
+from ccpy.drivers.driver import Driver
+
+TEST_DATA_DIR = str(Path(__file__).parents[1].absolute() / "data")
+
+def test_kain_ccsd_chplus():
+
+    driver = Driver.from_gamess(
+        logfile=TEST_DATA_DIR + "/chplus/chplus.log",
+        fcidump=TEST_DATA_DIR + "/chplus/chplus.FCIDUMP",
+        nfrozen=0,
+    )
+    driver.system.print_info()
+    driver.options["acceleration"] = "kain"
+    driver.run_cc(method="ccsd")
+
+    # Check reference energy
+    assert np.allclose(driver.system.reference_energy, -37.9027681837, atol=1.0e-07)
+    # Check CCSD energy
+    assert np.allclose(driver.correlation_energy, -0.11490198, atol=1.0e-07)
+    assert np.allclose(
+        driver.system.reference_energy + driver.correlation_energy, -38.01767017, atol=1.0e-07
+    )
+
+def test_anderson_ccsdt_chplus():
+
+    driver = Driver.from_gamess(
+        logfile=TEST_DATA_DIR + "/chplus/chplus.log",
+        fcidump=TEST_DATA_DIR + "/chplus/chplus.FCIDUMP",
+        nfrozen=0,
+    )
+    driver.system.print_info()
+    driver.options["acceleration"] = "anderson"
+    driver.options["anderson_damping"] = 0.7
+    driver.run_cc(method="ccsdt")
+
+    # Check CCSDT energy
+    assert np.allclose(driver.correlation_energy, -0.11674744, atol=1.0e-07)
+
+if __name__ == "__main__":
+    test_kain_ccsd_chplus()
+    test_anderson_ccsdt_chplus()
@@ -0,0 +1,54 @@
+"""CR-EOMCC(2,3) computation for the CH+ molecule at R = Re, where
+Re = 2.13713 bohr described using the Olsen basis set, in which the
+right and left EOMCCSD eigenvectors of each state are obtained
+simultaneously with the biorthogonal Davidson solver."""
+
+from pathlib import Path
+import numpy as np
+from ccpy.drivers.driver import Driver
+
+TEST_DATA_DIR = str(Path(__file__).parents[1].absolute() / "data")
+
+def test_biorthogonal_creom23_chplus():
+
+    driver = Driver.from_gamess(
+        logfile=TEST_DATA_DIR + "/chplus/chplus.log",
+        fcidump=TEST_DATA_DIR + "/chplus/chplus.FCIDUMP",
+        nfrozen=0,
+    )
+    driver.system.print_info()
+    driver.options["RHF_symmetry"] = False
+    driver.options["davidson_max_subspace_size"] = 50
+    driver.run_cc(method="ccsd")
+    driver.run_hbar(method="ccsd")
+    driver.run_leftcc(method="left_ccsd", state_index=[0])
+    driver.run_guess(method="cis", multiplicity=1, roots_per_irrep={"A1": 3, "B1": 2})
+    driver.run_biorthogonal_eomcc(method="eomccsd", state_index=[1, 3, 4, 5])
+    driver.run_ccp3(method="crcc23", state_index=[0, 1, 3, 4, 5])
+
+    expected_vee = [0.0, 0.49906873, 0.0, 0.63633490, 0.11982887, 0.53118318]
+    expected_deltap3 = {
+        "A": [-0.0013798405, -0.0021697718, 0.0, -0.0032097085, -0.0016296078, -0.0045706983],
+        "D": [-0.0017825588, -0.0030686698, 0.0, -0.0045827171, -0.0022877876, -0.0088507112],
+    }
+    expected_ddeltap3 = {
+        "A": [0.0, -0.0022291593, 0.0, -0.0033071442, -0.0016296078, -0.0045706983],
+        "D": [0.0, -0.0031525794, 0.0, -0.0047158142, -0.0022877876, -0.0088507112],
+    }
+
+    # Check reference energy
+    assert np.allclose(driver.system.reference_energy, -37.9027681837, atol=1.0e-07)
+    # Check CCSD energy
+    assert np.allclose(driver.correlation_energy, -0.11490198, atol=1.0e-07)
+    for n in [0, 1, 3, 4, 5]:
+        # Check EOMCCSD energy
+        assert np.allclose(driver.vertical_excitation_energy[n], expected_vee[n], atol=1.0e-07)
+        # Check CR-CC(2,3)_A and CR-CC(2,3)_D energies
+        assert np.allclose(driver.deltap3[n]["A"], expected_deltap3["A"][n], atol=1.0e-07)
+        assert np.allclose(driver.deltap3[n]["D"], expected_deltap3["D"][n], atol=1.0e-07)
+        if n > 0:
+            assert np.allclose(driver.ddeltap3[n]["A"], expected_ddeltap3["A"][n], atol=1.0e-07)
+            assert np.allclose(driver.ddeltap3[n]["D"], expected_ddeltap3["D"][n], atol=1.0e-07)
+
+if __name__ == "__main__":
+    test_biorthogonal_creom23_chplus()
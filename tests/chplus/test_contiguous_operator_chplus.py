@@ -0,0 +1,65 @@
+"""Flattening and unflattening of the contiguous T operator of CCSD for the
+CH+ molecule at R = Re, where Re = 2.13713 bohr described using the Olsen
+basis set."""
+
+from pathlib import Path
+import numpy as np
+from ccpy.drivers.driver import Driver
+from ccpy.models.operators import ClusterOperator
+from ccpy.utilities.updates import cc_loops2
+
+TEST_DATA_DIR = str(Path(__file__).parents[1].absolute() / "data")
+
+def test_contiguous_operator_chplus():
+
+    driver = Driver.from_gamess(
+        logfile=TEST_DATA_DIR + "/chplus/chplus.log",
+        fcidump=TEST_DATA_DIR + "/chplus/chplus.FCIDUMP",
+        nfrozen=0,
+    )
+    T = ClusterOperator(driver.system, order=2)
+    x = np.random.default_rng(0).standard_normal(T.ndim)
+
+    # Check the round trip and that the flattened vector is the concatenation of the Fortran-ordered blocks
+    T.unflatten(x)
+    assert np.array_equal(T.flatten(), x)
+    assert np.array_equal(np.hstack([getattr(T, name).flatten(order="F") for name in T.spin_cases]), x)
+    offset = T.a.size + T.b.size + T.aa.size
+    assert np.array_equal(T.ab, np.reshape(x[offset : offset + T.ab.size], T.ab.shape, order="F"))
+    assert all(getattr(T, name).flags.f_contiguous for name in T.spin_cases)
+
+    # Check that vectors of C-ordered blocks, such as the CI guess vectors, are unflattened block by block
+    T.unflatten(np.hstack([getattr(T, name).flatten(order="C") for name in T.spin_cases]), layout="C")
+    assert np.array_equal(T.flatten(), x)
+
+    # Check that flatten() is a read-only view of the amplitudes
+    flat = T.flatten()
+    assert np.shares_memory(flat, T.aa)
+    try:
+        flat *= 2.0
+        raise AssertionError("flatten() returned a writable vector")
+    except ValueError:
+        pass
+    saved = T.flatten().copy()
+    T.unflatten(2.0 * x)
+    assert np.array_equal(flat, 2.0 * x)
+    assert np.array_equal(saved, x)
+
+    # Check that writing into buffer() and assigning a block update the amplitudes
+    T.buffer()[:] = x
+    assert np.array_equal(T.flatten(), x)
+    T.a = np.zeros(T.a.shape, order="F")
+    assert not np.any(T.flatten()[:T.a.size])
+    assert np.array_equal(T.flatten()[T.a.size:], x[T.a.size:])
+
+    # Check that the Fortran kernels update the T3 blocks in place without copying them
+    T = ClusterOperator(driver.system, order=3)
+    T.unflatten(x[:1] * np.ones(T.ndim))
+    t3a = T.aaa
+    X3A = np.random.default_rng(1).standard_normal(T.aaa.shape)
+    T.aaa, _ = cc_loops2.cc_loops2.update_t3a_v2(T.aaa, X3A, driver.hamiltonian.a.oo, driver.hamiltonian.a.vv, 0.0)
+    assert T.aaa is t3a
+    assert T.is_contiguous()
+
+if __name__ == "__main__":
+    test_contiguous_operator_chplus()
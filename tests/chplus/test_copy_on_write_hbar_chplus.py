@@ -0,0 +1,43 @@
+"""CR-CC(2,3) computation for the CH+ molecule at R = Re, where the bare
+Hamiltonian is kept alongside the copy-on-write CCSD HBar, which shares
+the blocks it does not transform with the bare Hamiltonian, where
+Re = 2.13713 bohr described using the Olsen basis set."""
+
+from copy import deepcopy
+from pathlib import Path
+import numpy as np
+from ccpy.drivers.driver import Driver
+
+TEST_DATA_DIR = str(Path(__file__).parents[1].absolute() / "data")
+
+def test_copy_on_write_hbar_chplus():
+
+    driver = Driver.from_gamess(
+        logfile=TEST_DATA_DIR + "/chplus/chplus.log",
+        fcidump=TEST_DATA_DIR + "/chplus/chplus.FCIDUMP",
+        nfrozen=0,
+    )
+    driver.system.print_info()
+    driver.options["keep_bare_hamiltonian"] = True
+    driver.run_cc(method="ccsd")
+    H0 = deepcopy(driver.hamiltonian)
+    driver.run_hbar(method="ccsd")
+    driver.run_leftcc(method="left_ccsd")
+    driver.run_ccp3(method="crcc23")
+
+    # Check that the bare Hamiltonian is unchanged and shares the untransformed blocks with HBar
+    for name in H0.get_spin_cases():
+        for block in getattr(H0, name).slices:
+            assert np.array_equal(getattr(getattr(driver.bare_hamiltonian, name), block), getattr(getattr(H0, name), block))
+    assert np.shares_memory(driver.hamiltonian.aa.oovv, driver.bare_hamiltonian.aa.oovv)
+    assert not np.shares_memory(driver.hamiltonian.aa.vvvv, driver.bare_hamiltonian.aa.vvvv)
+
+    # Check CCSD energy
+    assert np.allclose(driver.correlation_energy, -0.11490198, atol=1.0e-07)
+    # Check CR-CC(2,3)_D energy
+    assert np.allclose(
+        driver.system.reference_energy + driver.correlation_energy + driver.deltap3[0]["D"], -38.01945272, atol=1.0e-07
+    )
+
+if __name__ == "__main__":
+    test_copy_on_write_hbar_chplus()
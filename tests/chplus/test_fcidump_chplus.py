@@ -0,0 +1,41 @@
+"""CCSD computation for the CH+ molecule at R = Re using integrals that
+are written to and re-read from an FCIDUMP file with its binary cache,
+where Re = 2.13713 bohr described using the Olsen basis set."""
+
+import os
+import tempfile
+from pathlib import Path
+import numpy as np
+from ccpy.drivers.driver import Driver
+from ccpy.interfaces.fcidump_tools import load_integrals_from_fcidump, write_fcidump
+
+TEST_DATA_DIR = str(Path(__file__).parents[1].absolute() / "data")
+
+def test_fcidump_chplus():
+
+    e1int, e2int, e_nn = load_integrals_from_fcidump(TEST_DATA_DIR + "/chplus/chplus.FCIDUMP", None)
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        fcidump = os.path.join(tmpdir, "chplus.FCIDUMP")
+        write_fcidump(fcidump, e1int, e2int, e_nn, nelectrons=6)
+        # First pass parses the FCIDUMP file and writes the cache; second pass reads the cache
+        for _ in range(2):
+            driver = Driver.from_gamess(
+                logfile=TEST_DATA_DIR + "/chplus/chplus.log",
+                fcidump=fcidump,
+                nfrozen=0,
+                cache_integrals=True,
+            )
+            assert os.path.exists(fcidump + ".npz")
+            driver.run_cc(method="ccsd")
+
+            # Check reference energy
+            assert np.allclose(driver.system.reference_energy, -37.9027681837, atol=1.0e-07)
+            # Check CCSD energy
+            assert np.allclose(driver.correlation_energy, -0.11490198, atol=1.0e-07)
+            assert np.allclose(
+                driver.system.reference_energy + driver.correlation_energy, -38.01767017, atol=1.0e-07
+            )
+
+if __name__ == "__main__":
+    test_fcidump_chplus()
@@ -0,0 +1,60 @@
+"""CCSD computation for the CH+ molecule at R = Re using lazily
+sorted integrals, where Re = 2.13713 bohr described using the Olsen basis set."""
+
+import tracemalloc
+from pathlib import Path
+import numpy as np
+from ccpy.drivers.driver import Driver
+from ccpy.drivers.memory_planner import get_array_memory
+from ccpy.interfaces.fcidump_tools import load_integrals_from_fcidump
+from ccpy.models.integrals import getHamiltonian
+
+TEST_DATA_DIR = str(Path(__file__).parents[1].absolute() / "data")
+
+def get_peak_memory(e1int, e2int, system, lazy):
+    """Returns the Hamiltonian and the peak memory (in bytes) allocated while building it."""
+    tracemalloc.start()
+    hamiltonian = getHamiltonian(e1int, e2int, system, normal_ordered=True, lazy=lazy)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return hamiltonian, peak
+
+def test_lazy_ccsd_chplus():
+
+    driver = Driver.from_gamess(
+        logfile=TEST_DATA_DIR + "/chplus/chplus.log",
+        fcidump=TEST_DATA_DIR + "/chplus/chplus.FCIDUMP",
+        nfrozen=0,
+        lazy_integrals=True,
+    )
+    driver.system.print_info()
+    # Only the Fock matrix blocks have been built at this point
+    assert not driver.hamiltonian.aa.is_built("vvvv")
+
+    # Check that the full antisymmetrized twobody matrices are never formed, so that building the
+    # lazy Hamiltonian allocates a small fraction of the memory of sorting all blocks
+    e1int, e2int, _ = load_integrals_from_fcidump(TEST_DATA_DIR + "/chplus/chplus.FCIDUMP", driver.system)
+    sorted_hamiltonian, sorted_peak = get_peak_memory(e1int, e2int, driver.system, lazy=False)
+    _, lazy_peak = get_peak_memory(e1int, e2int, driver.system, lazy=True)
+    assert lazy_peak < 0.1 * sorted_peak
+    sorted_bytes = get_array_memory(sorted_hamiltonian)
+    del sorted_hamiltonian, e1int, e2int
+
+    driver.run_cc(method="ccsd")
+    assert driver.hamiltonian.aa.is_built("vvvv")
+    driver.hamiltonian.print_memory_usage()
+    # The parent twobody matrix is released before HBar is built
+    driver.run_hbar(method="ccsd")
+    assert driver.hamiltonian.aa._parent is None
+    assert get_array_memory(driver.hamiltonian) <= sorted_bytes
+
+    # Check reference energy
+    assert np.allclose(driver.system.reference_energy, -37.9027681837, atol=1.0e-07)
+    # Check CCSD energy
+    assert np.allclose(driver.correlation_energy, -0.11490198, atol=1.0e-07)
+    assert np.allclose(
+        driver.system.reference_energy + driver.correlation_energy, -38.01767017, atol=1.0e-07
+    )
+
+if __name__ == "__main__":
+    test_lazy_ccsd_chplus()
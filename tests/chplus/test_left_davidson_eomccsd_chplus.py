@@ -0,0 +1,55 @@
+"""Left-EOMCCSD computation for the CH+ molecule at R = Re using the left
+Davidson solver, with the Ritz vectors written to and restarted from
+checkpoint files, where Re = 2.13713 bohr described using the Olsen basis set."""
+
+import os
+import tempfile
+from pathlib import Path
+import numpy as np
+from ccpy.drivers.driver import Driver
+from ccpy.energy.cc_energy import get_LR
+
+TEST_DATA_DIR = str(Path(__file__).parents[1].absolute() / "data")
+
+def test_left_davidson_eomccsd_chplus():
+
+    driver = Driver.from_gamess(
+        logfile=TEST_DATA_DIR + "/chplus/chplus.log",
+        fcidump=TEST_DATA_DIR + "/chplus/chplus.FCIDUMP",
+        nfrozen=0,
+    )
+    driver.system.print_info()
+    driver.options["RHF_symmetry"] = False
+    driver.run_cc(method="ccsd")
+    driver.run_hbar(method="ccsd")
+    driver.run_guess(method="cis", multiplicity=1, roots_per_irrep={"A1": 0, "B1": 2})
+    driver.run_eomcc(method="eomccsd", state_index=[1, 2])
+
+    # Left vectors from the default Jacobi solver
+    driver.run_leftcc(method="left_ccsd", state_index=[1, 2])
+    L_jacobi = [None] + [driver.L[i].flatten().copy() for i in [1, 2]]
+
+    with tempfile.TemporaryDirectory() as checkpoint:
+        driver.options["left_solver"] = "davidson"
+        driver.options["checkpoint_directory"] = checkpoint
+        driver.L[1], driver.L[2] = None, None
+        driver.run_leftcc(method="left_ccsd", state_index=[1, 2])
+        for i in [1, 2]:
+            assert os.path.exists(os.path.join(checkpoint, "left_ccsd_root{}.npz".format(i)))
+            # Check that L is biorthonormal to R and agrees with the Jacobi solution
+            assert np.allclose(get_LR(driver.R[i], driver.L[i]), 1.0, atol=1.0e-07)
+            assert np.allclose(driver.L[i].flatten(), L_jacobi[i], atol=1.0e-06)
+
+        # Restart from the converged Ritz vectors in the checkpoint files
+        driver.options["restart"] = True
+        driver.L[1], driver.L[2] = None, None
+        driver.run_leftcc(method="left_ccsd", state_index=[1, 2])
+        for i in [1, 2]:
+            assert np.allclose(driver.L[i].flatten(), L_jacobi[i], atol=1.0e-06)
+
+    # Check EOMCCSD energies
+    assert np.allclose(driver.vertical_excitation_energy[1], 0.11982887, atol=1.0e-07)
+    assert np.allclose(driver.vertical_excitation_energy[2], 0.53118318, atol=1.0e-07)
+
+if __name__ == "__main__":
+    test_left_davidson_eomccsd_chplus()
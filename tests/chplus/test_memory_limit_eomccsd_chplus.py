@@ -0,0 +1,107 @@
+""" EOMCCSD computation for the CH+ molecule at R = Re, where
+Re = 2.13713 bohr described using the Olsen basis set, run under memory
+limits that require the Davidson subspace to be reduced in size or to be
+stored on disk."""
+
+import tempfile
+from pathlib import Path
+import numpy as np
+from ccpy.drivers.driver import Driver
+
+TEST_DATA_DIR = str(Path(__file__).parents[1].absolute() / "data")
+
+def test_memory_limit_eomccsd_chplus():
+
+    expected_vee = [
+        0.0,
+        0.49906873,
+        0.65438776,
+        0.63633490,
+        0.11982887,
+        0.53118318,
+        0.11982887,
+        0.53118318
+    ]
+
+    # fraction of the in-core Davidson subspace that does not fit within the memory limit, the
+    # expected subspace size, and whether the subspace is expected to be stored on disk
+    for excess, subspace_size, out_of_core in [(0.5, 15, False), (0.9, 30, True)]:
+        driver = run_eomccsd_with_memory_limit(excess)
+
+        # Check that the Davidson subspace was halved or moved to disk
+        assert driver.options["davidson_out_of_core"] == out_of_core
+        assert driver.options["davidson_max_subspace_size"] == subspace_size
+
+        # Check CCSD energy
+        assert np.allclose(driver.correlation_energy, -0.11490198, atol=1.0e-07)
+        for n in range(1, 8):
+            # Check EOMCCSD energy
+            assert np.allclose(driver.vertical_excitation_energy[n], expected_vee[n], atol=1.0e-07)
+
+def run_eomccsd_with_memory_limit(excess):
+
+    with tempfile.TemporaryDirectory() as scratch:
+        driver = Driver.from_gamess(
+            logfile=TEST_DATA_DIR + "/chplus/chplus.log",
+            fcidump=TEST_DATA_DIR + "/chplus/chplus.FCIDUMP",
+            nfrozen=0,
+        )
+        driver.system.print_info()
+        driver.options["RHF_symmetry"] = False
+        driver.options["scratch_directory"] = scratch
+        driver.run_cc(method="ccsd")
+        driver.run_hbar(method="ccsd")
+        driver.run_guess(method="cis", multiplicity=1, roots_per_irrep={"A1": 3, "B1": 2, "B2": 2, "A2": 0})
+
+        # set the memory limit below the in-core memory plan of EOMCCSD by a fraction of the Davidson subspace
+        plan = driver.plan_memory("eomccsd", state_index=[1, 2, 3, 4, 5, 6, 7])
+        driver.options["memory_limit"] = (plan.total - excess * plan.components["Davidson subspace"]) / 1024**2
+        driver.run_eomcc(method="eomccsd", state_index=[1, 2, 3, 4, 5, 6, 7])
+
+    return driver
+
+def test_memory_plan_davidson_solvers_chplus():
+
+    driver = Driver.from_gamess(
+        logfile=TEST_DATA_DIR + "/chplus/chplus.log",
+        fcidump=TEST_DATA_DIR + "/chplus/chplus.FCIDUMP",
+        nfrozen=0,
+    )
+    driver.run_cc(method="ccsd")
+    state_index = [1, 2, 3]
+    standard = driver.plan_memory("eomccsd", state_index)
+    ndim = driver.get_operator_size("eomccsd")
+
+    # Check the Davidson subspace of the block solver, which holds max(subspace size, 3) vectors per root
+    driver.options["davidson_solver"] = "multiroot"
+    multiroot = driver.plan_memory("eomccsd", state_index)
+    assert multiroot.components["Davidson subspace"] == 2 * 3 * 30 * ndim * 8
+    # Check that the biorthogonal solver counts the right and left subspaces and the L vectors
+    biorthogonal = driver.plan_memory("eomccsd", state_index, solver="biorthogonal")
+    assert biorthogonal.components["Davidson subspace"] == 2 * standard.components["Davidson subspace"]
+    assert biorthogonal.components["L and LH"] == 4 * ndim * 8
+    # Check that the mixed-precision solver counts the single-precision copies of HBar and T
+    driver.options["davidson_solver"] = "standard"
+    driver.options["mixed_precision"] = True
+    mixed = driver.plan_memory("eomccsd", state_index)
+    assert mixed.components["Single-precision copies"] == (standard.components["Integrals"] + driver.T.ndim * 8) // 2
+
+def test_memory_limit_exceeded_chplus():
+
+    driver = Driver.from_gamess(
+        logfile=TEST_DATA_DIR + "/chplus/chplus.log",
+        fcidump=TEST_DATA_DIR + "/chplus/chplus.FCIDUMP",
+        nfrozen=0,
+    )
+    # the integrals alone do not fit within 1 MB
+    driver.options["memory_limit"] = 1.0
+    try:
+        driver.run_cc(method="ccsd")
+        raise AssertionError("CCSD did not stop at the memory limit")
+    except MemoryError:
+        pass
+
+if __name__ == "__main__":
+    test_memory_limit_eomccsd_chplus()
+    test_memory_plan_davidson_solvers_chplus()
+    test_memory_limit_exceeded_chplus()
@@ -0,0 +1,59 @@
+"""EOMCCSD computation for the CH+ molecule at R = Re using mixed-precision
+CC and Davidson iterations, where Re = 2.13713 bohr described using the
+Olsen basis set."""
+
+from pathlib import Path
+import numpy as np
+from ccpy.drivers.driver import Driver
+
+TEST_DATA_DIR = str(Path(__file__).parents[1].absolute() / "data")
+
+def test_mixed_precision_eomccsd_chplus():
+
+    driver = Driver.from_gamess(
+        logfile=TEST_DATA_DIR + "/chplus/chplus.log",
+        fcidump=TEST_DATA_DIR + "/chplus/chplus.FCIDUMP",
+        nfrozen=0,
+    )
+    driver.system.print_info()
+    driver.options["RHF_symmetry"] = False
+    driver.options["mixed_precision"] = True
+    driver.run_cc(method="ccsd")
+    driver.run_hbar(method="ccsd")
+    driver.run_guess(method="cis", multiplicity=1, roots_per_irrep={"A1": 0, "B1": 2})
+    # count the single-precision copies of HBar made for the two roots
+    hamiltonian_type = type(driver.hamiltonian)
+    astype = hamiltonian_type.astype
+    num_casts = []
+    def counting_astype(self, *args, **kwargs):
+        num_casts.append(args)
+        return astype(self, *args, **kwargs)
+    hamiltonian_type.astype = counting_astype
+    try:
+        driver.run_eomcc(method="eomccsd", state_index=[1, 2])
+    finally:
+        hamiltonian_type.astype = astype
+
+    # Check that HBar was cast to single precision once and shared by both roots
+    assert len(num_casts) == 1
+    # Check that methods whose updates go through the double-precision Fortran kernels run in double precision
+    assert driver.get_cc_options("ccsd") is driver.options
+    assert not driver.get_cc_options("ccsdt")["mixed_precision"]
+    assert "Single-precision copies" in driver.plan_memory("ccsd").components
+    assert "Single-precision copies" not in driver.plan_memory("ccsdt").components
+
+    # Check that the converged amplitudes are in double precision
+    assert driver.T.a.dtype == np.float64
+    # Check reference energy
+    assert np.allclose(driver.system.reference_energy, -37.9027681837, atol=1.0e-07)
+    # Check CCSD energy
+    assert np.allclose(driver.correlation_energy, -0.11490198, atol=1.0e-07)
+    assert np.allclose(
+        driver.system.reference_energy + driver.correlation_energy, -38.01767017, atol=1.0e-07
+    )
+    # Check EOMCCSD energies
+    assert np.allclose(driver.vertical_excitation_energy[1], 0.11982887, atol=1.0e-07)
+    assert np.allclose(driver.vertical_excitation_energy[2], 0.53118318, atol=1.0e-07)
+
+if __name__ == "__main__":
+    test_mixed_precision_eomccsd_chplus()
@@ -0,0 +1,34 @@
+"""Multiroot EA-EOMCCSD(2p-1h) computation used to describe the spectrum of the
+open-shell CH molecule by attaching an electron to closed-shell CH+, where the
+sigma vectors of each block of trial vectors are computed together."""
+
+from pathlib import Path
+import numpy as np
+from ccpy.drivers.driver import Driver
+
+TEST_DATA_DIR = str(Path(__file__).parents[1].absolute() / "data")
+
+def test_multiroot_eaeom2_chplus():
+    driver = Driver.from_gamess(
+        logfile=TEST_DATA_DIR + "/chplus/chplus.log",
+        fcidump=TEST_DATA_DIR + "/chplus/chplus.FCIDUMP",
+        nfrozen=0,
+    )
+    driver.system.print_info()
+    driver.options["davidson_solver"] = "multiroot"
+
+    driver.run_cc(method="ccsd")
+    driver.run_hbar(method="ccsd")
+    driver.run_guess(method="eacis", multiplicity=2, roots_per_irrep={"A1": 6, "B1": 0, "B2": 0, "A2": 0}, debug=False, use_symmetry=False)
+    driver.run_eaeomcc(method="eaeom2", state_index=[0, 1, 2, 3, 4, 5])
+
+    expected_vee = [-0.37794266, -0.37794266, -0.14630157, -0.08477113, -0.08109635, -0.08109635]
+
+    # Check CCSD energy
+    assert np.allclose(driver.correlation_energy, -0.11490198, atol=1.0e-07)
+    # Check EA-EOMCCSD energies
+    for n in range(6):
+        assert np.allclose(driver.vertical_excitation_energy[n], expected_vee[n], atol=1.0e-07)
+
+if __name__ == "__main__":
+    test_multiroot_eaeom2_chplus()
@@ -0,0 +1,55 @@
+"""Multiroot (block Davidson) EOMCCSD computation for the CH+ molecule at R = Re,
+where Re = 2.13713 bohr described using the Olsen basis set. The subspace is kept
+small, so that it is collapsed several times, and stored out of core."""
+
+import os
+import tempfile
+from pathlib import Path
+import numpy as np
+from ccpy.drivers.driver import Driver
+
+TEST_DATA_DIR = str(Path(__file__).parents[1].absolute() / "data")
+
+def test_multiroot_eomccsd_chplus():
+
+    with tempfile.TemporaryDirectory() as scratch:
+        driver = Driver.from_gamess(
+            logfile=TEST_DATA_DIR + "/chplus/chplus.log",
+            fcidump=TEST_DATA_DIR + "/chplus/chplus.FCIDUMP",
+            nfrozen=0,
+        )
+        driver.system.print_info()
+        driver.options["RHF_symmetry"] = False
+        driver.options["davidson_solver"] = "multiroot"
+        driver.options["davidson_max_subspace_size"] = 8
+        driver.options["davidson_out_of_core"] = True
+        driver.options["scratch_directory"] = scratch
+        driver.run_cc(method="ccsd")
+        driver.run_hbar(method="ccsd")
+        driver.run_guess(method="cis", multiplicity=1, roots_per_irrep={"A1": 3, "B1": 2, "B2": 2, "A2": 0})
+        driver.run_eomcc(method="eomccsd", state_index=[1, 2, 3, 4, 5, 6, 7])
+
+        # Check that the scratch files were removed
+        assert os.listdir(scratch) == []
+
+    expected_vee = [
+        0.0,
+        0.49906873,
+        0.65438776,
+        0.63633490,
+        0.11982887,
+        0.53118318,
+        0.11982887,
+        0.53118318
+    ]
+
+    # Check reference energy
+    assert np.allclose(driver.system.reference_energy, -37.9027681837, atol=1.0e-07)
+    # Check CCSD energy
+    assert np.allclose(driver.correlation_energy, -0.11490198, atol=1.0e-07)
+    # Check EOMCCSD energies
+    for n in range(1, 8):
+        assert np.allclose(driver.vertical_excitation_energy[n], expected_vee[n], atol=1.0e-07)
+
+if __name__ == "__main__":
+    test_multiroot_eomccsd_chplus()
@@ -0,0 +1,50 @@
+"""CCSD computation for the CH+ molecule at R = Re using integrals read
+from GAMESS-style onebody.inp and twobody.inp files and their binary cache,
+where Re = 2.13713 bohr described using the Olsen basis set."""
+
+import os
+import tempfile
+from pathlib import Path
+import numpy as np
+from ccpy.drivers.driver import Driver
+from ccpy.interfaces.fcidump_tools import load_integrals_from_fcidump
+
+TEST_DATA_DIR = str(Path(__file__).parents[1].absolute() / "data")
+
+def test_onebody_twobody_chplus():
+
+    e1int, e2int, e_nn = load_integrals_from_fcidump(TEST_DATA_DIR + "/chplus/chplus.FCIDUMP", None)
+    norb = e1int.shape[0]
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        onebody = os.path.join(tmpdir, "onebody.inp")
+        twobody = os.path.join(tmpdir, "twobody.inp")
+        # onebody.inp lists the lower triangle of Z; twobody.inp lists every (ij|kl) followed by E_nn
+        idx = np.tril_indices(norb)
+        np.savetxt(onebody, np.column_stack((e1int[idx], np.arange(len(idx[0])) + 1)), fmt=["%23.16E", "%8d"])
+        with open(twobody, "w") as f:
+            ijkl = np.indices((norb,) * 4).reshape(4, -1).T + 1
+            np.savetxt(f, np.column_stack((ijkl, e2int.transpose(0, 2, 1, 3).reshape(-1))), fmt=["%4d"] * 4 + ["%23.16E"])
+            f.write("%4d%4d%4d%4d %23.16E\n" % (0, 0, 0, 0, e_nn))
+
+        # First pass parses the integral files and writes the cache; second pass memory-maps the cache
+        for _ in range(2):
+            driver = Driver.from_gamess(
+                logfile=TEST_DATA_DIR + "/chplus/chplus.log",
+                onebody=onebody,
+                twobody=twobody,
+                nfrozen=0,
+                cache_integrals=True,
+            )
+            driver.run_cc(method="ccsd")
+
+            # Check reference energy
+            assert np.allclose(driver.system.reference_energy, -37.9027681837, atol=1.0e-07)
+            # Check CCSD energy
+            assert np.allclose(driver.correlation_energy, -0.11490198, atol=1.0e-07)
+            assert np.allclose(
+                driver.system.reference_energy + driver.correlation_energy, -38.01767017, atol=1.0e-07
+            )
+
+if __name__ == "__main__":
+    test_onebody_twobody_chplus()
@@ -0,0 +1,46 @@
+"""EOMCCSD computation for the CH+ molecule at R = Re with the DIIS and
+Davidson vectors stored out of core in a scratch directory, where
+Re = 2.13713 bohr described using the Olsen basis set."""
+
+import os
+import tempfile
+from pathlib import Path
+import numpy as np
+from ccpy.drivers.driver import Driver
+
+TEST_DATA_DIR = str(Path(__file__).parents[1].absolute() / "data")
+
+def test_out_of_core_eomccsd_chplus():
+
+    with tempfile.TemporaryDirectory() as scratch:
+        driver = Driver.from_gamess(
+            logfile=TEST_DATA_DIR + "/chplus/chplus.log",
+            fcidump=TEST_DATA_DIR + "/chplus/chplus.FCIDUMP",
+            nfrozen=0,
+        )
+        driver.system.print_info()
+        driver.options["RHF_symmetry"] = False
+        driver.options["diis_out_of_core"] = True
+        driver.options["davidson_out_of_core"] = True
+        driver.options["scratch_directory"] = scratch
+        driver.run_cc(method="ccsd")
+        driver.run_hbar(method="ccsd")
+        driver.run_guess(method="cis", multiplicity=1, roots_per_irrep={"A1": 0, "B1": 2})
+        driver.run_eomcc(method="eomccsd", state_index=[1, 2])
+
+        # Check that the scratch files were removed
+        assert os.listdir(scratch) == []
+
+    # Check reference energy
+    assert np.allclose(driver.system.reference_energy, -37.9027681837, atol=1.0e-07)
+    # Check CCSD energy
+    assert np.allclose(driver.correlation_energy, -0.11490198, atol=1.0e-07)
+    assert np.allclose(
+        driver.system.reference_energy + driver.correlation_energy, -38.01767017, atol=1.0e-07
+    )
+    # Check EOMCCSD energies
+    assert np.allclose(driver.vertical_excitation_energy[1], 0.11982887, atol=1.0e-07)
+    assert np.allclose(driver.vertical_excitation_energy[2], 0.53118318, atol=1.0e-07)
+
+if __name__ == "__main__":
+    test_out_of_core_eomccsd_chplus()
@@ -0,0 +1,53 @@
+"""CR-CC(2,3) computation for the CH+ molecule at R = Re in which the CCSD
+and left-CCSD iterations are interrupted and resumed from their checkpoint
+files, where Re = 2.13713 bohr described using the Olsen basis set."""
+
+import tempfile
+from pathlib import Path
+import numpy as np
+from ccpy.drivers.driver import Driver
+
+TEST_DATA_DIR = str(Path(__file__).parents[1].absolute() / "data")
+
+def test_restart_crcc23_chplus():
+
+    with tempfile.TemporaryDirectory() as checkpoint_directory:
+        # interrupted calculation
+        driver = Driver.from_gamess(
+            logfile=TEST_DATA_DIR + "/chplus/chplus.log",
+            fcidump=TEST_DATA_DIR + "/chplus/chplus.FCIDUMP",
+            nfrozen=0,
+        )
+        driver.system.print_info()
+        driver.options["checkpoint_directory"] = checkpoint_directory
+        driver.options["checkpoint_interval"] = 4
+        driver.options["maximum_iterations"] = 9
+        driver.run_cc(method="ccsd")
+        driver.run_hbar(method="ccsd")
+        driver.run_leftcc(method="left_ccsd")
+
+        # resumed calculation
+        driver = Driver.from_gamess(
+            logfile=TEST_DATA_DIR + "/chplus/chplus.log",
+            fcidump=TEST_DATA_DIR + "/chplus/chplus.FCIDUMP",
+            nfrozen=0,
+        )
+        driver.options["checkpoint_directory"] = checkpoint_directory
+        driver.options["restart"] = True
+        driver.run_cc(method="ccsd")
+        driver.run_hbar(method="ccsd")
+        driver.run_leftcc(method="left_ccsd")
+        driver.run_ccp3(method="crcc23")
+
+        # Check CCSD energy
+        assert np.allclose(driver.correlation_energy, -0.11490198, atol=1.0e-07)
+        assert np.allclose(
+            driver.system.reference_energy + driver.correlation_energy, -38.01767017, atol=1.0e-07
+        )
+        # Check CR-CC(2,3)_D energy
+        assert np.allclose(
+            driver.system.reference_energy + driver.correlation_energy + driver.deltap3[0]["D"], -38.01945272, atol=1.0e-07
+        )
+
+if __name__ == "__main__":
+    test_restart_crcc23_chplus()
@@ -0,0 +1,51 @@
+"""CR-EOMCC(2,3) computation for the CH+ molecule at R = Re using a
+restricted Hamiltonian, in which the beta spin cases of the integrals
+are aliases of the alpha ones, where Re = 2.13713 bohr described
+using the Olsen basis set."""
+
+from pathlib import Path
+import numpy as np
+from ccpy.drivers.driver import Driver
+from ccpy.models.integrals import SortedIntegralAlias
+
+TEST_DATA_DIR = str(Path(__file__).parents[1].absolute() / "data")
+
+def test_restricted_creom23_chplus():
+
+    driver = Driver.from_gamess(
+        logfile=TEST_DATA_DIR + "/chplus/chplus.log",
+        fcidump=TEST_DATA_DIR + "/chplus/chplus.FCIDUMP",
+        nfrozen=0,
+        restricted_integrals=True,
+    )
+    driver.system.print_info()
+    assert isinstance(driver.hamiltonian.bb, SortedIntegralAlias)
+    assert np.shares_memory(driver.hamiltonian.bb.vvvv, driver.hamiltonian.aa.vvvv)
+    assert not driver.hamiltonian.b.oo.flags.writeable
+
+    driver.run_cc(method="ccsd")
+    driver.run_hbar(method="ccsd")
+    # HBar is an independent, writable copy of the bare Hamiltonian
+    assert not isinstance(driver.hamiltonian.bb, SortedIntegralAlias)
+    assert driver.hamiltonian.bb.vvvv.flags.writeable
+    driver.run_guess(method="cis", multiplicity=1, roots_per_irrep={"A1": 0, "B1": 2})
+    driver.run_eomcc(method="eomccsd", state_index=[1])
+    driver.options["energy_shift"] = 0.8
+    driver.options["diis_size"] = 12
+    driver.run_leftcc(method="left_ccsd", state_index=[0, 1])
+    driver.run_ccp3(method="crcc23", state_index=[0, 1])
+
+    # Check reference energy
+    assert np.allclose(driver.system.reference_energy, -37.9027681837, atol=1.0e-07)
+    # Check CCSD energy
+    assert np.allclose(driver.correlation_energy, -0.11490198, atol=1.0e-07)
+    # Check CR-CC(2,3)_A and CR-CC(2,3)_D energies
+    assert np.allclose(driver.correlation_energy + driver.deltap3[0]["A"], -0.1162818221, atol=1.0e-07)
+    assert np.allclose(driver.correlation_energy + driver.deltap3[0]["D"], -0.1166845404, atol=1.0e-07)
+    # Check EOMCCSD and CR-EOMCC(2,3) energies of the 1 Pi state
+    assert np.allclose(driver.vertical_excitation_energy[1], 0.11982887, atol=1.0e-07)
+    assert np.allclose(driver.vertical_excitation_energy[1] + driver.deltap3[1]["A"], 0.11982887 - 0.0016296078, atol=1.0e-07)
+    assert np.allclose(driver.vertical_excitation_energy[1] + driver.deltap3[1]["D"], 0.11982887 - 0.0022877876, atol=1.0e-07)
+
+if __name__ == "__main__":
+    test_restricted_creom23_chplus()
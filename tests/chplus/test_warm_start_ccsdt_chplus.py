@@ -0,0 +1,34 @@
+"""CCSDT computation for the CH+ molecule at R = Re started from the converged
+CCSD amplitudes and the CCSD[T]-like estimate of T3, where Re = 2.13713 bohr
+described using the Olsen basis set."""
+
+from pathlib import Path
+import numpy as np
+from ccpy.drivers.driver import Driver
+
+TEST_DATA_DIR = str(Path(__file__).parents[1].absolute() / "data")
+
+def test_warm_start_ccsdt_chplus():
+
+    driver = Driver.from_gamess(
+        logfile=TEST_DATA_DIR + "/chplus/chplus.log",
+        fcidump=TEST_DATA_DIR + "/chplus/chplus.FCIDUMP",
+        nfrozen=0,
+    )
+    driver.system.print_info()
+    driver.options["RHF_symmetry"] = False
+    driver.run_cc(method="ccsd")
+
+    # Check CCSD energy
+    assert np.allclose(driver.correlation_energy, -0.11490198, atol=1.0e-07)
+
+    driver.run_cc(method="ccsdt")
+
+    # Check CCSDT energy
+    assert np.allclose(driver.correlation_energy, -0.11674744, atol=1.0e-07)
+    assert np.allclose(
+        driver.system.reference_energy + driver.correlation_energy, -38.01951562, atol=1.0e-07
+    )
+
+if __name__ == "__main__":
+    test_warm_start_ccsdt_chplus()
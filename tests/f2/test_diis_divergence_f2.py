@@ -0,0 +1,59 @@
+"""CCSD computation for the doubly ionized F2^(2+) cation, whose Jacobi
+iterations blow up by many orders of magnitude before DIIS extrapolation
+starts, after which DIIS recovers and converges. Non-finite residuals
+pushed to DIIS must be discarded rather than poison the overlap matrix."""
+
+from copy import deepcopy
+import numpy as np
+from pyscf import gto, scf
+from ccpy.drivers.driver import Driver
+from ccpy.drivers.diis import DIIS
+
+
+def test_diis_divergence_f2():
+
+    geometry = [["F", (0.0, 0.0, -2.66816)], ["F", (0.0, 0.0, 2.66816)]]
+    mol = gto.M(
+        atom=geometry,
+        basis="cc-pvdz",
+        charge=2,
+        spin=0,
+        symmetry="D2H",
+        cart=True,
+        unit="Bohr",
+    )
+    mf = scf.RHF(mol)
+    mf.kernel()
+
+    driver = Driver.from_pyscf(mf, nfrozen=2)
+    driver.run_cc(method="ccsd")
+
+    # Check that the CCSD energy of F2^{2+} is correct after the iterations recovered
+    assert np.allclose(driver.system.reference_energy + driver.correlation_energy, -197.59598969, atol=1.0e-07)
+
+    # Check that residuals that are not finite, or whose overlaps overflow, are not stored
+    diis_engine = DIIS(driver.T, 4, False)
+    T = deepcopy(driver.T)
+    dT = deepcopy(driver.T)
+    rng = np.random.default_rng(0)
+    for n in range(3):
+        T.unflatten(driver.T.flatten() + 1.0e-03 * rng.standard_normal(T.ndim))
+        dT.unflatten(1.0e-03 * rng.standard_normal(T.ndim))
+        assert diis_engine.push(T, dT, n) == n
+    dT.unflatten(np.full(T.ndim, np.inf))
+    assert diis_engine.push(T, dT, 3) is None
+    dT.unflatten(np.full(T.ndim, 1.0e+200))
+    assert diis_engine.push(T, dT, 4) is None
+    assert diis_engine.num_stored == 3
+    assert np.all(np.isfinite(diis_engine.B))
+    # Check that a residual that is finite but many orders of magnitude larger gets a vanishing weight
+    dT.unflatten(1.0e+60 * rng.standard_normal(T.ndim))
+    T.unflatten(1.0e+60 * rng.standard_normal(T.ndim))
+    assert diis_engine.push(T, dT, 5) == 3
+    x_xtrap = diis_engine.extrapolate()
+    assert x_xtrap is not None
+    assert np.all(np.isfinite(x_xtrap))
+    assert np.linalg.norm(x_xtrap - driver.T.flatten()) < 1.0
+
+if __name__ == "__main__":
+    test_diis_divergence_f2()
@@ -0,0 +1,61 @@
+"""Momentum-conserving k-point blocks of the MO integrals of a periodic
+H2 chain with 3 k-points, compared against the dense nk^4 array of all
+k-point blocks and the KRHF energy."""
+
+import numpy as np
+from pyscf.pbc import gto, scf
+from pyscf.pbc.lib.kpts_helper import get_kconserv
+from ccpy.interfaces.pyscf_tools import get_pbc_mo_integrals, calc_khf_energy
+
+def get_dense_mo_integrals(cell, kmf, kpts):
+    """Builds the dense chemist-notation array (kp kq|kr ks) of all k-point blocks one block at a time."""
+    nkpts = len(kpts)
+    nmo = kmf.mo_coeff[0].shape[1]
+    kconserv = get_kconserv(cell, kpts)
+    V = np.zeros((nkpts,) * 4 + (nmo,) * 4, dtype=np.complex128)
+    for kp in range(nkpts):
+        for kq in range(nkpts):
+            for kr in range(nkpts):
+                # (kp kq|kr ks) is nonzero for kp - kq + kr - ks = G
+                ks = kconserv[kp, kq, kr]
+                eri_kpt = kmf.with_df.ao2mo(
+                    [kmf.mo_coeff[i] for i in (kp, kq, kr, ks)],
+                    [kpts[i] for i in (kp, kq, kr, ks)],
+                    compact=False,
+                )
+                V[kp, kq, kr, ks] = np.reshape(eri_kpt, (nmo,) * 4) / nkpts
+    return V
+
+def test_pbc_integrals_h2chain():
+
+    cell = gto.Cell()
+    cell.atom = [["H", (0.0, 0.0, 0.0)], ["H", (0.74, 0.0, 0.0)]]
+    cell.a = [[2.5, 0.0, 0.0], [0.0, 6.0, 0.0], [0.0, 0.0, 6.0]]
+    cell.basis = "gth-szv"
+    cell.pseudo = "gth-pade"
+    cell.unit = "Angstrom"
+    cell.mesh = [11, 19, 19]
+    cell.verbose = 0
+    cell.build()
+
+    kpts = cell.make_kpts([3, 1, 1])
+    kmf = scf.KRHF(cell, kpts, exxdiv=None)
+    kmf.conv_tol = 1.0e-10
+    kmf.kernel()
+
+    V_dense = get_dense_mo_integrals(cell, kmf, kpts)
+    for notation in ["chemist", "physics"]:
+        Z, V, e_nuc = get_pbc_mo_integrals(cell, kmf, kpts, notation=notation)
+        # Check that only the nk^3 momentum-conserving blocks are stored
+        assert V.blocks.shape[:3] == (len(kpts),) * 3
+        # Check the k-point blocks against the dense array
+        if notation == "chemist":
+            assert np.allclose(V.to_dense(), V_dense, atol=1.0e-10)
+        else:
+            assert np.allclose(V.to_dense(), V_dense.transpose(0, 2, 1, 3, 4, 6, 5, 7), atol=1.0e-10)
+        # Check the KRHF energy
+        e_hf = calc_khf_energy(Z, V.to_dense(), cell.nelectron, len(kpts), notation) + e_nuc
+        assert np.allclose(e_hf, kmf.energy_tot(), atol=1.0e-07)
+
+if __name__ == "__main__":
+    test_pbc_integrals_h2chain()
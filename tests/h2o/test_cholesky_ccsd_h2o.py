@@ -0,0 +1,44 @@
+"""CCSD computation for the symmetrically stretched H2O molecule with
+R(OH) = 2Re, where Re = 1.84345 bohr, described using the spherical
+cc-pVDZ basis set, using a Hamiltonian represented by Cholesky vectors
+of the two-electron integrals."""
+
+import numpy as np
+from pyscf import scf, gto
+from ccpy.drivers.driver import Driver
+from ccpy.models.integrals import CholeskyVVVV
+
+def test_cholesky_ccsd_h2o():
+    geometry = [["O", (0.0, 0.0, -0.0180)],
+                ["H", (0.0, 3.030526, -2.117796)],
+                ["H", (0.0, -3.030526, -2.117796)]]
+    mol = gto.M(
+        atom=geometry,
+        basis="cc-pvdz",
+        charge=0,
+        spin=0,
+        symmetry="C2V",
+        cart=False,
+        unit="Bohr",
+    )
+    mf = scf.RHF(mol)
+    mf.kernel()
+
+    driver = Driver.from_pyscf(mf, nfrozen=1, use_cholesky=True, cholesky_tol=1.0e-09)
+    # The vvvv integrals are never stored as a four-index array
+    assert isinstance(driver.hamiltonian.aa.vvvv, CholeskyVVVV)
+    driver.run_cc(method="ccsd")
+    driver.run_hbar(method="ccsd")
+    assert isinstance(driver.hamiltonian.ab.vvvv, CholeskyVVVV)
+    driver.run_leftcc(method="left_ccsd")
+
+    # Check reference energy
+    assert np.allclose(driver.system.reference_energy, -75.5877112496, atol=1.0e-07)
+    # Check CCSD energy
+    assert np.allclose(driver.correlation_energy, -0.3403606966, atol=1.0e-07)
+    assert np.allclose(
+        driver.system.reference_energy + driver.correlation_energy, -75.9280719462, atol=1.0e-07
+    )
+
+if __name__ == "__main__":
+    test_cholesky_ccsd_h2o()
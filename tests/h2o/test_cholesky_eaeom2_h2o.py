@@ -0,0 +1,54 @@
+"""EA-EOMCCSD(2p-1h) computation for the symmetrically stretched H2O molecule
+with R(OH) = 2Re, where Re = 1.84345 bohr, described using the spherical
+cc-pVDZ basis set, using a Hamiltonian represented by Cholesky vectors of
+the two-electron integrals, whose vvvv block is never built as a four-index
+array, compared against the same calculation with the full integrals."""
+
+import warnings
+import numpy as np
+from pyscf import scf, gto
+from ccpy.drivers.driver import Driver
+from ccpy.models.integrals import CholeskyVVVV, DenseVVVVWarning
+
+def test_cholesky_eaeom2_h2o():
+    geometry = [["O", (0.0, 0.0, -0.0180)],
+                ["H", (0.0, 3.030526, -2.117796)],
+                ["H", (0.0, -3.030526, -2.117796)]]
+    mol = gto.M(
+        atom=geometry,
+        basis="cc-pvdz",
+        charge=0,
+        spin=0,
+        symmetry="C2V",
+        cart=False,
+        unit="Bohr",
+    )
+    mf = scf.RHF(mol)
+    mf.kernel()
+
+    vee = {}
+    for use_cholesky in [False, True]:
+        driver = Driver.from_pyscf(mf, nfrozen=1, use_cholesky=use_cholesky, cholesky_tol=1.0e-09)
+        driver.run_cc(method="ccsd")
+        driver.run_hbar(method="ccsd")
+        driver.run_guess(method="eacis", multiplicity=2, roots_per_irrep={"A1": 2, "B1": 1, "B2": 1, "A2": 0})
+        if use_cholesky:
+            assert isinstance(driver.hamiltonian.aa.vvvv, CholeskyVVVV)
+        with warnings.catch_warnings():
+            # fail if HR falls back to the dense vvvv array
+            warnings.simplefilter("error", DenseVVVVWarning)
+            driver.run_eaeomcc(method="eaeom2", state_index=[0, 1, 2, 3])
+            vee[use_cholesky] = [driver.vertical_excitation_energy[i] for i in range(4)]
+            # Check the block Davidson solver, whose HR is applied to all trial vectors at once
+            driver.options["davidson_solver"] = "multiroot"
+            driver.run_guess(method="eacis", multiplicity=2, roots_per_irrep={"A1": 2, "B1": 1, "B2": 1, "A2": 0})
+            driver.run_eaeomcc(method="eaeom2", state_index=[0, 1, 2, 3])
+        assert np.allclose([driver.vertical_excitation_energy[i] for i in range(4)], vee[use_cholesky], atol=1.0e-07)
+
+    expected_vee = [-0.01011756, 0.01439506, 0.55095545, 0.59209585]
+    # Check the EA-EOMCCSD energies and that they agree with those obtained with the full integrals
+    assert np.allclose(vee[False], expected_vee, atol=1.0e-07)
+    assert np.allclose(vee[True], vee[False], atol=1.0e-07)
+
+if __name__ == "__main__":
+    test_cholesky_eaeom2_h2o()
@@ -0,0 +1,41 @@
+"""FNO-CCSD computation for the symmetrically stretched H2O molecule with
+R(OH) = 2Re, where Re = 1.84345 bohr, described using the spherical
+cc-pVDZ basis set, where the virtual space is truncated using MP2
+frozen natural orbitals."""
+
+import numpy as np
+from pyscf import scf, gto
+from ccpy.drivers.driver import Driver
+
+def test_fno_ccsd_h2o():
+    geometry = [["O", (0.0, 0.0, -0.0180)],
+                ["H", (0.0, 3.030526, -2.117796)],
+                ["H", (0.0, -3.030526, -2.117796)]]
+    mol = gto.M(
+        atom=geometry,
+        basis="cc-pvdz",
+        charge=0,
+        spin=0,
+        symmetry="C2V",
+        cart=False,
+        unit="Bohr",
+    )
+    mf = scf.RHF(mol)
+    mf.kernel()
+
+    driver = Driver.from_pyscf(mf, nfrozen=1)
+    driver.run_fno(occupation_threshold=1.0e-03)
+    driver.run_cc(method="ccsd")
+
+    # Check the size of the truncated virtual space
+    assert driver.system.nunoccupied_alpha == 13
+    assert driver.system.ndelete == 6
+    # Check reference energy
+    assert np.allclose(driver.system.reference_energy, -75.5877112496, atol=1.0e-07)
+    # Check MP2 correction for the discarded virtuals
+    assert np.allclose(driver.fno_correction, 0.0048825360, atol=1.0e-07)
+    # Check FNO-CCSD energy
+    assert np.allclose(driver.correlation_energy, -0.3374123136, atol=1.0e-07)
+
+if __name__ == "__main__":
+    test_fno_ccsd_h2o()